@@ -0,0 +1,265 @@
+"""
+This module implements the classes `SampleQueue` and `AcquisitionPipeline`, which decouple receiving datasets from\
+the CyberGlove III from processing them (e.g. writing them to a file).
+"""
+
+import sys
+import time
+import threading
+from collections import deque
+
+
+BLOCK = 'block'								# wait until the consumer has made room
+DROP_OLDEST = 'drop-oldest'					# discard the oldest queued sample to make room
+DROP_NEWEST = 'drop-newest'					# discard the new sample
+OVERFLOW_POLICIES = (BLOCK, DROP_OLDEST, DROP_NEWEST)
+
+
+class SampleQueue:
+	"""
+	The class :class:`SampleQueue<cyberglove.acquisition.SampleQueue>` implements a bounded first-in-first-out queue\
+	with a configurable policy for the case that it is full. It counts the dropped samples and the maximum depth,\
+	so backpressure of a slow consumer becomes visible.
+	"""
+	def __init__(self, maxsize=1024, policy=BLOCK, instrumentation=None):
+		"""
+		Args:
+			maxsize (int):						maximum amount of queued samples (defaults to 1024)
+			policy (str):						overflow policy, one of 'block', 'drop-oldest' or 'drop-newest'\
+												(defaults to 'block')
+			instrumentation (Instrumentation):	records waits ('queue_wait') and drops ('queue_drops')\
+												(defaults to None)
+		"""
+		if policy not in OVERFLOW_POLICIES:
+			raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {OVERFLOW_POLICIES}")
+		self.maxsize = maxsize
+		self.policy = policy
+		self._items = deque()
+		self._closed = False
+		self._not_empty = threading.Condition()
+		self._not_full = threading.Condition(self._not_empty)		# both conditions share one lock
+		self.put_count = 0											# amount of samples accepted
+		self.dropped = 0											# amount of samples discarded because of overflow
+		self.max_depth = 0											# maximum amount of queued samples
+		self.blocked_time = 0.0										# seconds the producer waited (policy 'block')
+		self.error = None											# exception of a failed consumer, see fail()
+		self.instrumentation = instrumentation
+
+	def put(self, item):
+		"""
+		Adds a sample to the queue and handles a full queue according to the overflow policy.
+
+		Args:
+			item:	sample to add
+		Returns:
+			bool:	True if the sample was queued, False if it was dropped or the queue is closed
+		"""
+		with self._not_full:
+			if self._closed:
+				return False
+			if len(self._items) >= self.maxsize:
+				if self.policy == DROP_NEWEST:
+					self._count_drop()
+					return False
+				if self.policy == DROP_OLDEST:
+					self._items.popleft()
+					self._count_drop()
+				else:
+					start = time.perf_counter()
+					while len(self._items) >= self.maxsize and not self._closed:
+						self._not_full.wait()
+					waited = time.perf_counter() - start
+					self.blocked_time += waited
+					if self.instrumentation is not None:
+						self.instrumentation.observe('queue_wait', waited)
+					if self._closed:
+						return False
+			self._items.append(item)
+			self.put_count += 1
+			self.max_depth = max(self.max_depth, len(self._items))
+			self._not_empty.notify()
+			return True
+
+	def _count_drop(self):
+		"""
+		Counts a sample dropped because of overflow.
+		"""
+		self.dropped += 1
+		if self.instrumentation is not None:
+			self.instrumentation.count('queue_drops')
+
+	def get(self):
+		"""
+		Removes and returns the oldest sample. Waits until a sample is available.
+
+		Returns:
+			sample or None if the queue was closed and all samples were taken
+		"""
+		with self._not_empty:
+			while not self._items and not self._closed:
+				self._not_empty.wait()
+			if not self._items:
+				return None
+			item = self._items.popleft()
+			self._not_full.notify()
+			return item
+
+	def close(self):
+		"""
+		Closes the queue. Queued samples can still be taken, afterwards :meth:`get` returns None.
+		"""
+		with self._not_empty:
+			self._closed = True
+			self._not_empty.notify_all()
+			self._not_full.notify_all()								# a waiting producer returns as well
+
+	def fail(self, error):
+		"""
+		Closes the queue after its consumer has failed and discards the queued samples, so the producer never waits\
+		for the consumer.
+
+		Args:
+			error (Exception):	exception raised by the consumer
+		"""
+		with self._not_empty:
+			self.error = error
+			self.dropped += len(self._items)
+			self._items.clear()
+		self.close()
+
+	@property
+	def depth(self):
+		"""
+		int: current amount of queued samples
+		"""
+		return len(self._items)
+
+	def statistics(self):
+		"""
+		Returns the counters of the queue.
+
+		Returns:
+			dict:	depth, max_depth, put_count, dropped, blocked_time and error (message of the exception of a failed\
+					consumer or None)
+		"""
+		return {
+			'depth': self.depth,
+			'max_depth': self.max_depth,
+			'put_count': self.put_count,
+			'dropped': self.dropped,
+			'blocked_time': self.blocked_time,
+			'error': None if self.error is None else str(self.error),
+		}
+
+
+class AcquisitionPipeline:
+	"""
+	The class :class:`AcquisitionPipeline<cyberglove.acquisition.AcquisitionPipeline>` reads samples from a source\
+	in a reader thread and passes them to one or more consumers. Every consumer runs in its own thread and is\
+	connected to the reader by its own :class:`SampleQueue`, so a slow consumer (e.g. a stalling disk) does not\
+	reduce the rate at which the source is read.
+	The samples are passed on unchanged, usually they are :class:`Sample<cyberglove.frame_decoder.Sample>` with the\
+	time the dataset was received.
+	"""
+	def __init__(self, source, consumers, maxsize=1024, policy=BLOCK, instrumentation=None):
+		"""
+		Args:
+			source (iterable):					iterable of samples, e.g. `Glove.stream_samples()`
+			consumers (list):					callables, each called with every sample
+			maxsize (int):						maximum amount of queued samples per consumer (defaults to 1024)
+			policy (str):						overflow policy of the queues (defaults to 'block')
+			instrumentation (Instrumentation):	records waits and drops of the queues (defaults to None)
+		"""
+		self.source = source
+		self.consumers = list(consumers)
+		self.queues = [SampleQueue(maxsize, policy, instrumentation) for _ in self.consumers]
+		self._stop = threading.Event()
+		self._reader = None
+		self._workers = []
+
+	def _thread_read_source(self):
+		"""
+		Helper function to read the source and put every sample into the queues of all consumers.
+		Executed in a thread.
+		"""
+		try:
+			for sample in self.source:
+				for q in self.queues:
+					q.put(sample)
+				if self._stop.is_set():
+					break
+		except Exception as msg:									# e.g. socket-errors, the consumers still finish
+			sys.stderr.write('ERROR: {}\n'.format(msg))
+		finally:
+			for q in self.queues:
+				q.close()
+
+	@staticmethod
+	def _thread_consume(q, consumer):
+		"""
+		Helper function to pass the samples of a queue to a consumer.
+		Executed in a thread. If the consumer raises an exception (e.g. a full disk), the queue is closed and the\
+		exception is reported in the statistics, the other consumers continue.
+
+		Args:
+			q (SampleQueue):		queue to take the samples from
+			consumer (callable):	function called with every sample
+		"""
+		sample = q.get()
+		while sample is not None:
+			try:
+				consumer(sample)
+			except Exception as msg:
+				sys.stderr.write('ERROR: consumer failed: {}\n'.format(msg))
+				q.fail(msg)
+				return
+			sample = q.get()
+
+	def start(self):
+		"""
+		Starts the reader thread and the consumer threads.
+		"""
+		self._stop.clear()
+		self._workers = [threading.Thread(target=self._thread_consume, args=(q, consumer))
+						 for q, consumer in zip(self.queues, self.consumers)]
+		for worker in self._workers:
+			worker.start()
+		self._reader = threading.Thread(target=self._thread_read_source)
+		self._reader.start()
+
+	def stop(self):
+		"""
+		Stops the reader after the current dataset and waits until the consumers have processed all queued samples.
+		The queues are closed, so the reader is never blocked by a full queue.
+		"""
+		self._stop.set()
+		for q in self.queues:
+			q.close()
+		self.join()
+
+	def join(self):
+		"""
+		Waits until the source is exhausted and the consumers have processed all queued samples.
+		"""
+		if self._reader is not None:
+			self._reader.join()
+		for worker in self._workers:
+			worker.join()
+
+	def statistics(self):
+		"""
+		Returns the counters of the queues of all consumers.
+
+		Returns:
+			list:	one dict per consumer (see :meth:`SampleQueue.statistics`)
+		"""
+		return [q.statistics() for q in self.queues]
+
+	def errors(self):
+		"""
+		Returns the exceptions of the failed consumers.
+
+		Returns:
+			list:	(consumer, exception) of every consumer that raised an exception
+		"""
+		return [(consumer, q.error) for consumer, q in zip(self.consumers, self.queues) if q.error is not None]
@@ -0,0 +1,367 @@
+"""
+This module implements the classes `GloveServer` and `AsyncGlove` for intercommunication with any number of\
+CyberGloves III from one asyncio event loop.
+"""
+
+import sys
+import time
+import struct
+import asyncio
+from frame_decoder import FrameDecoder, Sample
+from glove import STREAM_START_COMMAND, STREAM_STOP_COMMAND, ANSWER_LENGTHS
+
+
+class AsyncGlove:
+	"""
+	The class :class:`AsyncGlove<cyberglove.async_glove.AsyncGlove>` implements the communication with one\
+	connected CyberGlove III using asyncio streams. Instances are created by\
+	:class:`GloveServer<cyberglove.async_glove.GloveServer>`.
+	Like `Glove`, the methods `*_samples` return :class:`Sample<cyberglove.frame_decoder.Sample>`, whose times are\
+	taken from the clock of the server, so the samples of all gloves of one server can be aligned; the methods\
+	`*_datasets` return only the sensor values.
+	"""
+	def __init__(self, reader, writer, clock):
+		"""
+		Args:
+			reader (asyncio.StreamReader):	stream to receive from
+			writer (asyncio.StreamWriter):	stream to send to
+			clock (callable):				returns the shared monotonic time in seconds
+		"""
+		self._reader = reader
+		self._writer = writer
+		self.clock = clock
+		self.address = writer.get_extra_info('peername')
+		self.decoder = FrameDecoder()
+		self.sequence = 0											# consecutive number of the next sample
+		self._streaming = False										# continuous-output mode started by stream_samples
+		self._stream_lock = asyncio.Lock()
+
+	async def _receive(self):
+		"""
+		Receives bytes from the glove into the decoder.
+
+		Raises:
+			ConnectionError:	if the glove closed the connection
+		"""
+		data = await self._reader.read(4096)
+		if not data:
+			raise ConnectionError(f"Connection closed by the glove {self.address}")
+		self.decoder.feed(data)
+
+	async def send_receive(self, command: str):
+		"""
+		Sends the given command to the glove, reads the answer and cuts off unnecessary bytes
+		(repeated command-bytes and last terminating null-byte)
+
+		Args:
+			command (string):	command to send to the glove
+		Returns:
+			bytes:	sanitized answer
+		"""
+		await self._stop_streaming()
+		self.decoder.clear()										# bytes of earlier answers are not part of this one
+		self._writer.write(bytes(command, 'ascii'))
+		await self._writer.drain()
+		length = ANSWER_LENGTHS.get(command)
+		data = b''
+		while True:												# the answer may arrive in several segments
+			chunk = await self._reader.read(1024)
+			if not chunk:
+				raise ConnectionError(f"Connection closed by the glove {self.address}")
+			data += chunk
+			if length is not None:									# binary answer of known length
+				if len(data) >= len(command) + length + 1:
+					return data[len(command):len(command) + length]
+			elif data.find(b'\0', len(command)) >= 0:				# answer of undefined length, end indicated by null-byte
+				return data[len(command):data.index(b'\0', len(command))]
+
+	async def flush(self, timeout=0.1):
+		"""
+		Discards all bytes the glove has sent, e.g. datasets still in transit after the continuous-output mode was\
+		stopped. Waits until the glove has been silent for `timeout` seconds.
+
+		Args:
+			timeout (float):	seconds of silence (defaults to 0.1)
+		"""
+		try:
+			while await asyncio.wait_for(self._reader.read(4096), timeout):	# flush until the glove stays silent
+				pass
+		except asyncio.TimeoutError:
+			pass
+		self.decoder.clear()										# discard incomplete datasets
+
+	async def _stop_streaming(self):
+		"""
+		Stops the continuous-output mode if it is running and discards the datasets still in transit.
+		The generator of :meth:`stream_samples` is only closed when it is garbage collected after a `break`, so every\
+		command stops the mode first.
+		"""
+		async with self._stream_lock:
+			if not self._streaming:
+				return
+			self._streaming = False
+			if self._writer.is_closing():
+				self.decoder.clear()
+				return
+			self._writer.write(bytes(STREAM_STOP_COMMAND, 'ascii'))
+			await self._writer.drain()
+			await self.flush()
+
+	def _sample(self, frame, timestamp, request_time=None):
+		"""
+		Creates the sample of a received dataset with the next sequence number.
+		"""
+		sample = Sample(timestamp, frame, self.sequence, request_time)
+		self.sequence += 1
+		return sample
+
+	async def get_one_sample(self):
+		"""
+		Requests exactly one 8-bit dataset from the CyberGlove III (command 'G').
+
+		Returns:
+			Sample:	(receive time, dataset consisting of 22 values between 1 and 255, sequence number, request time)
+		"""
+		await self._stop_streaming()
+		request_time = self.clock()
+		self._writer.write(bytes('G', 'ascii'))
+		await self._writer.drain()
+		answers = self.decoder.answers
+		while True:
+			frame = self.decoder.next_frame()
+			if frame is not None:
+				return self._sample(frame, self.clock(), request_time)
+			if self.decoder.answers != answers:					# the answer was corrupt, request the dataset again
+				answers = self.decoder.answers
+				request_time = self.clock()
+				self._writer.write(bytes('G', 'ascii'))
+			await self._receive()
+
+	async def get_one_dataset(self):
+		"""
+		Requests exactly one 8-bit dataset from the CyberGlove III (see :meth:`get_one_sample`).
+
+		Returns:
+			tuple:	dataset consisting of 22 values between 1 and 255
+		"""
+		return (await self.get_one_sample()).values
+
+	async def poll_samples(self):
+		"""
+		Continuously requests single datasets from the glove.
+
+		Yields:
+			Sample:	sample of the dataset
+		"""
+		while True:
+			yield await self.get_one_sample()
+
+	async def poll_datasets(self):
+		"""
+		Continuously requests single datasets from the glove (see :meth:`poll_samples`).
+
+		Yields:
+			tuple:	dataset consisting of 22 values between 1 and 255
+		"""
+		async for sample in self.poll_samples():
+			yield sample.values
+
+	async def stream_samples(self):
+		"""
+		Puts the glove into its continuous-output mode and yields the received datasets. The continuous-output mode\
+		is stopped when the generator is closed or, after a `break`, at the latest by the next command; the datasets\
+		still in transit are discarded.
+
+		Yields:
+			Sample:	sample of the dataset
+		"""
+		await self._stop_streaming()
+		self._writer.write(bytes(STREAM_START_COMMAND, 'ascii'))
+		await self._writer.drain()
+		self._streaming = True
+		try:
+			while self._streaming:
+				await self._receive()
+				timestamp = self.clock()
+				for frame in self.decoder.frames():
+					yield self._sample(frame, timestamp)
+		finally:
+			await self._stop_streaming()							# the datasets in transit are discarded
+
+	async def stream_datasets(self):
+		"""
+		Iterates over the datasets of the continuous-output mode (see :meth:`stream_samples`).
+
+		Yields:
+			tuple:	dataset consisting of 22 values between 1 and 255
+		"""
+		samples = self.stream_samples()
+		try:
+			async for sample in samples:
+				yield sample.values
+		finally:
+			await samples.aclose()									# stops the continuous-output mode
+
+	async def get_glove_information(self):
+		"""
+		Gets information-text from the CyberGlove-microcontroller (command '?i').
+
+		Returns:
+			str:	decoded answer
+		"""
+		return (await self.send_receive('?i')).decode()
+
+	async def get_amount_of_sensors(self):
+		"""
+		Gets the amount of sensors the connected glove (command '?S').
+
+		Returns:
+			int:	either 18 or 22
+		"""
+		return ord(await self.send_receive('?S'))
+
+	async def get_righthanded(self):
+		"""
+		Returns True if the CyberGlove is tailored for a right hand (command '?R').
+
+		Returns:
+			bool:	True if the glove is right-handed
+		"""
+		return ord(await self.send_receive('?R')) == 1
+
+	async def get_version_number(self):
+		"""
+		Queries the version of the CyberGlove (command '?V').
+
+		Returns:
+			tuple:	(Glove-Firmware, internal information format version number)
+		"""
+		return struct.unpack("!" + "H" * 2, await self.send_receive('?V'))
+
+	async def get_device_description(self):
+		"""
+		Queries the properties of the glove like `Glove.get_device_description`, e.g. to identify it in a\
+		:class:`CalibrationCache<cyberglove.calibration_cache.CalibrationCache>`.
+
+		Returns:
+			dict:	information text, amount of sensors, handedness and version
+		"""
+		return {
+			'information': await self.get_glove_information(),
+			'device_sensor_count': await self.get_amount_of_sensors(),
+			'righthanded': await self.get_righthanded(),
+			'version': list(await self.get_version_number()),
+		}
+
+	async def close(self):
+		"""
+		Closes the connection to the glove.
+		"""
+		self._writer.close()
+		try:
+			await self._writer.wait_closed()
+		except ConnectionError:
+			pass
+
+
+class GloveServer:
+	"""
+	The class :class:`GloveServer<cyberglove.async_glove.GloveServer>` listens once on the given port and accepts\
+	any number of CyberGloves III (e.g. both hands of several subjects). Every glove is verified by its connection\
+	confirmation message b'o' and is then provided as :class:`AsyncGlove`.
+	"""
+	def __init__(self, localport=49500, host='', handshake_timeout=5.0):
+		"""
+		Args:
+			localport (int):			port to open (defaults to 49500)
+			host (str):					address to listen on (defaults to all addresses)
+			handshake_timeout (float):	seconds to wait for the confirmation message (defaults to 5.0)
+		"""
+		self.localport = localport
+		self.host = host
+		self.handshake_timeout = handshake_timeout
+		self.gloves = []											# all connected gloves
+		self._t0 = time.monotonic()
+		self._server = None
+		self._connected = None
+
+	def clock(self):
+		"""
+		Shared monotonic clock of all gloves of the server.
+
+		Returns:
+			float:	seconds since the server was created
+		"""
+		return time.monotonic() - self._t0
+
+	async def _handle_connection(self, reader, writer):
+		"""
+		Verifies the connection confirmation message of a new connection and provides the glove.
+		"""
+		try:
+			first_msg = await asyncio.wait_for(reader.read(1024), self.handshake_timeout)
+		except asyncio.TimeoutError:
+			first_msg = b''
+		if first_msg != b'o':										# verify the connection confirmation message >>b'o'
+			sys.stderr.write(f"Glove {writer.get_extra_info('peername')} did not respond correctly\n")
+			writer.close()
+			return
+		glove = AsyncGlove(reader, writer, self.clock)
+		self.gloves.append(glove)
+		await self._connected.put(glove)
+
+	async def start(self):
+		"""
+		Starts listening for incoming connections.
+		"""
+		self._connected = asyncio.Queue()							# created here to be bound to the running event loop
+		self._server = await asyncio.start_server(self._handle_connection, self.host, self.localport, reuse_address=True)
+		print(f"Waiting for connections on port {self.localport}...")
+
+	async def accept(self):
+		"""
+		Waits until the next glove has connected.
+
+		Returns:
+			AsyncGlove:	the connected glove
+		"""
+		return await self._connected.get()
+
+	async def close(self):
+		"""
+		Stops listening and closes the connections to all gloves.
+		"""
+		if self._server is not None:
+			self._server.close()
+			await self._server.wait_closed()
+			self._server = None
+		for glove in self.gloves:
+			await glove.close()
+		self.gloves.clear()
+
+	async def __aenter__(self):
+		await self.start()
+		return self
+
+	async def __aexit__(self, exc_type, exc_value, traceback):
+		await self.close()
+
+
+if __name__ == "__main__":
+	async def main(glove_count=2, duration=5.0):
+		# record both hands: wait for two gloves and stream their datasets at the same time
+		async with GloveServer() as server:
+			gloves = [await server.accept() for _ in range(glove_count)]
+
+			async def count_samples(glove):
+				count = 0
+				start = server.clock()
+				async for sample in glove.stream_samples():
+					count += 1
+					if sample.timestamp - start > duration:
+						break
+				print(f"{glove.address}: {count / duration:.1f} datasets/s")
+
+			await asyncio.gather(*(count_samples(glove) for glove in gloves))
+
+	asyncio.run(main())
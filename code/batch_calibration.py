@@ -0,0 +1,398 @@
+"""
+This module implements the batch calibration of many recorded sessions. Every recording (written by\
+`Glove.write_continuous_datasets` into a `.npy` or `.cg3s` file) is accompanied by a JSON file with the same name,\
+which annotates the calibration poses:
+
+	{
+		"subject": "S01",									(defaults to the name of the recording)
+		"session": "1",										(defaults to "")
+		"glove": {"information": "...", "device_sensor_count": 22,	(description of the device for the cache, defaults\
+				  "righthanded": true, "version": [1, 2]},			to the metadata of a `.cg3s` recording)
+		"sensors": [0, 1, 2],								(defaults to all 22 sensors)
+		"poses": [{"angle": 0, "start": 2.0, "end": 4.5},	(prescribed angle and time range of the recording)
+				  {"angle": 35, "start": 8.0, "end": 10.0}],
+		"separation": [{"sensor": 10, "left": 5, "right": 8,	(optional: separation sensor, its neighbored flexion\
+						"poses": [...]}],						sensors and the poses of the separation angle)
+		"thumb": [{"sensor": 3, "adjacent": 0,				(optional: CMC sensor and the CMC sensor influencing it,\
+				   "start": 20.0, "end": 25.0}]				moved while the angle of the first stays at 0 degrees)
+	}
+
+The recordings are calibrated in a process pool and the parameters are written into one table:
+
+	flexion:	gain and offset of every sensor with `method_1.py` to `method_3.py`
+	separation:	gain, offset and corrections c1, c2 of `method_3.calc_sep`, gain and cross-talk factors c1 to c5 of\
+				`method_2.calc_c_sep` (relative to the neutral sensor values, i.e. the flexion pose at 0 degrees)
+	thumb:		cross-talk factor c1 of `method_2.calc_c_thumb` (relative to the neutral sensor values)
+
+The closed-loop fit of the thumb CMC gains (`method_2.calc_g_closed_loop`) is not part of the batch calibration, as it\
+needs the gains of six other joints and a pinch recording of the subject. The batch calibration is started with:
+
+	python batch_calibration.py recordings/ --output parameters.csv --workers 8
+
+With `--cache` the fitted parameters are stored in a `CalibrationCache`, so unchanged recordings are not fitted again.
+"""
+
+import os
+import sys
+import csv
+import glob
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import method_1
+import method_2
+import method_3
+from recorder import load_recording
+from session_file import SessionReader
+from calibration_cache import CalibrationCache, glove_identity, hash_arrays
+
+
+METHODS = (1, 2, 3)
+RECORDING_SUFFIXES = ('.npy', '.cg3s')
+TABLE_COLUMNS = ('subject', 'session', 'recording', 'method', 'kind', 'sensor', 'neighbor_1', 'neighbor_2', 'gain',
+				 'offset', 'c1', 'c2', 'c3', 'c4', 'c5', 'neutral', 'neutral_1', 'neutral_2', 'samples')
+
+
+def find_recordings(directory):
+	"""
+	Lists the annotated recordings of a directory.
+
+	Args:
+		directory (str):	directory containing `.npy` or `.cg3s` recordings and their `.json` annotations
+	Returns:
+		list:	(recording, annotation) paths, sorted by name; recordings without annotation are skipped
+	"""
+	jobs = []
+	recordings = [path for suffix in RECORDING_SUFFIXES for path in glob.glob(os.path.join(directory, '*' + suffix))]
+	for recording in sorted(recordings):
+		annotation = os.path.splitext(recording)[0] + '.json'
+		if os.path.exists(annotation):
+			jobs.append((recording, annotation))
+		else:
+			sys.stderr.write('WARNING: no annotation for {}, skipped\n'.format(recording))
+	return jobs
+
+
+def pose_values(timestamps, values, poses):
+	"""
+	Cuts the datasets of every annotated pose out of a recording.
+
+	Args:
+		timestamps (array):	timestamps of the datasets of shape (n,)
+		values (array):		sensor values of shape (n, 22)
+		poses (list):		dicts with the prescribed 'angle' and the time range 'start' to 'end' of every pose
+	Returns:
+		list:	(angle, values of shape (samples, 22)) of every pose
+	Raises:
+		ValueError:	if a pose contains no dataset
+	"""
+	result = []
+	for pose in poses:
+		first, last = np.searchsorted(timestamps, [pose['start'], pose['end']], side='left')
+		if last <= first:
+			raise ValueError(f"Pose {pose} contains no dataset")
+		result.append((float(pose['angle']), np.asarray(values[first:last], dtype=np.float64)))
+	return result
+
+
+def fit_poses(poses, method):
+	"""
+	Calibrates all sensors with one of the methods.
+
+	Args:
+		poses (list):	(angle, values of shape (samples, sensors)) of every pose, see :func:`pose_values`
+		method (int):	1, 2 or 3
+	Returns:
+		tuple:	gains and offsets of shape (sensors,), so that angle = gain * s + offset
+	"""
+	if len(poses) < 2:
+		raise ValueError(f"At least two poses are required, got {len(poses)}")
+	if method in (1, 2):
+		# both use the mean sensor values of the first two poses
+		(a1, values_1), (a2, values_2) = poses[:2]
+		s1, s2 = values_1.mean(axis=0), values_2.mean(axis=0)
+		if method == 1:
+			return method_1.calibrate(s1, s2, a1, a2)
+		gain = method_2.calc_g_lin(s1, s2, a1, a2)
+		# method_2 converts relative sensor values: angle = g * (s - s_neutral), the neutral sensor value is where the\
+		# line through both poses crosses 0 degrees, so no pose at 0 degrees is needed
+		return gain, a1 - gain * s1
+	if method == 3:
+		# all datasets of all poses enter the least-squares fit, all sensors in one call
+		s = np.concatenate([values for _, values in poses]).T
+		a = np.concatenate([np.full(len(values), angle) for angle, values in poses])
+		return method_3.calc_g_and_o_lin(s, a)
+	raise ValueError(f"Unknown method {method!r}, expected one of {METHODS}")
+
+
+def _neutral_values(poses):
+	"""
+	Returns the mean sensor values of the flexion pose at 0 degrees, which the relative sensor values of\
+	`method_2.py` refer to.
+
+	Args:
+		poses (list):	(angle, values of shape (samples, 22)) of every flexion pose
+	Returns:
+		numpy.ndarray:	neutral sensor values of shape (22,)
+	Raises:
+		ValueError:	if there is no pose at 0 degrees
+	"""
+	for angle, values in poses:
+		if angle == 0:
+			return values.mean(axis=0)
+	raise ValueError("The cross-talk fits of method 2 need a flexion pose at 0 degrees")
+
+
+def fit_separation(entries, flexion_poses, method):
+	"""
+	Calibrates the separation sensors with method 2 (gain and cross-talk factors) or method 3 (gain, corrections\
+	and offset).
+
+	Args:
+		entries (list):			(annotation, poses) of every separation sensor; the annotation holds 'sensor', 'left'\
+								and 'right', the poses are (angle, values of shape (samples, 22)) of the separation angle
+		flexion_poses (list):	(angle, values of shape (samples, 22)) of every flexion pose
+		method (int):			2 or 3
+	Returns:
+		dict:	'gain', 'offset' (method 3) and 'samples' of shape (entries,), 'c' of shape (entries, 5) and 'neutral'\
+				(method 2) of shape (entries, 3); parameters a method does not have are nan
+	"""
+	count = len(entries)
+	result = {'gain': np.full(count, np.nan), 'offset': np.full(count, np.nan), 'c': np.full((count, 5), np.nan),
+			  'neutral': np.full((count, 3), np.nan), 'samples': np.zeros(count, dtype=int)}
+	if method == 3:
+		s_flexion = np.concatenate([values for _, values in flexion_poses])
+		a_flexion = np.concatenate([np.full(len(values), angle) for angle, values in flexion_poses])
+	elif method == 2:
+		neutral = _neutral_values(flexion_poses)
+	else:
+		raise ValueError(f"Method {method!r} has no separation calibration, expected 2 or 3")
+	for number, (entry, poses) in enumerate(entries):
+		if len({angle for angle, _ in poses}) < 2:
+			raise ValueError(f"The separation poses of sensor {entry['sensor']} need at least two different angles")
+		columns = [entry['sensor'], entry['left'], entry['right']]
+		result['samples'][number] = sum(len(values) for _, values in poses)
+		if method == 3:
+			# the flexion angles of the neighbors are computed with their method 3 calibration
+			g_lr, o_lr = method_3.calc_g_and_o_lin(s_flexion[:, columns[1:]].T, a_flexion)
+			s = np.concatenate([values[:, columns] for _, values in poses])
+			a = np.concatenate([np.full(len(values), angle) for angle, values in poses])
+			gain, correction1, correction2, offset = method_3.calc_sep(*s.T, a, *g_lr, *o_lr)
+			result['gain'][number], result['offset'][number] = gain, offset
+			result['c'][number, :2] = correction1, correction2
+		else:
+			(a1, values_1), (a2, values_2) = poses[0], next(pose for pose in poses if pose[0] != poses[0][0])
+			gain = method_2.calc_g_lin(values_1[:, columns[0]].mean(), values_2[:, columns[0]].mean(), a1, a2)
+			# the cross talk is fitted to the datasets at a separation angle of 0 degrees
+			zero = [values[:, columns] for angle, values in poses if angle == 0]
+			if not zero:
+				raise ValueError(f"The separation poses of sensor {entry['sensor']} contain no pose at 0 degrees")
+			relative = method_2.calc_s_rel(np.concatenate(zero), neutral[columns])
+			result['gain'][number] = gain
+			result['c'][number] = method_2.calc_c_sep(*relative.T, gain)
+			result['neutral'][number] = neutral[columns]
+	return result
+
+
+def fit_thumb(entries, flexion_poses):
+	"""
+	Fits the cross-talk factors of the thumb CMC sensors with method 2.
+
+	Args:
+		entries (list):			(annotation, values of shape (samples, 22)) of every CMC sensor; the annotation holds\
+								'sensor' and 'adjacent'
+		flexion_poses (list):	(angle, values of shape (samples, 22)) of every flexion pose
+	Returns:
+		dict:	'c' and 'samples' of shape (entries,), 'neutral' of shape (entries, 2)
+	"""
+	neutral = _neutral_values(flexion_poses)
+	result = {'c': np.full(len(entries), np.nan), 'neutral': np.full((len(entries), 2), np.nan),
+			  'samples': np.zeros(len(entries), dtype=int)}
+	for number, (entry, values) in enumerate(entries):
+		columns = [entry['sensor'], entry['adjacent']]
+		relative = method_2.calc_s_rel(values[:, columns], neutral[columns])
+		result['c'][number] = method_2.calc_c_thumb(*relative.T)[0]
+		result['neutral'][number] = neutral[columns]
+		result['samples'][number] = len(values)
+	return result
+
+
+def calibrate_recording(recording, annotation, methods=METHODS, cache=None):
+	"""
+	Calibrates one recording.
+
+	Args:
+		recording (str):			path of the `.npy` or `.cg3s` recording
+		annotation (str):			path of the `.json` annotation of the poses
+		methods (tuple):			methods to calibrate with (defaults to (1, 2, 3))
+		cache (CalibrationCache):	cache of fitted parameters (defaults to None)
+	Returns:
+		list:	one dict per method, kind and sensor with the keys of :data:`TABLE_COLUMNS`
+	"""
+	with open(annotation) as file:
+		description = json.load(file)
+	if recording.endswith('.cg3s'):
+		with SessionReader(recording) as reader:
+			timestamps, values = reader.read()
+			identity = glove_identity(description.get('glove', reader.metadata))
+	else:
+		timestamps, values = load_recording(recording)
+		identity = glove_identity(description.get('glove', {}))
+	sensors = description.get('sensors', list(range(values.shape[1])))
+	all_poses = pose_values(timestamps, values, description['poses'])
+	poses = [(angle, block[:, sensors]) for angle, block in all_poses]
+	separation = [(entry, pose_values(timestamps, values, entry['poses'])) for entry in description.get('separation', [])]
+	thumb = [(entry, pose_values(timestamps, values, [dict(entry, angle=0)])[0][1])
+			 for entry in description.get('thumb', [])]
+	name = os.path.splitext(os.path.basename(recording))[0]
+	if cache is not None:
+		# the parameters only depend on the glove, the method, the annotated sensors and angles and the pose values
+		annotated = json.dumps([description.get(key) for key in ('sensors', 'poses', 'separation', 'thumb')],
+							   sort_keys=True)
+		samples_hash = hash_arrays(np.frombuffer(annotated.encode(), dtype=np.uint8),
+								   *(block for _, block in all_poses),
+								   *(block for _, blocks in separation for _, block in blocks),
+								   *(block for _, block in thumb))
+
+	def fit(method, kind, fit_parameters):
+		if cache is None:
+			return fit_parameters()
+		# every kind is a separate entry, the flexion entries keep the key of the method
+		key = method if kind == 'flexion' else f"{method}-{kind}"
+		return cache.get_or_fit(identity, key, samples_hash, fit_parameters)
+
+	common = {'subject': description.get('subject', name), 'session': description.get('session', ''),
+			  'recording': name}
+	rows = []
+	with np.errstate(divide='ignore', invalid='ignore'):			# identical sensor values yield inf or nan
+		for method in methods:
+			parameters = fit(method, 'flexion', lambda: dict(zip(('gain', 'offset'), fit_poses(poses, method))))
+			for sensor, gain, offset in zip(sensors, np.broadcast_to(parameters['gain'], len(sensors)),
+											np.broadcast_to(parameters['offset'], len(sensors))):
+				rows.append(dict(common, method=method, kind='flexion', sensor=sensor, gain=float(gain),
+								 offset=float(offset), samples=sum(len(block) for _, block in poses)))
+			if separation and method in (2, 3):
+				parameters = fit(method, 'separation', lambda: fit_separation(separation, all_poses, method))
+				for number, (entry, _) in enumerate(separation):
+					row = dict(common, method=method, kind='separation', sensor=entry['sensor'],
+							   neighbor_1=entry['left'], neighbor_2=entry['right'], samples=int(parameters['samples'][number]))
+					for column, value in zip(('gain', 'offset', 'c1', 'c2', 'c3', 'c4', 'c5', 'neutral', 'neutral_1',
+											  'neutral_2'), np.hstack([parameters['gain'][number], parameters['offset'][number],
+																	  parameters['c'][number], parameters['neutral'][number]])):
+						if not np.isnan(value):							# parameters of the other method stay empty
+							row[column] = float(value)
+					rows.append(row)
+			if thumb and method == 2:
+				parameters = fit(method, 'thumb', lambda: fit_thumb(thumb, all_poses))
+				for number, (entry, _) in enumerate(thumb):
+					neutral, neutral_1 = parameters['neutral'][number]
+					rows.append(dict(common, method=method, kind='thumb', sensor=entry['sensor'],
+									 neighbor_1=entry['adjacent'], c1=float(parameters['c'][number]),
+									 neutral=float(neutral), neutral_1=float(neutral_1),
+									 samples=int(parameters['samples'][number])))
+	return rows
+
+
+def _calibrate_job(job):
+	"""
+	Helper function to calibrate one recording in a worker process. Errors are reported instead of raised, so one\
+	broken recording does not stop the batch.
+
+	Args:
+		job (tuple):	recording, annotation, methods and cache
+	Returns:
+		list:	rows of the parameter table (empty if the recording could not be calibrated)
+	"""
+	recording, annotation, methods, cache = job
+	try:
+		return calibrate_recording(recording, annotation, methods, cache)
+	except Exception as msg:
+		sys.stderr.write('ERROR: {}: {}\n'.format(recording, msg))
+		return []
+
+
+def calibrate_directory(directory, methods=METHODS, workers=None, cache=None):
+	"""
+	Calibrates all annotated recordings of a directory in a process pool.
+
+	Args:
+		directory (str):			directory containing `.npy` or `.cg3s` recordings and their `.json` annotations
+		methods (tuple):			methods to calibrate with (defaults to (1, 2, 3))
+		workers (int):				amount of worker processes, 1 to calibrate in this process (defaults to the\
+									amount of CPUs)
+		cache (CalibrationCache):	cache of fitted parameters, shared by all workers (defaults to None)
+	Returns:
+		list:	rows of the parameter table in the order of the recordings
+	"""
+	jobs = [(recording, annotation, tuple(methods), cache) for recording, annotation in find_recordings(directory)]
+	if workers == 1:
+		results = map(_calibrate_job, jobs)
+		return [row for rows in results for row in rows]
+	with ProcessPoolExecutor(max_workers=workers) as executor:
+		chunksize = max(1, len(jobs) // (4 * (workers or os.cpu_count() or 1)))
+		results = executor.map(_calibrate_job, jobs, chunksize=chunksize)
+		return [row for rows in results for row in rows]
+
+
+def write_parameter_table(rows, file):
+	"""
+	Writes the calibration parameters into a CSV file.
+
+	Args:
+		rows (list):	rows as returned by :func:`calibrate_directory`
+		file (str):		path of the CSV file
+	"""
+	with open(file, 'w', newline='') as output:
+		writer = csv.DictWriter(output, fieldnames=TABLE_COLUMNS)
+		writer.writeheader()
+		writer.writerows(rows)
+
+
+def measure_scaling(directory, methods=METHODS, worker_counts=(1, 2, 4, 8)):
+	"""
+	Measures the speedup of the batch calibration with different amounts of worker processes.
+
+	Args:
+		directory (str):		directory containing `.npy` or `.cg3s` recordings and their `.json` annotations
+		methods (tuple):		methods to calibrate with (defaults to (1, 2, 3))
+		worker_counts (tuple):	amounts of worker processes to measure (defaults to (1, 2, 4, 8))
+	Returns:
+		list:	one dict per amount of workers with the keys workers, seconds, speedup and efficiency
+	"""
+	results = []
+	for workers in worker_counts:
+		start = time.perf_counter()
+		calibrate_directory(directory, methods, workers)
+		seconds = time.perf_counter() - start
+		speedup = results[0]['seconds'] / seconds if results else 1.0
+		results.append({'workers': workers, 'seconds': seconds, 'speedup': speedup,
+						'efficiency': speedup * worker_counts[0] / workers})
+	return results
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Calibrates all annotated recordings of a directory.")
+	parser.add_argument("directory", help="directory containing .npy or .cg3s recordings and their .json annotations")
+	parser.add_argument("--output", default="calibration_parameters.csv", help="CSV file to write the parameters to")
+	parser.add_argument("--methods", type=int, nargs='+', default=list(METHODS), choices=METHODS,
+						help="calibration methods to apply")
+	parser.add_argument("--workers", type=int, default=None, help="amount of worker processes (defaults to the "
+																   "amount of CPUs)")
+	parser.add_argument("--cache", default=None, help="directory of the parameter cache (defaults to no cache)")
+	parser.add_argument("--cache-size", type=float, default=16.0, help="maximum size of the cache in MiB")
+	parser.add_argument("--scaling", type=int, nargs='*', default=None,
+						help="additionally measure the speedup with these amounts of workers (e.g. 1 2 4 8)")
+	args = parser.parse_args()
+
+	cache = None if args.cache is None else CalibrationCache(args.cache, int(args.cache_size * 2 ** 20))
+	start = time.perf_counter()
+	rows = calibrate_directory(args.directory, args.methods, args.workers, cache)
+	write_parameter_table(rows, args.output)
+	print(f"{len(rows)} parameters written to {args.output} in {time.perf_counter() - start:.2f} s")
+
+	if args.scaling is not None:
+		for result in measure_scaling(args.directory, args.methods, tuple(args.scaling) or (1, 2, 4, 8)):
+			print(f"{result['workers']:3d} workers: {result['seconds']:8.2f} s, speedup {result['speedup']:5.2f}, "
+				  f"efficiency {result['efficiency']:5.2f}")
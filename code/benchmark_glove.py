@@ -0,0 +1,393 @@
+"""
+This module measures the acquisition modes of the classes `Glove` and `GloveServer`.
+By default every measurement runs against emulated gloves (see `emulator.py`) started as separate processes, so the\
+results are reproducible without hardware and the emulator does not load the measured process.
+The results (samples/s, latency percentiles, jitter, CPU time and allocations per sample) are printed and written\
+to a JSON file, which can be compared with the results of a previous release. The allocations are traced with\
+`tracemalloc` in a separate pass after every timed measurement, as tracing slows down every allocation.
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+import numpy as np
+from glove import Glove
+from async_glove import GloveServer
+
+
+EMULATOR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "emulator.py")
+# metrics where a higher value is better, all others are better when lower
+HIGHER_IS_BETTER = ('samples_per_s',)
+COMPARED_METRICS = ('samples_per_s', 'latency_p50_ms', 'latency_p99_ms', 'cpu_time_per_sample_us')
+ALLOCATION_SAMPLES = 500											# samples of the pass tracing the allocations
+
+
+def start_emulator(port, **settings):
+	"""
+	Starts an emulated glove in a separate process. It connects as soon as the port is opened.
+
+	Args:
+		port (int):		port the computer listens on
+		**settings:		command line options of the emulator, e.g. latency=0.002
+	Returns:
+		subprocess.Popen:	the emulator process
+	"""
+	command = [sys.executable, EMULATOR, "--port", str(port)]
+	for name, value in settings.items():
+		if value is not None:
+			command += ["--" + name.replace('_', '-'), str(value)]
+	return subprocess.Popen(command)
+
+
+def _trace_allocations(run):
+	"""
+	Traces the memory allocated while `run` takes samples. Allocations of the benchmark itself and of `tracemalloc`\
+	are excluded, so only the acquisition is measured.
+
+	Args:
+		run (callable):	takes samples without storing them and returns their amount
+	Returns:
+		dict:	blocks still allocated by the acquisition afterwards per sample ('retained_blocks_per_sample') and\
+				peak of the memory allocated meanwhile ('peak_allocated_kib')
+	"""
+	excluded = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+	tracemalloc.start()
+	try:
+		before = tracemalloc.take_snapshot().filter_traces(excluded)
+		tracemalloc.reset_peak()
+		start = tracemalloc.get_traced_memory()[0]
+		samples = run()
+		peak = tracemalloc.get_traced_memory()[1]
+		after = tracemalloc.take_snapshot().filter_traces(excluded)
+	finally:
+		tracemalloc.stop()
+	blocks = sum(statistic.count_diff for statistic in after.compare_to(before, 'filename'))
+	return {'retained_blocks_per_sample': blocks / max(samples, 1), 'peak_allocated_kib': (peak - start) / 1024}
+
+
+def _statistics(mode, receive_times, wait_times, cpu_time, allocations, **extra):
+	"""
+	Computes the benchmark metrics of one measurement.
+
+	Args:
+		mode (str):					name of the measurement
+		receive_times (list):		times in seconds the samples were received
+		wait_times (list):			latency of every sample in seconds, None if not measurable
+		cpu_time (float):			CPU time of the process in seconds
+		allocations (dict):			result of :func:`_trace_allocations`
+		**extra:					further values to store with the result
+	Returns:
+		dict:	metrics of the measurement
+	"""
+	samples = len(receive_times)
+	result = {'mode': mode, 'samples': samples}
+	result.update(extra)
+	if samples < 2:
+		return result
+	receive_times = np.asarray(receive_times)
+	intervals = np.diff(receive_times) * 1e3
+	result['samples_per_s'] = (samples - 1) / (receive_times[-1] - receive_times[0])
+	if wait_times is not None:
+		p50, p90, p99 = np.percentile(np.asarray(wait_times) * 1e3, [50, 90, 99])
+		result.update(latency_p50_ms=p50, latency_p90_ms=p90, latency_p99_ms=p99,
+					  latency_max_ms=max(wait_times) * 1e3)
+	result['interval_mean_ms'] = intervals.mean()
+	result['jitter_ms'] = intervals.std()							# standard deviation of the inter-sample interval
+	result['cpu_time_per_sample_us'] = cpu_time / samples * 1e6
+	result.update(allocations)
+	return result
+
+
+def _measure(mode, iterator, duration, **extra):
+	"""
+	Takes samples from the iterator for the given duration. The latency of a sample is the time between its request\
+	and its reception, for samples without request (continuous-output mode) the time waited for it. Afterwards the\
+	allocations of further samples are traced.
+
+	Args:
+		mode (str):				name of the measurement
+		iterator (iterator):	yields samples
+		duration (float):		duration of the measurement in seconds
+		**extra:				further values to store with the result
+	Returns:
+		dict:	metrics of the measurement
+	"""
+	receive_times = []
+	wait_times = []
+	cpu = time.process_time()
+	end = time.perf_counter() + duration
+	before = time.perf_counter()
+	while before < end:
+		sample = next(iterator)
+		after = time.perf_counter()
+		receive_times.append(sample.timestamp)
+		if sample.request_time is None:
+			wait_times.append(after - before)
+		else:
+			wait_times.append(sample.timestamp - sample.request_time)
+		before = after
+	cpu = time.process_time() - cpu
+
+	def take_samples():
+		for _ in range(ALLOCATION_SAMPLES):
+			next(iterator)
+		return ALLOCATION_SAMPLES
+
+	return _statistics(mode, receive_times, wait_times, cpu, _trace_allocations(take_samples), **extra)
+
+
+def measure_polling(gl: Glove, duration=5.0):
+	"""
+	Measures the polling loop (`Glove.poll_samples`), which requests every dataset with a separate 'G' command.
+
+	Args:
+		gl (Glove):			connected glove
+		duration (float):	duration of the measurement in seconds (defaults to 5.0)
+	Returns:
+		dict:	metrics of the measurement
+	"""
+	return _measure('polling', gl.poll_samples(), duration)
+
+
+def measure_pipelined(gl: Glove, window, duration=5.0, chunk=1000):
+	"""
+	Measures the pipelined polling (see `Glove.get_samples_pipelined`).
+
+	Args:
+		gl (Glove):			connected glove
+		window (int):		amount of requests in flight
+		duration (float):	duration of the measurement in seconds (defaults to 5.0)
+		chunk (int):		amount of datasets requested per call (defaults to 1000)
+	Returns:
+		dict:	metrics of the measurement
+	"""
+	def chunks():
+		while True:
+			yield from gl.get_samples_pipelined(chunk, window=window)
+
+	iterator = chunks()
+	result = _measure(f'pipelined-{window}', iterator, duration, window=window)
+	iterator.close()
+	return result
+
+
+def measure_streaming(gl: Glove, duration=5.0):
+	"""
+	Measures the continuous-output mode (see `Glove.start_streaming`).
+
+	Args:
+		gl (Glove):			connected glove
+		duration (float):	duration of the measurement in seconds (defaults to 5.0)
+	Returns:
+		dict:	metrics of the measurement
+	"""
+	gl.start_streaming()
+	result = _measure('streaming', gl.stream_samples(), duration)
+	gl.stop_streaming()
+	return result
+
+
+def measure_write_continuous(gl: Glove, file, duration=5.0, streaming=False):
+	"""
+	Measures the acquisition used by `Glove.write_continuous_datasets` including writing to the given file.
+	The sample rate and the jitter are computed from the timestamps of the written samples.
+
+	Args:
+		gl (Glove):			connected glove
+		file (str):			file to write to, '.npy' for a binary recording
+		duration (float):	duration of the measurement in seconds (defaults to 5.0)
+		streaming (bool):	use the continuous-output mode (defaults to False)
+	Returns:
+		dict:	metrics of the measurement
+	"""
+	receive_times = []
+	output, write = gl._open_output(file)
+
+	def write_and_count(sample):
+		write(sample)
+		receive_times.append(sample.timestamp)
+
+	def write_samples():
+		gl.start_acquisition([write], streaming=streaming)
+		time.sleep(min(duration, 1.0))
+		return gl.stop_acquisition()[0]['put_count']
+
+	with output:
+		cpu = time.process_time()
+		gl.start_acquisition([write_and_count], streaming=streaming)
+		time.sleep(duration)
+		queue_statistics = gl.stop_acquisition()[0]
+		cpu = time.process_time() - cpu
+		allocations = _trace_allocations(write_samples)
+	mode = 'write-' + os.path.splitext(file)[1][1:] + ('-streaming' if streaming else '')
+	return _statistics(mode, receive_times, None, cpu, allocations, dropped=queue_statistics['dropped'],
+					   max_queue_depth=queue_statistics['max_depth'])
+
+
+def measure_async_gloves(glove_count, duration=5.0, port=49501, **emulator_settings):
+	"""
+	Measures how many gloves one asyncio event loop (see `GloveServer`) can stream from. The emulated gloves run in\
+	separate processes, the CPU time is the one of the event loop's process.
+
+	Args:
+		glove_count (int):		amount of emulated gloves
+		duration (float):		duration of the measurement in seconds (defaults to 5.0)
+		port (int):				port to listen on (defaults to 49501)
+		**emulator_settings:	command line options of the emulators, e.g. rate=1000
+	Returns:
+		dict:	metrics of the measurement
+	"""
+	async def run():
+		async with GloveServer(localport=port) as server:
+			emulators = [start_emulator(port, **emulator_settings) for _ in range(glove_count)]
+			try:
+				gloves = [await server.accept() for _ in range(glove_count)]
+				counts = [0] * glove_count
+				start = server.clock()
+
+				async def count_samples(index, glove):
+					async for sample in glove.stream_samples():
+						counts[index] += 1
+						if sample.timestamp - start > duration:
+							break
+
+				cpu = time.process_time()
+				await asyncio.gather(*(count_samples(i, glove) for i, glove in enumerate(gloves)))
+				cpu = time.process_time() - cpu
+				elapsed = server.clock() - start
+			finally:
+				for emulator in emulators:
+					emulator.terminate()
+					emulator.wait()
+		return {
+			'mode': f'async-{glove_count}',
+			'gloves': glove_count,
+			'samples': sum(counts),
+			'samples_per_s': sum(counts) / elapsed,
+			'min_glove_samples_per_s': min(counts) / elapsed,
+			'cpu_load': cpu / elapsed,									# fraction of one core used by the event loop
+			'cpu_time_per_sample_us': cpu / max(sum(counts), 1) * 1e6,
+		}
+
+	return asyncio.run(run())
+
+
+def compare(results, baseline, tolerance=0.1):
+	"""
+	Compares the results with the results of a previous run and reports regressions.
+
+	Args:
+		results (list):		results of this run
+		baseline (list):	results of the previous run
+		tolerance (float):	relative deterioration that is tolerated (defaults to 0.1)
+	Returns:
+		list:	messages describing the regressions
+	"""
+	previous = {result['mode']: result for result in baseline}
+	regressions = []
+	for result in results:
+		if result['mode'] not in previous:
+			continue
+		for metric in COMPARED_METRICS:
+			old, new = previous[result['mode']].get(metric), result.get(metric)
+			if not old or new is None:
+				continue
+			change = (new - old) / old
+			if metric in HIGHER_IS_BETTER:
+				change = -change
+			if change > tolerance:
+				regressions.append(f"{result['mode']}: {metric} {old:.3f} -> {new:.3f}")
+	return regressions
+
+
+def run_benchmarks(gl: Glove, duration=5.0, windows=(1, 2, 4, 8, 16), async_gloves=(1, 2, 4, 8), port=49501,
+				   **emulator_settings):
+	"""
+	Runs all measurements with a connected glove.
+
+	Args:
+		gl (Glove):				connected glove
+		duration (float):		duration of every measurement in seconds (defaults to 5.0)
+		windows (tuple):		window sizes of the pipelined polling (defaults to (1, 2, 4, 8, 16))
+		async_gloves (tuple):	amounts of emulated gloves for the asyncio measurements, empty to skip them\
+								(defaults to (1, 2, 4, 8))
+		port (int):				port to listen on for the asyncio measurements (defaults to 49501)
+		**emulator_settings:	command line options of the emulators for the asyncio measurements
+	Returns:
+		list:	metrics of all measurements
+	"""
+	results = [measure_polling(gl, duration)]
+	for window in windows:
+		results.append(measure_pipelined(gl, window, duration))
+	results.append(measure_streaming(gl, duration))
+	with tempfile.TemporaryDirectory() as directory:
+		for name in ("output.txt", "output.npy"):
+			results.append(measure_write_continuous(gl, os.path.join(directory, name), duration))
+	for glove_count in async_gloves:
+		results.append(measure_async_gloves(glove_count, duration, port, **emulator_settings))
+	return results
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Benchmarks the acquisition modes of the CyberGlove III interface.")
+	parser.add_argument("--ip", default=None, help="IP address of the computer to benchmark a real glove "
+												   "(an emulated glove is used otherwise)")
+	parser.add_argument("--port", type=int, default=49500, help="port to listen on")
+	parser.add_argument("--duration", type=float, default=5.0, help="duration of every measurement in seconds")
+	parser.add_argument("--rate", type=float, default=100.0, help="emulated rate of the continuous-output mode")
+	parser.add_argument("--latency", type=float, default=0.002, help="emulated latency of the answers in seconds")
+	parser.add_argument("--jitter", type=float, default=0.001, help="emulated jitter of the answers in seconds")
+	parser.add_argument("--output", default="benchmark_results.json", help="file to write the results to")
+	parser.add_argument("--baseline", default=None, help="results of a previous run to compare with")
+	parser.add_argument("--tolerance", type=float, default=0.1, help="tolerated relative deterioration")
+	args = parser.parse_args()
+
+	settings = {'rate': args.rate, 'latency': args.latency, 'jitter': args.jitter}
+	emulator = None
+	gl = Glove()
+	if args.ip is None:
+		emulator = start_emulator(args.port, **settings)
+	if not gl.connect_glove(args.ip or "127.0.0.1", args.port):
+		print("Error establishing a connection to the glove")
+		exit(1)
+	try:
+		results = run_benchmarks(gl, args.duration, async_gloves=() if args.ip else (1, 2, 4, 8),
+								 port=args.port + 1, **settings)
+	finally:
+		gl.disconnect_glove()
+		if emulator is not None:
+			emulator.terminate()
+			emulator.wait()
+
+	for result in results:
+		print(f"{result['mode']:>20}: {result.get('samples_per_s', 0):10.1f} samples/s, "
+			  f"p50 {result.get('latency_p50_ms', float('nan')):7.3f} ms, "
+			  f"p99 {result.get('latency_p99_ms', float('nan')):7.3f} ms, "
+			  f"jitter {result.get('jitter_ms', float('nan')):7.3f} ms, "
+			  f"cpu {result.get('cpu_time_per_sample_us', float('nan')):8.1f} us/sample")
+	report = {
+		'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+		'python': platform.python_version(),
+		'platform': platform.platform(),
+		'glove': 'real' if args.ip else 'emulated',
+		'settings': settings,
+		'duration': args.duration,
+		'results': results,
+	}
+	with open(args.output, "w") as fp:
+		json.dump(report, fp, indent=2)
+	print(f"Results written to {args.output}")
+	if args.baseline is not None:
+		with open(args.baseline) as fp:
+			regressions = compare(results, json.load(fp)['results'], args.tolerance)
+		for regression in regressions:
+			print("REGRESSION", regression)
+		if regressions:
+			exit(1)
@@ -0,0 +1,223 @@
+"""
+This module implements the class `CalibrationModel`, which converts the sensor values of whole recordings (or of\
+the live stream) into joint angles with the calibration parameters of `method_1.py` to `method_3.py`.
+"""
+
+import numpy as np
+from frame_decoder import SENSOR_COUNT
+
+
+def _affine(sensor, gain, offset=0.0):
+	"""
+	Returns the affine form gain * s[sensor] + offset as (constant, {sensor: coefficient}).
+	"""
+	return offset, {sensor: gain}
+
+
+def _difference(form_a, form_b):
+	"""
+	Returns the difference of two affine forms.
+	"""
+	constant = form_a[0] - form_b[0]
+	linear = dict(form_a[1])
+	for sensor, coefficient in form_b[1].items():
+		linear[sensor] = linear.get(sensor, 0.0) - coefficient
+	return constant, linear
+
+
+class CalibrationModel:
+	"""
+	The class :class:`CalibrationModel<cyberglove.calibration.CalibrationModel>` collects the calibration of every\
+	joint as a polynomial of second order in the sensor values and compiles all of them into arrays:
+
+		angles = offsets + s @ linear + (s[:, a] * s[:, b]) @ quadratic
+
+	Thereby a (n, 22) block of sensor values is converted into (n, joints) angles in one vectorized pass instead of\
+	calling `calc_alpha`, `calc_theta`, `calc_phi` or `calc_psi` for every sample and joint.
+	Relative sensor values of `method_2.py` (s - s_neutral) are folded into the coefficients.
+	"""
+	def __init__(self, sensor_count=SENSOR_COUNT):
+		"""
+		Args:
+			sensor_count (int):	amount of sensor values in one dataset (defaults to 22)
+		"""
+		self.sensor_count = sensor_count
+		self.joints = []								# names of the joints in the order of the output columns
+		self._terms = []								# (constant, {sensor: coefficient}, {(a, b): coefficient})
+		self._compiled = None
+
+	def add_polynomial(self, name, constant=0.0, linear=None, quadratic=None):
+		"""
+		Adds a joint whose angle is a polynomial of second order in the sensor values.
+
+		Args:
+			name (str):			name of the joint
+			constant (float):	constant term (defaults to 0.0)
+			linear (dict):		coefficients of the sensor values {sensor: coefficient} (defaults to None)
+			quadratic (dict):	coefficients of the products {(sensor_a, sensor_b): coefficient} (defaults to None)
+		Returns:
+			int:	column of the joint in the output
+		"""
+		if name in self.joints:
+			raise ValueError(f"Joint {name!r} was already added")
+		self.joints.append(name)
+		self._terms.append((float(constant), dict(linear or {}), dict(quadratic or {})))
+		self._compiled = None
+		return len(self.joints) - 1
+
+	def add_affine(self, name, sensor, gain, offset=0.0):
+		"""
+		Adds a joint calibrated with `method_1.calc_alpha` or `method_3.calc_alpha`: s * gain + offset.
+
+		Args:
+			name (str):			name of the joint
+			sensor (int):		index of the sensor
+			gain (float):		gain
+			offset (float):		offset (defaults to 0.0)
+		Returns:
+			int:	column of the joint in the output
+		"""
+		return self.add_polynomial(name, offset, {sensor: gain})
+
+	def add_flexion(self, name, sensor, gain, s_neutral=0.0):
+		"""
+		Adds a joint calibrated with `method_2.calc_theta`: (s - s_neutral) * g.
+
+		Args:
+			name (str):			name of the joint
+			sensor (int):		index of the sensor
+			gain (float):		gain
+			s_neutral (float):	sensor value in neutral position (defaults to 0.0)
+		Returns:
+			int:	column of the joint in the output
+		"""
+		return self.add_polynomial(name, -gain * s_neutral, {sensor: gain})
+
+	def add_separation(self, name, sensor, sensor_l, sensor_r, g, c, s_neutral=(0.0, 0.0, 0.0)):
+		"""
+		Adds a joint calibrated with `method_2.calc_phi`:
+		g * s + c1 * s_l + c2 * s_r + c3 * s_l**2 + c4 * s_r**2 + c5 * s_l * s_r with relative sensor values.
+
+		Args:
+			name (str):			name of the joint
+			sensor (int):		index of the separation sensor
+			sensor_l (int):		index of the left neighbored flexion sensor
+			sensor_r (int):		index of the right neighbored flexion sensor
+			g (float):			gain of the separation sensor
+			c (list):			correction factors c1 to c5 (result of `method_2.calc_c_sep`)
+			s_neutral (tuple):	sensor values of s, s_l and s_r in neutral position (defaults to zeros)
+		Returns:
+			int:	column of the joint in the output
+		"""
+		c1, c2, c3, c4, c5 = c
+		n, n_l, n_r = s_neutral
+		# expand the polynomial of the relative sensor values s - n into the absolute sensor values
+		constant = -g * n - c1 * n_l - c2 * n_r + c3 * n_l ** 2 + c4 * n_r ** 2 + c5 * n_l * n_r
+		linear = {sensor: g}
+		for key, value in ((sensor_l, c1 - 2 * c3 * n_l - c5 * n_r), (sensor_r, c2 - 2 * c4 * n_r - c5 * n_l)):
+			linear[key] = linear.get(key, 0.0) + value
+		quadratic = {}
+		for key, value in (((sensor_l, sensor_l), c3), ((sensor_r, sensor_r), c4), ((sensor_l, sensor_r), c5)):
+			quadratic[key] = quadratic.get(key, 0.0) + value
+		return self.add_polynomial(name, constant, linear, quadratic)
+
+	def add_thumb(self, name, sensor, sensor_adj, g, c, s_neutral=(0.0, 0.0)):
+		"""
+		Adds a joint calibrated with `method_2.calc_psi`: g * (s + c * s_adj) with relative sensor values.
+
+		Args:
+			name (str):			name of the joint
+			sensor (int):		index of the CMC sensor
+			sensor_adj (int):	index of the adjacent CMC sensor
+			g (float):			gain
+			c (float):			correction factor (result of `method_2.calc_c_thumb`)
+			s_neutral (tuple):	sensor values of s and s_adj in neutral position (defaults to zeros)
+		Returns:
+			int:	column of the joint in the output
+		"""
+		c = float(np.ravel(c)[0])
+		n, n_adj = s_neutral
+		return self.add_polynomial(name, -g * (n + c * n_adj), {sensor: g, sensor_adj: g * c})
+
+	def add_separation_method_3(self, name, sensor, sensor_l, sensor_r, gain, correction1, correction2, offset,
+								flexion_l=(1.0, 0.0), flexion_r=(1.0, 0.0)):
+		"""
+		Adds a joint calibrated with `method_3.calc_sep`:
+		gain * s + correction1 * d**2 + correction2 * d + offset, where d is the difference of the flexion angles\
+		of the neighbored MCP joints.
+
+		Args:
+			name (str):				name of the joint
+			sensor (int):			index of the separation sensor
+			sensor_l (int):			index of the left neighbored flexion sensor
+			sensor_r (int):			index of the right neighbored flexion sensor
+			gain (float):			gain
+			correction1 (float):	correction factor of the squared angle difference
+			correction2 (float):	correction factor of the angle difference
+			offset (float):			offset
+			flexion_l (tuple):		(gain, offset) of the left MCP joint (defaults to raw sensor values)
+			flexion_r (tuple):		(gain, offset) of the right MCP joint (defaults to raw sensor values)
+		Returns:
+			int:	column of the joint in the output
+		"""
+		d_constant, d_linear = _difference(_affine(sensor_l, *flexion_l), _affine(sensor_r, *flexion_r))
+		constant = offset + correction1 * d_constant ** 2 + correction2 * d_constant
+		linear = {sensor: gain}
+		for key, value in d_linear.items():
+			linear[key] = linear.get(key, 0.0) + 2 * correction1 * d_constant * value + correction2 * value
+		quadratic = {}
+		for key_a, value_a in d_linear.items():
+			for key_b, value_b in d_linear.items():
+				if key_a <= key_b:
+					factor = 1 if key_a == key_b else 2						# d**2 contains both mixed products
+					quadratic[(key_a, key_b)] = quadratic.get((key_a, key_b), 0.0) + correction1 * factor * value_a * value_b
+		return self.add_polynomial(name, constant, linear, quadratic)
+
+	def compile(self):
+		"""
+		Compiles the coefficients of all joints into arrays. Called automatically by :meth:`apply`.
+		"""
+		joint_count = len(self.joints)
+		offsets = np.zeros(joint_count)
+		linear = np.zeros((self.sensor_count, joint_count))
+		pairs = sorted({pair for _, _, quadratic in self._terms for pair in quadratic})
+		quadratic = np.zeros((len(pairs), joint_count))
+		for j, (constant, linear_terms, quadratic_terms) in enumerate(self._terms):
+			offsets[j] = constant
+			for sensor, coefficient in linear_terms.items():
+				linear[sensor, j] += coefficient
+			for pair, coefficient in quadratic_terms.items():
+				quadratic[pairs.index(pair), j] += coefficient
+		pair_a = np.array([a for a, _ in pairs], dtype=np.intp)
+		pair_b = np.array([b for _, b in pairs], dtype=np.intp)
+		self._compiled = (offsets, linear, pair_a, pair_b, quadratic)
+
+	def apply(self, values, out=None, chunk_size=65536):
+		"""
+		Converts sensor values into joint angles.
+
+		Args:
+			values (array):		sensor values of shape (n, 22) or (22,), e.g. a memory-mapped recording
+			out (array):		float64 array of shape (n, joints) or (joints,) to write the angles into\
+								(defaults to a new array)
+			chunk_size (int):	amount of samples converted at once, limits the temporary memory (defaults to 65536)
+		Returns:
+			numpy.ndarray:	joint angles in the order of :attr:`joints`
+		"""
+		if self._compiled is None:
+			self.compile()
+		offsets, linear, pair_a, pair_b, quadratic = self._compiled
+		values = np.asarray(values)
+		single = values.ndim == 1
+		values = np.atleast_2d(values)
+		if out is None:
+			out = np.empty((len(values), len(self.joints)))
+		target = np.atleast_2d(out)
+		for start in range(0, len(values), chunk_size):
+			block = values[start:start + chunk_size].astype(np.float64, copy=False)
+			result = target[start:start + chunk_size]
+			np.matmul(block, linear, out=result)
+			result += offsets
+			if len(pair_a):
+				result += (block[:, pair_a] * block[:, pair_b]) @ quadratic
+		return out[0] if single and out.ndim == 2 else out
@@ -0,0 +1,247 @@
+"""
+This module implements the class `CalibrationCache`, which stores fitted calibration parameters on disk. An entry is\
+keyed by the identity of the glove, the calibration method and a hash of the calibration samples, so a calibration\
+is only fitted again if the glove or the data have changed.
+"""
+
+import os
+import sys
+import glob
+import json
+import time
+import hashlib
+import numpy as np
+
+
+IDENTITY_KEYS = ('information', 'device_sensor_count', 'righthanded', 'version')
+
+
+def glove_identity(description):
+	"""
+	Extracts the identity of a glove from its device description, i.e. the result of\
+	`Glove.get_device_description` or `AsyncGlove.get_device_description` or the metadata of a session file. Other\
+	keys (e.g. the creation time of a session file) are ignored, so all sources yield the same identity.
+
+	Args:
+		description (dict):	device description of the glove
+	Returns:
+		dict:	the keys of :data:`IDENTITY_KEYS` (None if missing in the description)
+	"""
+	identity = {key: description.get(key) for key in IDENTITY_KEYS}
+	if identity['version'] is not None:
+		identity['version'] = list(identity['version'])				# tuple of the glove, list of the JSON metadata
+	return identity
+
+
+def hash_arrays(*arrays):
+	"""
+	Computes a content hash of arrays, e.g. the sensor values and prescribed angles of a calibration.
+
+	Args:
+		*arrays (array):	arrays to hash (type, shape and values are hashed)
+	Returns:
+		str:	hexadecimal SHA-256 digest
+	"""
+	digest = hashlib.sha256()
+	for array in arrays:
+		array = np.ascontiguousarray(array)
+		digest.update(f"{array.dtype.str}{array.shape};".encode())
+		digest.update(array.data)
+	return digest.hexdigest()
+
+
+def _to_json(value):
+	"""
+	Converts numpy arrays and scalars of the parameters into JSON types.
+	"""
+	if isinstance(value, np.ndarray):
+		return value.tolist()
+	if isinstance(value, np.generic):
+		return value.item()
+	if isinstance(value, (list, tuple)):
+		return [_to_json(item) for item in value]
+	if isinstance(value, dict):
+		return {key: _to_json(item) for key, item in value.items()}
+	return value
+
+
+class CalibrationCache:
+	"""
+	The class :class:`CalibrationCache<cyberglove.calibration_cache.CalibrationCache>` stores one JSON file per\
+	entry in a directory. The file names start with a hash of the glove identity and the method, so the most recent\
+	parameters of a glove can be found without the calibration samples (e.g. when a live session starts).
+	If the files exceed the maximum size, the least recently used entries are removed. Reading an entry marks it as\
+	used by updating its modification time.
+	Only the directory is stored in an instance, so it can be passed to worker processes.
+	"""
+	def __init__(self, directory, max_bytes=16 * 2 ** 20):
+		"""
+		Args:
+			directory (str):	directory of the cache, created if it does not exist
+			max_bytes (int):	maximum total size of the entries in bytes (defaults to 16 MiB)
+		"""
+		self.directory = directory
+		self.max_bytes = max_bytes
+		self.hits = 0
+		self.misses = 0
+		os.makedirs(directory, exist_ok=True)
+
+	@staticmethod
+	def _prefix(identity, method):
+		"""
+		Returns the part of the file name identifying glove and method.
+		"""
+		identity = json.dumps(_to_json(identity), sort_keys=True)
+		return hashlib.sha256(f"{identity}|{method}".encode()).hexdigest()[:16]
+
+	def key(self, identity, method, samples_hash):
+		"""
+		Computes the key of an entry.
+
+		Args:
+			identity (dict):		identity of the glove (see :func:`glove_identity`)
+			method (int):			calibration method
+			samples_hash (str):		hash of the calibration samples (see :func:`hash_arrays`)
+		Returns:
+			str:	key of the entry
+		"""
+		return f"{self._prefix(identity, method)}-{samples_hash}"
+
+	def _path(self, key):
+		return os.path.join(self.directory, key + '.json')
+
+	def _count(self, parameters):
+		"""
+		Counts a lookup as hit or miss, every public lookup is counted exactly once.
+		"""
+		if parameters is None:
+			self.misses += 1
+		else:
+			self.hits += 1
+		return parameters
+
+	def _read(self, key):
+		"""
+		Reads the parameters of an entry without counting the lookup.
+		"""
+		path = self._path(key)
+		try:
+			with open(path) as file:
+				entry = json.load(file)
+			os.utime(path)											# mark as recently used
+		except (FileNotFoundError, json.JSONDecodeError):			# missing, evicted or written concurrently
+			return None
+		return {name: np.asarray(value) if isinstance(value, list) else value
+				for name, value in entry['parameters'].items()}
+
+	def get(self, key):
+		"""
+		Reads the parameters of an entry.
+
+		Args:
+			key (str):	key of the entry (see :meth:`key`)
+		Returns:
+			dict:	parameters (lists are returned as numpy arrays) or None if there is no entry
+		"""
+		return self._count(self._read(key))
+
+	def put(self, key, parameters, **metadata):
+		"""
+		Stores the parameters of an entry and evicts the least recently used entries if the cache is too large. The\
+		stored entry is kept, even if it alone exceeds the maximum size.
+
+		Args:
+			key (str):			key of the entry (see :meth:`key`)
+			parameters (dict):	parameters by name, e.g. {'gain': gains, 'offset': offsets}
+			**metadata:			additional information stored with the entry (e.g. the method)
+		"""
+		entry = {'created': time.strftime('%Y-%m-%dT%H:%M:%S'), 'parameters': _to_json(parameters),
+				 **_to_json(metadata)}
+		path = self._path(key)
+		temporary = f"{path}.{os.getpid()}.tmp"
+		with open(temporary, 'w') as file:
+			json.dump(entry, file)
+		os.replace(temporary, path)									# readers never see a partial entry
+		self.evict(keep=path)
+
+	def get_or_fit(self, identity, method, samples_hash, fit):
+		"""
+		Returns the cached parameters of a calibration or fits and stores them.
+
+		Args:
+			identity (dict):		identity of the glove (see :func:`glove_identity`)
+			method (int):			calibration method
+			samples_hash (str):		hash of the calibration samples the parameters depend on (see :func:`hash_arrays`)
+			fit (callable):			function without arguments returning the parameters as dict
+		Returns:
+			dict:	parameters
+		"""
+		key = self.key(identity, method, samples_hash)
+		parameters = self.get(key)
+		if parameters is None:
+			parameters = fit()
+			self.put(key, parameters, method=method, identity=identity)
+		return parameters
+
+	def latest(self, identity, method):
+		"""
+		Reads the most recently used parameters of a glove and method, e.g. to start a live session without\
+		calibrating again.
+
+		Args:
+			identity (dict):	identity of the glove (see :func:`glove_identity`)
+			method (int):		calibration method
+		Returns:
+			dict:	parameters or None if the glove was not calibrated with the method
+		"""
+		entries = []
+		for path in glob.glob(os.path.join(self.directory, self._prefix(identity, method) + '-*.json')):
+			try:
+				entries.append((os.path.getmtime(path), path))
+			except FileNotFoundError:
+				pass
+		if not entries:
+			return self._count(None)
+		return self._count(self._read(os.path.basename(max(entries)[1])[:-len('.json')]))
+
+	def evict(self, keep=None):
+		"""
+		Removes the least recently used entries until the total size does not exceed the maximum.
+
+		Args:
+			keep (str):	path of an entry which is not removed, e.g. the one just written (defaults to None)
+		"""
+		entries = []
+		for path in glob.glob(os.path.join(self.directory, '*.json')):
+			try:
+				status = os.stat(path)
+			except FileNotFoundError:								# removed by another process
+				continue
+			entries.append((status.st_mtime, status.st_size, path))
+		total = sum(size for _, size, _ in entries)
+		for _, size, path in sorted(entries):
+			if total <= self.max_bytes:
+				break
+			if path == keep:
+				if size > self.max_bytes:
+					sys.stderr.write('WARNING: cache entry {} alone exceeds the maximum size of {} bytes\n'.format(
+						path, self.max_bytes))
+				continue
+			try:
+				os.remove(path)
+			except FileNotFoundError:
+				pass
+			except OSError as msg:
+				sys.stderr.write('WARNING: could not evict {}: {}\n'.format(path, msg))
+				continue
+			total -= size
+
+	def clear(self):
+		"""
+		Removes all entries.
+		"""
+		for path in glob.glob(os.path.join(self.directory, '*.json')):
+			try:
+				os.remove(path)
+			except FileNotFoundError:
+				pass
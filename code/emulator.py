@@ -0,0 +1,282 @@
+"""
+This module implements the class `GloveEmulator`, which behaves like a CyberGlove III on the network. It allows to\
+test and benchmark the class `Glove` without the hardware.
+"""
+
+import sys
+import math
+import time
+import random
+import socket
+import struct
+import argparse
+import threading
+from collections import deque
+from frame_decoder import SENSOR_COUNT
+
+
+class GloveEmulator:
+	"""
+	The class :class:`GloveEmulator<cyberglove.emulator.GloveEmulator>` connects to the listening computer like a\
+	CyberGlove III, sends the connection confirmation message b'o' and answers the commands 'G', 'S', CTRL-C, '?i',\
+	'?S', '?G', '?R' and '?V'.
+	The sensor values follow slow sine waves between 1 and 255. Latency and jitter of the answers, the rate of the\
+	continuous-output mode, answers split into several TCP segments and corrupt datasets can be configured to\
+	reproduce the conditions of a wireless connection.
+	"""
+	def __init__(self, host='127.0.0.1', port=49500, sensor_count=SENSOR_COUNT, rate=100.0, latency=0.0, jitter=0.0,
+				 segment_size=None, corrupt_rate=0.0, righthanded=True, version=(1, 2), seed=None):
+		"""
+		Args:
+			host (str):				address of the computer (defaults to '127.0.0.1')
+			port (int):				port the computer listens on (defaults to 49500)
+			sensor_count (int):		amount of sensor values in one dataset, 18 or 22 (defaults to 22)
+			rate (float):			datasets per second in continuous-output mode, None for as fast as possible\
+									(defaults to 100.0)
+			latency (float):		seconds until an answer is sent (defaults to 0.0)
+			jitter (float):			maximum random deviation of the latency in seconds (defaults to 0.0)
+			segment_size (int):		maximum amount of bytes sent at once, None to send every answer at once\
+									(defaults to None)
+			corrupt_rate (float):	probability that a dataset is corrupt (defaults to 0.0)
+			righthanded (bool):		answer of '?R' (defaults to True)
+			version (tuple):		answer of '?V': (Glove-Firmware, internal information format version number)\
+									(defaults to (1, 2))
+			seed (int):				seed of the random generator (defaults to None)
+		"""
+		self.host = host
+		self.port = port
+		self.sensor_count = sensor_count
+		self.rate = rate
+		self.latency = latency
+		self.jitter = jitter
+		self.segment_size = segment_size
+		self.corrupt_rate = corrupt_rate
+		self.righthanded = righthanded
+		self.version = version
+		self._random = random.Random(seed)
+		self._socket = None
+		self._answers = deque()									# (due time, answer) in the order of the commands
+		self._condition = threading.Condition()
+		self._streaming = False
+		self._closed = False
+		self._threads = []
+		self.datasets_sent = 0
+		self.corrupt_sent = 0
+
+	def connect(self, timeout=10.0):
+		"""
+		Connects to the computer and sends the connection confirmation message. Like the glove, it retries until\
+		the computer listens.
+
+		Args:
+			timeout (float):	seconds to retry (defaults to 10.0)
+		Returns:
+			bool:	True if connected
+		"""
+		end = time.monotonic() + timeout
+		while True:
+			try:
+				self._socket = socket.create_connection((self.host, self.port))
+				break
+			except ConnectionRefusedError:
+				if time.monotonic() > end:
+					return False
+				time.sleep(0.05)
+		self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)	# send segments separately
+		self._socket.sendall(b'o')
+		return True
+
+	def start(self, timeout=10.0):
+		"""
+		Connects to the computer and answers the commands in background threads.
+
+		Args:
+			timeout (float):	seconds to retry connecting (defaults to 10.0)
+		Returns:
+			bool:	True if connected
+		"""
+		self._closed = False
+		self._threads = [threading.Thread(target=self._thread_connect_and_serve, args=(timeout,), daemon=True)]
+		self._threads[0].start()
+		return True
+
+	def _thread_connect_and_serve(self, timeout):
+		"""
+		Helper function to connect and then answer the commands.
+		Executed in a thread.
+		"""
+		if not self.connect(timeout):
+			sys.stderr.write(f"Emulator could not connect to {self.host}:{self.port}\n")
+			return
+		self.serve()
+
+	def serve(self):
+		"""
+		Answers the commands until the connection is closed.
+		"""
+		sender = threading.Thread(target=self._thread_send, daemon=True)
+		sender.start()
+		pending = b''
+		try:
+			while not self._closed:
+				data = self._socket.recv(1024)
+				if not data:
+					break
+				pending = self._handle_commands(pending + data)
+		except OSError:
+			pass
+		finally:
+			with self._condition:
+				self._closed = True
+				self._condition.notify()
+			sender.join()
+			self._socket.close()
+
+	def stop(self):
+		"""
+		Closes the connection, as if the glove was switched off.
+		"""
+		with self._condition:
+			self._closed = True
+			self._condition.notify()
+		if self._socket is not None:
+			try:
+				self._socket.shutdown(socket.SHUT_RDWR)
+			except OSError:
+				pass
+		for thread in self._threads:
+			thread.join()
+
+	def _handle_commands(self, data):
+		"""
+		Parses the received commands and schedules the answers.
+
+		Args:
+			data (bytes):	received bytes
+		Returns:
+			bytes:	incomplete command at the end of the data
+		"""
+		i = 0
+		while i < len(data):
+			command = data[i:i + 1]
+			if command == b'?':
+				if i + 1 >= len(data):									# second byte of the query not received yet
+					return data[i:]
+				command = data[i:i + 2]
+			i += len(command)
+			if command == b'G':
+				self._schedule(self._dataset())
+			elif command == b'S':
+				with self._condition:
+					self._streaming = True
+					self._condition.notify()
+			elif command == b'\x03':
+				with self._condition:
+					self._streaming = False
+			elif command == b'?i':
+				self._schedule(b'?i' + b'CyberGlove III emulator\0')
+			elif command == b'?S':
+				self._schedule(b'?S' + bytes([self.sensor_count]) + b'\0')
+			elif command == b'?G':
+				self._schedule(b'?G' + bytes([3]) + b'\0')				# plugged in and initialized properly
+			elif command == b'?R':
+				self._schedule(b'?R' + bytes([1 if self.righthanded else 0]) + b'\0')
+			elif command == b'?V':
+				self._schedule(b'?V' + struct.pack('!HH', *self.version) + b'\0')
+		return b''
+
+	def _dataset(self):
+		"""
+		Creates the answer to 'G' with the current sensor values, corrupted with probability `corrupt_rate`.
+
+		Returns:
+			bytes:	'G' + sensor values + null-byte
+		"""
+		t = time.monotonic()
+		values = bytes(128 + int(100 * math.sin(0.5 * t + k)) for k in range(self.sensor_count))
+		self.datasets_sent += 1
+		if self.corrupt_rate and self._random.random() < self.corrupt_rate:
+			self.corrupt_sent += 1
+			if self._random.random() < 0.5:								# dataset cut short
+				return b'G' + values[:self._random.randrange(self.sensor_count)] + b'\0'
+			return b'G' + values + bytes([self._random.randint(1, 255)]) + b'\0'	# dataset too long
+		return b'G' + values + b'\0'
+
+	def _schedule(self, answer):
+		"""
+		Schedules an answer after the configured latency. The answers keep the order of the commands.
+
+		Args:
+			answer (bytes):	answer to send
+		"""
+		delay = self.latency + self._random.uniform(-self.jitter, self.jitter) if self.jitter else self.latency
+		with self._condition:
+			due = time.monotonic() + max(delay, 0.0)
+			if self._answers:
+				due = max(due, self._answers[-1][0])
+			self._answers.append((due, answer))
+			self._condition.notify()
+
+	def _send(self, data):
+		"""
+		Sends the data, split into segments of at most `segment_size` bytes.
+		"""
+		if self.segment_size is None:
+			self._socket.sendall(data)
+			return
+		i = 0
+		while i < len(data):
+			size = self._random.randint(1, self.segment_size)
+			self._socket.sendall(data[i:i + size])
+			i += size
+
+	def _thread_send(self):
+		"""
+		Helper function to send the scheduled answers and the datasets of the continuous-output mode.
+		Executed in a thread.
+		"""
+		next_stream = time.monotonic()
+		try:
+			while True:
+				with self._condition:
+					while True:
+						if self._closed:
+							return
+						now = time.monotonic()
+						if self._answers and self._answers[0][0] <= now:
+							data = self._answers.popleft()[1]
+							break
+						if self._streaming and next_stream <= now:
+							data = self._dataset()
+							next_stream = now if self.rate is None else max(next_stream + 1.0 / self.rate, now - 1.0)
+							break
+						waits = [self._answers[0][0] - now] if self._answers else []
+						if self._streaming:
+							waits.append(next_stream - now)
+						else:
+							next_stream = now
+						self._condition.wait(min(waits) if waits else None)
+				self._send(data)
+		except OSError:
+			pass
+
+
+if __name__ == "__main__":
+	parser = argparse.ArgumentParser(description="Emulates a CyberGlove III connecting to the computer.")
+	parser.add_argument("--host", default="127.0.0.1", help="address of the computer")
+	parser.add_argument("--port", type=int, default=49500, help="port the computer listens on")
+	parser.add_argument("--rate", type=float, default=100.0, help="datasets per second in continuous-output mode")
+	parser.add_argument("--latency", type=float, default=0.0, help="seconds until an answer is sent")
+	parser.add_argument("--jitter", type=float, default=0.0, help="maximum random deviation of the latency")
+	parser.add_argument("--segment-size", type=int, default=None, help="maximum amount of bytes sent at once")
+	parser.add_argument("--corrupt-rate", type=float, default=0.0, help="probability that a dataset is corrupt")
+	args = parser.parse_args()
+	emulator = GloveEmulator(args.host, args.port, rate=args.rate, latency=args.latency, jitter=args.jitter,
+							 segment_size=args.segment_size, corrupt_rate=args.corrupt_rate)
+	if not emulator.connect():
+		print("Error establishing a connection to the computer")
+		exit(1)
+	try:
+		emulator.serve()
+	except KeyboardInterrupt:
+		emulator.stop()
@@ -0,0 +1,157 @@
+"""
+This module implements the class `FrameDecoder`, which cuts the 8-bit datasets of the CyberGlove III out of the\
+received TCP stream, and the class `Sample`, which holds a decoded dataset together with its timing.
+"""
+
+from typing import NamedTuple, Optional
+
+
+SENSOR_COUNT = 22							# amount of sensor values in one 8-bit dataset
+FRAME_HEADER = 71							# every dataset starts with the repeated command b'G' (char G = 71)
+FRAME_TERMINATOR = 0						# every dataset ends with a terminating null-byte
+
+
+class Sample(NamedTuple):
+	"""
+	One dataset of the CyberGlove III with its timing. The first two fields are the receive time and the dataset,\
+	so a sample can also be used as tuple (timestamp, dataset).
+	"""
+	timestamp: float						# monotonic time in seconds when the dataset was received
+	values: tuple							# sensor values between 1 and 255
+	sequence: int							# consecutive number of the dataset
+	request_time: Optional[float] = None	# monotonic time the dataset was requested, None in continuous-output mode
+
+
+class FrameDecoder:
+	"""
+	The class :class:`FrameDecoder<cyberglove.frame_decoder.FrameDecoder>` receives bytes into a preallocated\
+	buffer and decodes the datasets 'G' + sensor values + null-byte contained in it.
+	A TCP stream does not preserve message boundaries, so datasets can arrive split into several parts or together\
+	with other datasets. Incomplete datasets are kept until the missing bytes arrive. After corrupt bytes the\
+	decoder resynchronizes on the next valid dataset without losing the following datasets.
+	Since the sensor values are between 1 and 255, a null-byte only appears at the end of a dataset. So a corrupt\
+	answer is skipped up to its null-byte, also if it contains the value 71 ('G'), and the consumed null-bytes count\
+	the answers of the glove (:attr:`answers`).
+	"""
+	def __init__(self, sensor_count=SENSOR_COUNT, buffer_size=65536):
+		"""
+		Args:
+			sensor_count (int):	amount of sensor values in one dataset (defaults to 22)
+			buffer_size (int):	size of the receive buffer in bytes (defaults to 65536)
+		"""
+		self.frame_length = sensor_count + 2					# header + sensor values + terminating null-byte
+		self._buffer = bytearray(buffer_size)
+		self._view = memoryview(self._buffer)
+		self._start = 0											# first byte which was not decoded yet
+		self._end = 0											# end of the received bytes
+		self.frames_decoded = 0									# amount of valid datasets
+		self.corrupt_frames = 0									# amount of datasets discarded because of a wrong length
+		self.answers = 0										# amount of answers completed by a null-byte (valid or not)
+		self.dropped_bytes = 0									# amount of bytes discarded while resynchronizing
+
+	def _compact(self):
+		"""
+		Moves the bytes which were not decoded yet to the beginning of the buffer.
+		"""
+		pending = self._end - self._start
+		if self._start > 0:
+			self._buffer[:pending] = self._buffer[self._start:self._end]
+			self._start = 0
+			self._end = pending
+
+	def recv_into(self, sock):
+		"""
+		Receives bytes from the given socket directly into the buffer.
+
+		Args:
+			sock (socket.socket):	socket to receive from
+		Returns:
+			int:	amount of received bytes, 0 if the connection was closed
+		Raises:
+			socket.error:	socket-error
+		"""
+		if len(self._buffer) - self._end < self.frame_length:
+			self._compact()
+		received = sock.recv_into(self._view[self._end:])
+		self._end += received
+		return received
+
+	def feed(self, data):
+		"""
+		Copies the given bytes into the buffer (e.g. when they were not received from a socket).
+
+		Args:
+			data (bytes):	received bytes
+		"""
+		if len(self._buffer) - self._end < len(data):
+			self._compact()
+			if len(self._buffer) - self._end < len(data):		# grow the buffer if the data does not fit
+				self._view.release()
+				self._buffer.extend(bytes(self._end + len(data) - len(self._buffer)))
+				self._view = memoryview(self._buffer)
+		self._buffer[self._end:self._end + len(data)] = data
+		self._end += len(data)
+
+	def next_frame(self):
+		"""
+		Decodes the next complete dataset of the buffer.
+
+		Returns:
+			tuple:	dataset consisting of the sensor values between 1 and 255, None if no complete dataset\
+					is available
+		"""
+		buffer = self._buffer
+		while True:
+			header = buffer.find(FRAME_HEADER, self._start, self._end)
+			if header < 0:											# no header in the buffer, nothing usable left
+				self.answers += buffer.count(FRAME_TERMINATOR, self._start, self._end)
+				self.dropped_bytes += self._end - self._start
+				self._start = self._end = 0
+				return None
+			self.answers += buffer.count(FRAME_TERMINATOR, self._start, header)
+			self.dropped_bytes += header - self._start
+			self._start = header
+			terminator = header + self.frame_length - 1
+			# a null-byte in front of the expected position ends a dataset which is too short
+			early_terminator = buffer.find(FRAME_TERMINATOR, header + 1, min(terminator, self._end))
+			if early_terminator < 0:
+				if terminator >= self._end:							# dataset not complete yet, wait for more bytes
+					return None
+				if buffer[terminator] == FRAME_TERMINATOR:
+					self._start = terminator + 1
+					self.frames_decoded += 1
+					self.answers += 1
+					return tuple(self._view[header + 1:terminator])
+			# corrupt dataset: the answer ends with its null-byte, skip it completely (a header inside a dataset
+			# which is too long is a sensor value, not the beginning of the next answer)
+			if early_terminator < 0:
+				early_terminator = buffer.find(FRAME_TERMINATOR, terminator + 1, self._end)
+				if early_terminator < 0:
+					if self._end - header < len(buffer) // 2:		# wait for the end of the answer
+						return None
+					self.corrupt_frames += 1						# no null-byte at all, discard the bytes
+					self.dropped_bytes += self._end - header
+					self._start = self._end = 0
+					return None
+			self.corrupt_frames += 1
+			self.answers += 1
+			self.dropped_bytes += early_terminator + 1 - header
+			self._start = early_terminator + 1
+
+	def frames(self):
+		"""
+		Iterates over all complete datasets of the buffer.
+
+		Yields:
+			tuple:	dataset consisting of the sensor values between 1 and 255
+		"""
+		frame = self.next_frame()
+		while frame is not None:
+			yield frame
+			frame = self.next_frame()
+
+	def clear(self):
+		"""
+		Discards all bytes in the buffer. The counters are kept.
+		"""
+		self._start = self._end = 0
@@ -3,10 +3,24 @@ This module implements the class `Glove` for intercommunication with CyberGlove
 """
 
 import sys
+import time
+import queue
 import socket
 import threading
 import struct
+from collections import deque
 from netifaces import interfaces, ifaddresses, AF_INET
+from frame_decoder import FrameDecoder, Sample
+from recorder import Recorder
+from session_file import SessionWriter
+from acquisition import AcquisitionPipeline, BLOCK
+from instrumentation import Instrumentation
+
+
+STREAM_START_COMMAND = 'S'					# puts the glove into its continuous-output mode
+STREAM_STOP_COMMAND = '\x03'				# CTRL-C stops the continuous-output mode
+# lengths of the binary answers, which can contain null-bytes (without repeated command and terminating null-byte)
+ANSWER_LENGTHS = {'?S': 1, '?G': 1, '?R': 1, '?V': 4}
 
 
 class Glove:
@@ -14,8 +28,23 @@ class Glove:
 	The class :class:`Glove<cyberglove.glove.Glove>` implements functionality to connect to the CyberGlove III\
 	hardware, to send commands and to receive data.
 	"""
-	def __init__(self):
+	def __init__(self, pipeline_window=4):
+		"""
+		Args:
+			pipeline_window (int):	amount of 'G' requests kept in flight by :meth:`get_datasets_pipelined`\
+									(defaults to 4)
+		"""
 		self.client_socket = None
+		self.pipeline_window = pipeline_window
+		self.decoder = FrameDecoder()			# shared by all acquisition modes, counts corrupt datasets and dropped bytes
+		self.sequence = 0						# consecutive number of the next sample
+		self.device_description = None			# cached by get_device_description()
+		self.instrumentation = None				# opt-in Instrumentation, see enable_instrumentation()
+		self._reported_corrupt_frames = 0
+		self._stream_thread = None
+		self._stream_stop = None
+		self._stream_queue = None
+		self._pipeline = None
 
 	def connect_glove(self, ip_address_pc, localport=49500):
 		"""
@@ -31,48 +60,92 @@ class Glove:
 			bool:	True if glove has connected successfully
 		"""
 		# 1. check if ip_address_pc is actually an IP address of the computer that is used
-		ips = []													# list holding IP addresses of the computer
-		for ifaceName in interfaces():
-			addresses = [i['addr'] for i in ifaddresses(ifaceName).setdefault(AF_INET, [{'addr': 'No IP addr'}])]
-			# fill ips[] with all IP addresses of the computer in all networks
-			ips.append(''.join(addresses))
-		if ip_address_pc not in ips:
+		if not self._is_local_address(ip_address_pc):
 			print("Your glove can not be connected.")
 			print(f"Make sure you are connected with the network and check if your IP-address is {ip_address_pc}.")
 			return False
 		# 2. create socket and listen for incoming connections
-		srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)		# IPv4, TCP
-		srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  	# reuse the socket when it is closed
-		srv.bind(('', localport))									# make sure the socket is reachable by any address
-		srv.listen(1)												# queue only 1 connect request before refusing connections
-		# check twice a second if CTRL-C was pressed and handle the exception
-		srv.settimeout(0.1)											# (Windows only issue: see https://stackoverflow.com/a/61539628)
+		srv = self._listen(localport)
 		print(f"Waiting for connection on port {localport}...")
 		print("Please switch on your CyberGlove\n")
+		self.device_description = None								# a different glove may connect
 		try:
-			while True:												# when socket times out, repeat accepting incoming connections
-				try:
-					# accept incoming requests, save address of client to addr, and the socket connection to self.client_socket
-					self.client_socket, addr = srv.accept()
-					print(f"Connected by {addr}!")
-					self.client_socket.settimeout(None)				# remove timeout from socket
-					break
-				except socket.timeout:								# repeat in while-loop when socket times out
-					pass
+			return self._accept(srv)
 		except KeyboardInterrupt:
 			# when user aborts, close the socket and return False
 			if self.client_socket is not None:
 				self.client_socket.close()
+				self.client_socket = None
 			sys.stderr.write("Server closed with KeyboardInterrupt!\n")
 			return False
-		first_msg = self.client_socket.recv(1024)
-		if first_msg != b'o':										# verify if the glove sent the connection confirmation message >>b'o'
-			self.client_socket.close()
-			self.client_socket = None
-			print("Glove did not respond correctly when a connection was established")
-			print("Try restarting the data glove.")
-			return False
-		return True
+		finally:
+			srv.close()												# the accepted connection stays open
+
+	@staticmethod
+	def _is_local_address(ip_address_pc):
+		"""
+		Checks if the given IP address is an address of one of the network interfaces of the computer.
+
+		Args:
+			ip_address_pc (str):	IP address of the computer (e.g. "192.168.1.2")
+		Returns:
+			bool:	True if the address belongs to the computer
+		"""
+		ips = []													# list holding IP addresses of the computer
+		for ifaceName in interfaces():
+			addresses = [i['addr'] for i in ifaddresses(ifaceName).setdefault(AF_INET, [{'addr': 'No IP addr'}])]
+			# fill ips[] with all IP addresses of the computer in all networks
+			ips.append(''.join(addresses))
+		return ip_address_pc in ips
+
+	@staticmethod
+	def _listen(localport):
+		"""
+		Creates the socket the glove connects to.
+
+		Args:
+			localport (int):	port to open
+		Returns:
+			socket.socket:	listening socket
+		"""
+		srv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)		# IPv4, TCP
+		srv.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)  	# reuse the socket when it is closed
+		srv.bind(('', localport))									# make sure the socket is reachable by any address
+		srv.listen(1)												# queue only 1 connect request before refusing connections
+		# check twice a second if CTRL-C was pressed and handle the exception
+		srv.settimeout(0.1)											# (Windows only issue: see https://stackoverflow.com/a/61539628)
+		return srv
+
+	def _accept(self, srv, stop_event=None, timeout=None):
+		"""
+		Waits until the glove connects to the listening socket and verifies its connection confirmation message.
+
+		Args:
+			srv (socket.socket):			listening socket (see :meth:`_listen`)
+			stop_event (threading.Event):	Event to stop waiting (defaults to None)
+			timeout (float):				maximum seconds to wait (defaults to None, i.e. wait until connected)
+		Returns:
+			bool:	True if glove has connected successfully
+		"""
+		end = None if timeout is None else time.monotonic() + timeout
+		# when socket times out, repeat accepting incoming connections
+		while (stop_event is None or not stop_event.is_set()) and (end is None or time.monotonic() < end):
+			try:
+				# accept incoming requests, save address of client to addr, and the socket connection to self.client_socket
+				self.client_socket, addr = srv.accept()
+			except socket.timeout:									# repeat in while-loop when socket times out
+				continue
+			print(f"Connected by {addr}!")
+			self.client_socket.settimeout(None)						# remove timeout from socket
+			first_msg = self.client_socket.recv(1024)
+			if first_msg != b'o':									# verify if the glove sent the connection confirmation message >>b'o'
+				self.client_socket.close()
+				self.client_socket = None
+				print("Glove did not respond correctly when a connection was established")
+				print("Try restarting the data glove.")
+				return False
+			return True
+		return False
 
 	def disconnect_glove(self):
 		"""
@@ -90,7 +163,9 @@ class Glove:
 
 	def _send_receive_raw(self, command: str):
 		"""
-		Sends the given command to the glove and returns the answer
+		Sends the given command to the glove and returns the answer.
+		TCP may split the answer, so it is received until it is complete: the binary answers of :data:`ANSWER_LENGTHS`\
+		have a fixed length, all other answers end with the first null-byte.
 
 		Args:
 			command (string):	command to send to the glove
@@ -99,11 +174,19 @@ class Glove:
 		"""
 		try:
 			self.client_socket.send(bytes(command, 'ascii'))	# send the command as ascii-encoded byte-array
-			data = self.client_socket.recv(1024)				# receive answer (undefined length, end of message indicated by null-byte)
-			if not data:
-				sys.stderr.write("error when receiving data\n")
-				raise Exception
-			return data
+			length = ANSWER_LENGTHS.get(command)
+			data = b''
+			while True:
+				received = self.client_socket.recv(1024)
+				if not received:
+					sys.stderr.write("error when receiving data\n")
+					raise Exception
+				data += received
+				if length is not None:
+					if len(data) >= len(command) + length + 1:	# repeated command, answer and null-byte
+						return data
+				elif data.find(b'\0', len(command)) >= 0:		# end of message indicated by null-byte
+					return data
 		except socket.error as msg:								# probably got disconnected
 			sys.stderr.write(f"ERROR: {msg}\n")
 		except KeyboardInterrupt:
@@ -122,13 +205,64 @@ class Glove:
 		data = self._send_receive_raw(command)
 		return data[len(command):-1]									# cut-off repeated command-bytes and terminating null-byte
 
-	def get_one_dataset(self):
+	def enable_instrumentation(self):
+		"""
+		Starts collecting counters and histograms of the acquisition: round trip times ('round_trip_time'), received\
+		bytes ('bytes_read'), resynchronizations after corrupt datasets ('resyncs'), samples ('samples') and the\
+		waiting time for full queues ('queue_wait'). Without instrumentation, the acquisition has no overhead.
+
+		Returns:
+			Instrumentation:	collected values, see :meth:`Instrumentation.snapshot`
+		"""
+		if self.instrumentation is None:
+			self.instrumentation = Instrumentation()
+		return self.instrumentation
+
+	def _receive(self):
+		"""
+		Receives bytes from the glove into the decoder and records them in the instrumentation.
+
+		Raises:
+			ConnectionError:	if the glove closed the connection
+			socket.error:		socket-error
+		"""
+		received = self.decoder.recv_into(self.client_socket)
+		if not received:
+			raise ConnectionError("Connection closed by the glove")
+		instrumentation = self.instrumentation
+		if instrumentation is not None:
+			instrumentation.count('bytes_read', received)
+			if self.decoder.corrupt_frames != self._reported_corrupt_frames:
+				instrumentation.count('resyncs', self.decoder.corrupt_frames - self._reported_corrupt_frames)
+				self._reported_corrupt_frames = self.decoder.corrupt_frames
+
+	def _sample(self, frame, request_time=None):
+		"""
+		Creates the sample of a received dataset with the current time and the next sequence number.
+
+		Args:
+			frame (tuple):			decoded dataset
+			request_time (float):	time the dataset was requested (defaults to None)
+		Returns:
+			Sample:	sample of the dataset
+		"""
+		sample = Sample(time.monotonic(), frame, self.sequence, request_time)
+		self.sequence += 1
+		instrumentation = self.instrumentation
+		if instrumentation is not None:
+			instrumentation.count('samples')
+			if request_time is not None:
+				instrumentation.observe('round_trip_time', sample.timestamp - request_time)
+		return sample
+
+	def get_one_sample(self):
 		"""
 		Requests exactly one 8-bit dataset from the CyberGlove III.
-		Sends command 'G', handles errors (e.g. incomplete datasets) and returns the dataset as list.
+		Sends command 'G', handles errors (e.g. incomplete datasets) and returns the dataset with its timing.
+		A corrupt answer is discarded by the decoder and the dataset is requested again.
 
 		Returns:
-			list:	array consisting of 22 values between 1 and 255
+			Sample:	(receive time, dataset consisting of 22 values between 1 and 255, sequence number, request time)
 		Raises:
 			socket.error:	socket-error
 		"""
@@ -138,51 +272,364 @@ class Glove:
 				sys.stderr.write("Error: No glove connected\n")
 				return False
 			# send the command 'G' to the glove as ascii-encoded byte-array to request one 8-bit dataset
+			request_time = time.monotonic()
 			self.client_socket.send(bytes('G', 'ascii'))
-			msg = self.client_socket.recv(1)				# the glove will only return b'G' (repetition of the command)
-			msg += self.client_socket.recv(23)				# data is sent afterwards (22 sensor values + terminating null-byte)
-			# unpack the byte values by interpreting them as unsigned chars, save them as integer values into an array
-			raw_data = struct.unpack('@' + "B" * len(msg), msg)
-			# check if raw_data is valid (command at the beginning (char G = 71), length == 24 values)
-			#  and the last one is a terminating null-byte
-			if raw_data[0] != 71 or len(raw_data) != 24 or raw_data[23] != 0:
-				self.client_socket.recv(1024)				# flush the socket, get all the messages and loose them
-				return self.get_one_dataset()				# call the method itself recursively
-			return raw_data[1:-1]							# cut the command at the beginning and the terminating null-byte
+			answers = self.decoder.answers
+			while True:
+				frame = self.decoder.next_frame()
+				if frame is not None:
+					return self._sample(frame, request_time)
+				if self.decoder.answers != answers:					# the answer was corrupt, request the dataset again
+					answers = self.decoder.answers
+					request_time = time.monotonic()
+					self.client_socket.send(bytes('G', 'ascii'))
+				self._receive()									# TCP may split the answer, receive until it is complete
 		except socket.error as msg:							# catch socket-errors, like disconnected glove and more...
 			sys.stderr.write('ERROR: {}\n'.format(msg))
 			raise
 
-	def _thread_read_data(self, stop_event, fp):
+	def get_one_dataset(self):
+		"""
+		Requests exactly one 8-bit dataset from the CyberGlove III (see :meth:`get_one_sample`).
+
+		Returns:
+			list:	array consisting of 22 values between 1 and 255
+		Raises:
+			socket.error:	socket-error
+		"""
+		sample = self.get_one_sample()
+		return sample.values if sample else sample
+
+	def get_samples_pipelined(self, count, window=None, timeout=1.0):
+		"""
+		Requests `count` 8-bit datasets from the CyberGlove III while keeping up to `window` 'G' requests in flight.
+		Instead of waiting for every answer before sending the next request, the requests are sent ahead, so the\
+		round trip time of the network is hidden. The answers arrive in the order of the requests, so every sample\
+		is matched with the time of its request. Every answer, also a corrupt one, completes the oldest outstanding\
+		request; the datasets of corrupt answers are requested again.
+		If no answer arrives within `timeout` seconds, the answers still in flight are discarded and the missing\
+		datasets are requested again. Answers in flight when the iteration is ended early are discarded as well, so\
+		the next command receives its own answer.
+
+		Args:
+			count (int):		amount of datasets to request
+			window (int):		amount of requests in flight (defaults to `pipeline_window` of the instance)
+			timeout (float):	seconds to wait for an answer before requesting again (defaults to 1.0)
+		Yields:
+			Sample:	(receive time, dataset consisting of 22 values between 1 and 255, sequence number, request time)
+		Raises:
+			socket.error:	socket-error
+		"""
+		if self.client_socket is None:
+			sys.stderr.write("Error: No glove connected\n")
+			return
+		if window is None:
+			window = self.pipeline_window
+		request_times = deque()										# times of the outstanding requests
+		received = 0												# amount of datasets received
+		answers = self.decoder.answers								# answers matched with their requests
+		self.client_socket.settimeout(timeout)
+		try:
+			while received < count:
+				missing = min(window - len(request_times), count - received - len(request_times))
+				if missing > 0:
+					request_time = time.monotonic()
+					self.client_socket.send(bytes('G' * missing, 'ascii'))
+					request_times.extend([request_time] * missing)
+				try:
+					self._receive()
+				except socket.timeout:								# answers got lost, discard late ones and request again
+					request_times.clear()
+					self.flush()
+					self.client_socket.settimeout(timeout)
+					answers = self.decoder.answers
+					continue
+				for frame in self.decoder.frames():
+					# the answers completed in front of this dataset were corrupt, their requests are lost
+					for _ in range(min(self.decoder.answers - answers - 1, len(request_times))):
+						request_times.popleft()
+					answers = self.decoder.answers
+					if request_times:
+						received += 1
+						yield self._sample(frame, request_times.popleft())
+				for _ in range(min(self.decoder.answers - answers, len(request_times))):	# corrupt answers at the end
+					request_times.popleft()
+				answers = self.decoder.answers
+		except socket.error as msg:									# catch socket-errors, like disconnected glove and more...
+			sys.stderr.write('ERROR: {}\n'.format(msg))
+			raise
+		finally:
+			if self.client_socket is not None:
+				if request_times:									# e.g. the iteration was ended early
+					self.flush()									# discard the answers still in flight
+				self.client_socket.settimeout(None)					# remove timeout from socket
+
+	def get_datasets_pipelined(self, count, window=None, timeout=1.0):
 		"""
-		Helper function to read data from the glove and write it to a file.
-		Executed in a thread.
+		Requests `count` 8-bit datasets from the CyberGlove III while keeping up to `window` 'G' requests in flight\
+		(see :meth:`get_samples_pipelined`).
 
 		Args:
-			stop_event (_type_): Event to stop the thread
-			fp (_type_): File pointer to the file to write the data to
+			count (int):		amount of datasets to request
+			window (int):		amount of requests in flight (defaults to `pipeline_window` of the instance)
+			timeout (float):	seconds to wait for an answer before requesting again (defaults to 1.0)
+		Yields:
+			tuple:	dataset consisting of 22 values between 1 and 255
+		Raises:
+			socket.error:	socket-error
+		"""
+		for sample in self.get_samples_pipelined(count, window, timeout):
+			yield sample.values
+
+	def poll_samples(self):
+		"""
+		Continuously requests single datasets from the glove (see :meth:`get_one_sample`).
+		The iteration ends when the glove is disconnected.
+
+		Yields:
+			Sample:	(receive time, dataset consisting of 22 values between 1 and 255, sequence number, request time)
+		"""
+		while self.client_socket is not None:
+			yield self.get_one_sample()
+
+	def poll_datasets(self):
 		"""
-		while not stop_event.is_set():
-			data = self.get_one_dataset()
-			fp.write(str(data) + "\n")
+		Continuously requests single datasets from the glove (see :meth:`get_one_dataset`).
+		The iteration ends when the glove is disconnected.
 
-	def write_continuous_datasets(self, file: str):
+		Yields:
+			tuple:	dataset consisting of 22 values between 1 and 255
+		"""
+		for sample in self.poll_samples():
+			yield sample.values
+
+	def start_acquisition(self, consumers, maxsize=1024, policy=BLOCK, streaming=False):
+		"""
+		Starts a thread receiving datasets from the glove and passes them to the given consumers.
+		Every consumer runs in its own thread behind a bounded queue (see\
+		:class:`AcquisitionPipeline<cyberglove.acquisition.AcquisitionPipeline>`), so a slow consumer does not slow\
+		down the acquisition. Each consumer is called with every :class:`Sample<cyberglove.frame_decoder.Sample>`.
+
+		Args:
+			consumers (list):	callables, each called with every sample
+			maxsize (int):		maximum amount of queued samples per consumer (defaults to 1024)
+			policy (str):		behaviour when a queue is full: 'block', 'drop-oldest' or 'drop-newest'\
+								(defaults to 'block')
+			streaming (bool):	use the continuous-output mode instead of requesting every dataset (defaults to False)
+		Returns:
+			AcquisitionPipeline:	the running pipeline, which provides the queue statistics
+		"""
+		if self._pipeline is not None:
+			sys.stderr.write("Acquisition was already started.\n")
+			return self._pipeline
+		if streaming:
+			self.start_streaming()
+			source = self.stream_samples()
+		else:
+			source = self.poll_samples()
+		self._pipeline = AcquisitionPipeline(source, consumers, maxsize, policy, self.instrumentation)
+		self._pipeline.start()
+		return self._pipeline
+
+	def stop_acquisition(self):
+		"""
+		Stops the acquisition started with :meth:`start_acquisition` and waits until the consumers have processed\
+		all queued samples.
+
+		Returns:
+			list:	queue statistics of every consumer (see :meth:`SampleQueue.statistics`)
+		"""
+		if self._pipeline is None:
+			sys.stderr.write("Acquisition was not started.\n")
+			return []
+		if self._stream_thread is not None:
+			self.stop_streaming()									# ends the iteration of the source
+		self._pipeline.stop()
+		statistics = self._pipeline.statistics()
+		self._pipeline = None
+		return statistics
+
+	@staticmethod
+	def _open_output(file: str, metadata=None):
+		"""
+		Opens the given file for :meth:`write_continuous_datasets`.
+
+		Args:
+			file (str):			Path to file where the data should be written to
+			metadata (dict):	description of the device stored in session files (defaults to None)
+		Returns:
+			tuple:	(opened file or recorder, function writing one sample to it)
+		"""
+		if file.endswith('.cg3s'):
+			output = SessionWriter(file, metadata=metadata)
+
+			def write(sample):
+				output.append(sample.values, sample.timestamp)
+		elif file.endswith('.npy'):
+			output = Recorder(file)
+
+			def write(sample):
+				output.append(sample.values, sample.timestamp)
+		else:
+			output = open(file, "w")
+
+			def write(sample):
+				output.write(str(sample.values) + "\n")
+		return output, write
+
+	def write_continuous_datasets(self, file: str, maxsize=1024, policy=BLOCK):
 		"""
 		Continuously requests single datasets from glove and writes them to the given file.
-		Uses a thread to read and write the data and an input to stop the thread.
+		The datasets are received and written in separate threads (see :meth:`start_acquisition`), an input stops\
+		the measurement.
+		If the file name ends with '.npy', the datasets are written together with their timestamps into a binary\
+		recording (see :class:`Recorder<cyberglove.recorder.Recorder>`). If it ends with '.cg3s', they are written\
+		into a compressed and indexed session file together with the description of the device (see\
+		:class:`SessionWriter<cyberglove.session_file.SessionWriter>`). Otherwise one line of text per dataset\
+		is written.
 		
 		Args:
 			file (str): Path to file where the data should be written to
+			maxsize (int): maximum amount of datasets waiting to be written (defaults to 1024)
+			policy (str): behaviour when too many datasets are waiting: 'block', 'drop-oldest' or 'drop-newest'\
+				(defaults to 'block')
 		"""
-		with open(file, "w") as fp:
-			pill2kill = threading.Event()
-			thread = threading.Thread(target=self._thread_read_data, args=(pill2kill, fp))
+		metadata = self.get_device_description() if file.endswith('.cg3s') else None
+		output, write = self._open_output(file, metadata)
+		with output:
 			input(f"Please press enter to start.")
-			thread.start()
+			self.start_acquisition([write], maxsize, policy)
 			input("Please press enter to stop the measurement.")
-			pill2kill.set()
-			thread.join()
-			pill2kill.clear()
+			statistics = self.stop_acquisition()
+		if statistics[0]['error']:
+			sys.stderr.write(f"ERROR: writing to {file} failed, the measurement is incomplete: {statistics[0]['error']}\n")
+		elif statistics[0]['dropped']:
+			sys.stderr.write(f"{statistics[0]['dropped']} datasets were dropped because writing was too slow.\n")
+
+	def _thread_stream_data(self, stop_event, callback):
+		"""
+		Helper function to receive the datasets the glove sends in continuous-output mode.
+		Executed in a thread. Every sample is passed to the callback or, if no callback is given,\
+		put into the queue read by :meth:`stream_samples`.
+
+		Args:
+			stop_event (threading.Event):	Event to stop the thread
+			callback (callable):			function called with every sample or None
+		"""
+		try:
+			while not stop_event.is_set():
+				try:
+					self._receive()
+				except socket.timeout:								# check the stop event at least ten times a second
+					continue
+				for frame in self.decoder.frames():
+					if callback is not None:
+						callback(self._sample(frame))
+					else:
+						self._stream_queue.put(self._sample(frame))
+		except socket.error as msg:									# catch socket-errors, like disconnected glove and more...
+			sys.stderr.write('ERROR: {}\n'.format(msg))
+		finally:
+			self._stream_queue.put(None)							# tell the consumers that no more datasets will follow
+
+	def start_streaming(self, callback=None):
+		"""
+		Puts the CyberGlove III into its continuous-output mode (command 'S') and starts a thread receiving\
+		the datasets. Instead of requesting every dataset with 'G', the glove sends them on its own, so the sample\
+		rate is no longer limited by the round trip time of the network.
+		The samples are either passed to the given callback (called from the receiving thread) or can be\
+		iterated with :meth:`stream_samples` or :meth:`stream_datasets`.
+
+		Args:
+			callback (callable):	function called with every :class:`Sample<cyberglove.frame_decoder.Sample>`\
+									(defaults to None)
+		Returns:
+			bool:	True if the streaming was started
+		"""
+		if self.client_socket is None:
+			sys.stderr.write("Error: No glove connected\n")
+			return False
+		if self._stream_thread is not None:
+			sys.stderr.write("Streaming was already started.\n")
+			return False
+		self._stream_queue = queue.Queue()
+		self._stream_stop = threading.Event()
+		self.client_socket.settimeout(0.1)							# the receiving thread checks the stop event in between
+		self.client_socket.send(bytes(STREAM_START_COMMAND, 'ascii'))
+		self._stream_thread = threading.Thread(target=self._thread_stream_data, args=(self._stream_stop, callback))
+		self._stream_thread.start()
+		return True
+
+	def stop_streaming(self):
+		"""
+		Stops the continuous-output mode of the CyberGlove III and the receiving thread.
+		Datasets which are still in transit are discarded.
+
+		Returns:
+			None
+		"""
+		if self._stream_thread is None:
+			sys.stderr.write("Streaming was not started.\n")
+			return
+		self._stream_stop.set()
+		self._stream_thread.join()
+		self._stream_thread = None
+		try:
+			self.client_socket.send(bytes(STREAM_STOP_COMMAND, 'ascii'))
+		except socket.error as msg:
+			sys.stderr.write('ERROR: {}\n'.format(msg))
+		self.flush()
+		return
+
+	def flush(self, timeout=0.1):
+		"""
+		Discards all bytes the glove has sent, e.g. answers still in transit after an aborted acquisition.
+		Waits until the glove has been silent for `timeout` seconds.
+
+		Args:
+			timeout (float):	seconds of silence (defaults to 0.1)
+		Returns:
+			None
+		"""
+		if self.client_socket is None:
+			return
+		self.client_socket.settimeout(timeout)
+		try:
+			while self.client_socket.recv(4096):					# flush the socket until the glove stays silent
+				pass
+		except socket.timeout:
+			pass
+		except socket.error as msg:
+			sys.stderr.write('ERROR: {}\n'.format(msg))
+		self.decoder.clear()										# discard incomplete datasets
+		if self.client_socket is not None:
+			self.client_socket.settimeout(None)						# remove timeout from socket
+		return
+
+	def stream_samples(self):
+		"""
+		Iterates over the samples received in continuous-output mode (see :meth:`start_streaming`).
+		The iteration ends when the streaming is stopped or the connection is lost.
+
+		Yields:
+			Sample:	(receive time, dataset consisting of 22 values between 1 and 255, sequence number, None)
+		"""
+		while True:
+			sample = self._stream_queue.get()
+			if sample is None:
+				return
+			yield sample
+
+	def stream_datasets(self):
+		"""
+		Iterates over the datasets received in continuous-output mode (see :meth:`start_streaming`).
+		The iteration ends when the streaming is stopped or the connection is lost.
+
+		Yields:
+			tuple:	dataset consisting of 22 values between 1 and 255
+		"""
+		for sample in self.stream_samples():
+			yield sample.values
 
 	def get_glove_information(self):
 		"""
@@ -244,6 +691,27 @@ class Glove:
 		"""
 		return struct.unpack("!" + "H" * 2, self._send_receive('?V'))
 
+	def get_device_description(self, refresh=False):
+		"""
+		Queries the properties of the glove that are stored with a session (see\
+		:class:`SessionWriter<cyberglove.session_file.SessionWriter>`).
+		The answer is cached until the next :meth:`connect_glove`, so the queries are only sent once per glove.
+		Must not be called while streaming, unless the description is cached.
+
+		Args:
+			refresh (bool):	query the glove even if the description is cached (defaults to False)
+		Returns:
+			dict:	information text, amount of sensors, handedness and version
+		"""
+		if self.device_description is None or refresh:
+			self.device_description = {
+				'information': self.get_glove_information(),
+				'device_sensor_count': self.get_amount_of_sensors(),
+				'righthanded': self.get_righthanded(),
+				'version': list(self.get_version_number()),
+			}
+		return dict(self.device_description)
+
 	def start_prompt(self):
 		"""
 		Starts a command prompt to enter commands and receive answers.
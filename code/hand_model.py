@@ -0,0 +1,175 @@
+"""
+This module implements the class `HandModel`, a kinematic model of the thumb and the index finger. It computes the\
+fingertip positions and their distance for all samples at once, together with the derivatives with respect to the\
+thumb CMC angles, as required by the closed-loop calibration in `method_2.py`.
+"""
+
+import numpy as np
+
+
+# joint angles (in degrees) expected by HandModel, in the order of the sensor rows of `method_2.calc_g_closed_loop`
+JOINTS = ('thumb_cmc_roll', 'thumb_mcp', 'thumb_ip', 'thumb_cmc_abduction',
+		  'index_mcp', 'index_pip', 'index_dip', 'index_abduction')
+CMC_ROLL, THUMB_MCP, THUMB_IP, CMC_ABDUCTION, INDEX_MCP, INDEX_PIP, INDEX_DIP, INDEX_ABDUCTION = range(len(JOINTS))
+
+# generators of the rotations about the x-, y- and z-axis: dR/dq = R @ K
+_GENERATORS = {
+	'x': np.array([[0.0, 0.0, 0.0], [0.0, 0.0, -1.0], [0.0, 1.0, 0.0]]),
+	'y': np.array([[0.0, 0.0, 1.0], [0.0, 0.0, 0.0], [-1.0, 0.0, 0.0]]),
+	'z': np.array([[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 0.0]]),
+}
+
+
+def _rotate(axis, angle, vector):
+	"""
+	Rotates vectors about a coordinate axis.
+
+	Args:
+		axis (str):			'x', 'y' or 'z'
+		angle (array):		angles in radians of shape (n,)
+		vector (array):		vectors of shape (n, 3) or (3,)
+	Returns:
+		numpy.ndarray:	rotated vectors of shape (n, 3)
+	"""
+	c, s = np.cos(angle), np.sin(angle)
+	vector = np.broadcast_to(vector, c.shape + (3,))
+	x, y, z = vector[..., 0], vector[..., 1], vector[..., 2]
+	if axis == 'x':
+		return np.stack([x, c * y - s * z, s * y + c * z], axis=-1)
+	if axis == 'y':
+		return np.stack([c * x + s * z, y, c * z - s * x], axis=-1)
+	return np.stack([c * x - s * y, s * x + c * y, z], axis=-1)
+
+
+def _planar_chain(lengths, angles):
+	"""
+	Computes the tip of a chain of segments along the x-axis flexed about the y-axis (positive angles bend towards\
+	the palm, i.e. towards -z).
+
+	Args:
+		lengths (tuple):	lengths of the segments from proximal to distal
+		angles (list):		flexion angles in radians of shape (n,), one per segment
+	Returns:
+		numpy.ndarray:	tip positions of shape (n, 3) in the frame of the first joint
+	"""
+	tip = np.zeros(angles[0].shape + (3,))
+	for length, angle in zip(reversed(lengths), reversed(angles)):
+		tip[..., 0] += length
+		tip = _rotate('y', angle, tip)
+	return tip
+
+
+class HandModel:
+	"""
+	The class :class:`HandModel<cyberglove.hand_model.HandModel>` describes the thumb and the index finger as\
+	kinematic chains in a frame fixed to the palm (x: along the index metacarpal towards the fingers, y: towards the\
+	thumb, z: dorsal). Lengths are given in millimetres, joint angles in degrees, and all angles at zero correspond\
+	to the neutral position of the relative sensor values of `method_2.py` (flat hand).
+
+	The thumb CMC joint is modelled by an abduction about the z-axis of the metacarpal base followed by a roll about\
+	the metacarpal, which turns the flexion plane of the MCP and IP joints (opposition). The index finger is\
+	abducted about the z-axis at the MCP joint and flexed in its MCP, PIP and DIP joints.
+	"""
+	def __init__(self, thumb_base=(20.0, 20.0, -15.0), thumb_orientation=(30.0, 30.0, -60.0),
+				 thumb_lengths=(45.0, 32.0, 27.0),
+				 index_base=(90.0, 22.0, 0.0), index_lengths=(40.0, 24.0, 21.0)):
+		"""
+		Args:
+			thumb_base (tuple):			position of the thumb CMC joint (defaults to (20, 20, -15))
+			thumb_orientation (tuple):	rotation of the thumb metacarpal at zero angles about the z-axis towards the\
+										thumb side, about the y-axis towards the palm and about its own axis\
+										(pronation) (defaults to (30, 30, -60))
+			thumb_lengths (tuple):		lengths of the thumb metacarpal, proximal and distal phalanx\
+										(defaults to (45, 32, 27))
+			index_base (tuple):			position of the index MCP joint (defaults to (90, 22, 0))
+			index_lengths (tuple):		lengths of the proximal, middle and distal phalanx of the index finger\
+										(defaults to (40, 24, 21))
+		"""
+		self.thumb_base = np.asarray(thumb_base, dtype=np.float64)
+		self.thumb_lengths = tuple(thumb_lengths)
+		self.index_base = np.asarray(index_base, dtype=np.float64)
+		self.index_lengths = tuple(index_lengths)
+		yaw, pitch, pronation = np.radians(thumb_orientation)
+		c, s = np.cos(yaw), np.sin(yaw)
+		rotation_yaw = np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+		c, s = np.cos(pitch), np.sin(pitch)
+		rotation_pitch = np.array([[c, 0.0, s], [0.0, 1.0, 0.0], [-s, 0.0, c]])
+		c, s = np.cos(pronation), np.sin(pronation)
+		rotation_pronation = np.array([[1.0, 0.0, 0.0], [0.0, c, -s], [0.0, s, c]])
+		self.thumb_rotation = rotation_yaw @ rotation_pitch @ rotation_pronation
+
+	@staticmethod
+	def _angles(angles):
+		"""
+		Converts joint angles to radians.
+
+		Args:
+			angles (array):	joint angles in degrees of shape (8, n) in the order of :data:`JOINTS`
+		Returns:
+			numpy.ndarray:	joint angles in radians of shape (8, n)
+		"""
+		angles = np.radians(np.asarray(angles, dtype=np.float64))
+		if angles.shape[0] != len(JOINTS):
+			raise ValueError(f"Expected {len(JOINTS)} joint angles {JOINTS}, got {angles.shape[0]}")
+		return angles
+
+	def thumb_tip(self, angles, jacobian=False):
+		"""
+		Computes the position of the thumb tip.
+
+		Args:
+			angles (array):		joint angles in degrees of shape (8, n) in the order of :data:`JOINTS`
+			jacobian (bool):	additionally return the derivatives (defaults to False)
+		Returns:
+			numpy.ndarray:	positions of shape (n, 3)
+			tuple:			if `jacobian`, additionally the derivatives of shape (n, 3) with respect to the CMC\
+							abduction and the CMC roll angle (per degree)
+		"""
+		q = self._angles(angles)
+		flexed = _planar_chain(self.thumb_lengths, [np.zeros_like(q[THUMB_MCP]), q[THUMB_MCP], q[THUMB_IP]])
+		rolled = _rotate('x', q[CMC_ROLL], flexed)
+		abducted = _rotate('z', q[CMC_ABDUCTION], rolled)
+		tip = self.thumb_base + abducted @ self.thumb_rotation.T
+		if not jacobian:
+			return tip
+		# d/dq Rz(q) v = Rz(q) Kz v = Kz Rz(q) v and d/dq Rx(q) w = Rx(q) Kx w = Kx Rx(q) w
+		d_abduction = abducted @ (self.thumb_rotation @ _GENERATORS['z']).T
+		d_roll = _rotate('z', q[CMC_ABDUCTION], rolled @ _GENERATORS['x'].T) @ self.thumb_rotation.T
+		per_degree = np.pi / 180
+		return tip, (d_abduction * per_degree, d_roll * per_degree)
+
+	def index_tip(self, angles):
+		"""
+		Computes the position of the index fingertip.
+
+		Args:
+			angles (array):	joint angles in degrees of shape (8, n) in the order of :data:`JOINTS`
+		Returns:
+			numpy.ndarray:	positions of shape (n, 3)
+		"""
+		q = self._angles(angles)
+		flexed = _planar_chain(self.index_lengths, [q[INDEX_MCP], q[INDEX_PIP], q[INDEX_DIP]])
+		return self.index_base + _rotate('z', q[INDEX_ABDUCTION], flexed)
+
+	def fingertip_distance(self, angles, jacobian=False):
+		"""
+		Computes the distance between the thumb tip and the index fingertip.
+
+		Args:
+			angles (array):		joint angles in degrees of shape (8, n) in the order of :data:`JOINTS`
+			jacobian (bool):	additionally return the derivatives (defaults to False)
+		Returns:
+			numpy.ndarray:	distances of shape (n,)
+			numpy.ndarray:	if `jacobian`, additionally the derivatives of shape (n, 2) with respect to the CMC\
+							abduction and the CMC roll angle (per degree)
+		"""
+		if not jacobian:
+			return np.linalg.norm(self.thumb_tip(angles) - self.index_tip(angles), axis=-1)
+		tip, (d_abduction, d_roll) = self.thumb_tip(angles, jacobian=True)
+		difference = tip - self.index_tip(angles)
+		distance = np.linalg.norm(difference, axis=-1)
+		# the distance is not differentiable at zero, there any direction is a valid subgradient
+		direction = difference / np.maximum(distance, 1e-12)[:, np.newaxis]
+		derivatives = np.stack([np.einsum('ij,ij->i', direction, d_abduction),
+								np.einsum('ij,ij->i', direction, d_roll)], axis=-1)
+		return distance, derivatives
@@ -0,0 +1,126 @@
+"""
+This module implements the classes `Histogram` and `Instrumentation`, which collect counters and distributions of\
+the acquisition (e.g. round trip times, received bytes, resynchronizations and queue waits).
+"""
+
+import bisect
+
+
+class Histogram:
+	"""
+	The class :class:`Histogram<cyberglove.instrumentation.Histogram>` counts values in fixed, logarithmically spaced\
+	buckets. Recording a value costs one binary search, no value is stored.
+	"""
+	def __init__(self, bounds=None):
+		"""
+		Args:
+			bounds (list):	ascending upper bounds of the buckets (defaults to 1 us to about 100 s, factor 2**0.25)
+		"""
+		self.bounds = list(bounds) if bounds is not None else [1e-6 * 2 ** (k / 4) for k in range(108)]
+		self.counts = [0] * (len(self.bounds) + 1)				# last bucket holds values above the last bound
+		self.count = 0
+		self.total = 0.0
+		self.minimum = float('inf')
+		self.maximum = float('-inf')
+
+	def record(self, value):
+		"""
+		Adds a value to the histogram.
+
+		Args:
+			value (float):	value to add
+		"""
+		self.counts[bisect.bisect_left(self.bounds, value)] += 1
+		self.count += 1
+		self.total += value
+		if value < self.minimum:
+			self.minimum = value
+		if value > self.maximum:
+			self.maximum = value
+
+	def percentile(self, q):
+		"""
+		Estimates a percentile by the upper bound of the bucket it falls into.
+
+		Args:
+			q (float):	percentile between 0 and 100
+		Returns:
+			float:	estimated percentile, None if no value was recorded
+		"""
+		if self.count == 0:
+			return None
+		rank = q / 100 * self.count
+		cumulated = 0
+		for bound, count in zip(self.bounds + [self.maximum], self.counts):
+			cumulated += count
+			if cumulated >= rank and count:
+				return min(bound, self.maximum)
+		return self.maximum
+
+	def summary(self):
+		"""
+		Returns:
+			dict:	count, mean, min, max and the estimated percentiles 50, 90 and 99
+		"""
+		if self.count == 0:
+			return {'count': 0}
+		return {
+			'count': self.count,
+			'mean': self.total / self.count,
+			'min': self.minimum,
+			'max': self.maximum,
+			'p50': self.percentile(50),
+			'p90': self.percentile(90),
+			'p99': self.percentile(99),
+		}
+
+
+class Instrumentation:
+	"""
+	The class :class:`Instrumentation<cyberglove.instrumentation.Instrumentation>` collects named counters and\
+	histograms. It is opt-in: the acquisition only records into it if an instance is assigned (e.g.\
+	`Glove.instrumentation`), otherwise the only cost is a comparison with None.
+	"""
+	def __init__(self):
+		self.counters = {}
+		self.histograms = {}
+
+	def count(self, name, increment=1):
+		"""
+		Increments a counter.
+
+		Args:
+			name (str):			name of the counter
+			increment (int):	value to add (defaults to 1)
+		"""
+		self.counters[name] = self.counters.get(name, 0) + increment
+
+	def observe(self, name, value):
+		"""
+		Records a value in a histogram.
+
+		Args:
+			name (str):		name of the histogram
+			value (float):	value to record
+		"""
+		histogram = self.histograms.get(name)
+		if histogram is None:
+			histogram = self.histograms[name] = Histogram()
+		histogram.record(value)
+
+	def snapshot(self):
+		"""
+		Returns:
+			dict:	current values of all counters and summaries of all histograms
+		"""
+		return {
+			'counters': dict(self.counters),
+			'histograms': {name: histogram.summary() for name, histogram in self.histograms.items()},
+		}
+
+	def reset(self):
+		"""
+		Removes all counters and histograms.
+		"""
+		self.counters.clear()
+		self.histograms.clear()
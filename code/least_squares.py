@@ -0,0 +1,25 @@
+"""
+This module implements the linear least-squares solver shared by the calibration methods.
+"""
+
+import numpy as np
+
+
+def solve_least_squares(A, y):
+	"""
+	Solves the linear least-squares problems min ||A x - y|| via QR decomposition. In contrast to the normal\
+	equations (A^T A)^-1 A^T y, the condition of A is not squared.
+	All leading dimensions are treated as a batch, so e.g. all sensors of all subjects are fitted in one call.
+
+	Args:
+		A (array):	design matrices of shape (..., n, p) with n >= p
+		y (array):	observations of shape (..., n)
+	Returns:
+		numpy.ndarray:	coefficients of shape (..., p)
+	Raises:
+		numpy.linalg.LinAlgError:	if a design matrix does not have full column rank
+	"""
+	A = np.asarray(A, dtype=np.float64)
+	y = np.asarray(y, dtype=np.float64)
+	Q, R = np.linalg.qr(A)											# reduced QR decomposition of every matrix
+	return np.linalg.solve(R, np.swapaxes(Q, -1, -2) @ y[..., np.newaxis])[..., 0]
@@ -19,7 +19,8 @@ def calc_alpha(s, gain, offset):
 ######################################################################################################
 # example with fictional measurement data
 ######################################################################################################
-g, o = calibrate(s1=37, s2=135, a1=0, a2=35) 					# calculate gain and offset from calibration measurements
-s = 98															# obtained sensor value from measurement
-alpha = calc_alpha(s, g, o)										# convert sensor value into angle
-print(alpha)
\ No newline at end of file
+if __name__ == "__main__":
+	g, o = calibrate(s1=37, s2=135, a1=0, a2=35) 					# calculate gain and offset from calibration measurements
+	s = 98															# obtained sensor value from measurement
+	alpha = calc_alpha(s, g, o)										# convert sensor value into angle
+	print(alpha)
\ No newline at end of file
@@ -1,5 +1,8 @@
+import warnings
 import numpy as np
 from scipy import optimize
+from least_squares import solve_least_squares
+from hand_model import HandModel, CMC_ABDUCTION, CMC_ROLL
 
 
 def calc_s_rel(s, s_neutral):
@@ -25,17 +28,16 @@ def calc_theta(s, g):
 # separation
 ######################################################################################################
 # s, s_l and s_r are lists
+# (or arrays of shape (..., n) with g of shape (...) to fit all separation sensors at once)
 def calc_c_sep(s, s_l, s_r, g):
-
-	def separation_polynomial(x, c1, c2, c3, c4, c5):
-		return g * x['m'] + c1 * x['l'] + c2 * x['r'] + c3 * (x['l']**2) + c4 * (x['r']**2) + c5 * x['l'] * x['r']
-
-	# create one dict to hold all sensor values
-	s_values = {'l': s_l, 'm': s, 'r': s_r}
-	# create array of n zeros where n is the amount of datasets
-	angles = np.zeros(len(s))
-	# perform curve_fit (minimization with Levenberg-Marquardt)
-	c_factors, _ = optimize.curve_fit(separation_polynomial, s_values, angles)
+	# the separation polynomial g * s + c1 * s_l + c2 * s_r + c3 * s_l**2 + c4 * s_r**2 + c5 * s_l * s_r is fitted
+	# to zero; it is linear in c1 to c5, so the least-squares solution is computed directly instead of iteratively
+	s = np.asarray(s, dtype=float)
+	s_l = np.asarray(s_l, dtype=float)
+	s_r = np.asarray(s_r, dtype=float)
+	g = np.expand_dims(np.asarray(g, dtype=float), -1)			# one gain per fit applies to all of its samples
+	regression_matrix = np.stack([s_l, s_r, s_l**2, s_r**2, s_l * s_r], axis=-1)
+	c_factors = solve_least_squares(regression_matrix, -g * s)
 	return c_factors
 
 
@@ -47,17 +49,13 @@ def calc_phi(s, s_l, s_r, g, c1, c2, c3, c4, c5):
 # thumb CMC
 ######################################################################################################
 # s and s_adj are lists
+# (or arrays of shape (..., n) to fit several sensor pairs at once)
 def calc_c_thumb(s, s_adj):
-
-	def thumb_polynomial(s, adj_f):
-		return s['self'] + adj_f * s['adj_sensor']
-
-	# create dict to hold the sensor values
-	s_values = {'self': s, 'adj_sensor': s_adj}
-	# create array of n zeros where n is the amount of datasets
-	angles = np.zeros(len(s_values['self']))
-	# perform curve_fit (minimization with Levenberg-Marquardt)
-	res, _ = optimize.curve_fit(thumb_polynomial, s_values, angles)
+	# the thumb polynomial s + adj_f * s_adj is fitted to zero; it is linear in adj_f, so the least-squares
+	# solution is computed directly instead of iteratively
+	s = np.asarray(s, dtype=float)
+	s_adj = np.asarray(s_adj, dtype=float)
+	res = solve_least_squares(s_adj[..., np.newaxis], -s)
 	return res
 
 
@@ -68,64 +66,88 @@ def calc_psi(s, s_adj, g, c):
 ######################################################################################################
 # thumb closed loop
 ######################################################################################################
-# s is a list
-def calc_g_closed_loop(s):
-	def calc_distance(s, g_f, g_a):
-		# this function depends on the way the distance is meant to be calculated
-		# different hand models, software and calculations can be used to obtain the distance between
-		# the thumb's and the index finger's fingertips, here dummy with random output
-		# !!! curve_fit() may throw the warning 'Covariance of the parameters could not be estimated' !!!
-		import random
-		distance = random.randint(0, 2)
-		return distance
+# s is a list of the 8 relative sensor values (rows as in the usage example below)
+# g holds the calibrated gains of the other rows: thumb MCP, thumb IP, index MCP, PIP, DIP and abduction MCP_2_3
+# (calls without g, as before, still use unit gains but are warned about)
+def calc_g_closed_loop(s, g=None, *, hand_model=None):
+	# the thumb's and the index finger's fingertips touch in all datasets, their distance in the hand model
+	# is minimized over the gains of CMC abduction and CMC roll
+	if g is None:
+		warnings.warn("calc_g_closed_loop without the calibrated gains g of the other joints uses unit gains, "
+					  "the CMC gains are only meaningful with calibrated gains", stacklevel=2)
+		g = (1, 1, 1, 1, 1, 1)
+	hand_model = HandModel() if hand_model is None else hand_model
+	s = np.asarray(s, dtype=float)
+	gains = np.array([0, g[0], g[1], 0, g[2], g[3], g[4], g[5]], dtype=float)
+
+	def calc_angles(s, g_abd, g_roll):
+		angles = s * gains[:, np.newaxis]
+		angles[CMC_ABDUCTION] = g_abd * s[CMC_ABDUCTION]
+		angles[CMC_ROLL] = g_roll * s[CMC_ROLL]
+		return angles
+
+	def calc_distance(s, g_abd, g_roll):
+		return hand_model.fingertip_distance(calc_angles(s, g_abd, g_roll))
+
+	def calc_jacobian(s, g_abd, g_roll):
+		_, derivatives = hand_model.fingertip_distance(calc_angles(s, g_abd, g_roll), jacobian=True)
+		# chain rule: the angles depend linearly on the gains
+		return derivatives * np.stack([s[CMC_ABDUCTION], s[CMC_ROLL]], axis=-1)
 
 	# create array of n zeros where n is the amount of datasets captured over time
 	# (this is the optimal distance to be optimized to)
 	distances = np.zeros(len(s[0]))
 
-	# perform curve_fit (minimization with Levenberg-Marquardt)
-	res, _ = optimize.curve_fit(calc_distance, s, distances)
-	# output list containing the calculated gain for CMC_roll and for CMC_abduction
+	# perform curve_fit (minimization with Levenberg-Marquardt) with the analytic Jacobian of the hand model
+	res, _ = optimize.curve_fit(calc_distance, s, distances, jac=calc_jacobian)
+	# output list containing the calculated gain for CMC_abduction and for CMC_roll
 	return res
 
 
 ######################################################################################################
 # usage example
 ######################################################################################################
-
-# flexion (linear)
-relative_sensor_value_lin = calc_s_rel(s=176, s_neutral=78) 	# convert sensor value from measurement
-g = calc_g_lin(s1=37, s2=135, a1=0, a2=35)						# calculate gain from calibration measurements
-alpha = calc_theta(relative_sensor_value_lin, g)				# convert relative sensor value into angle
-print(alpha)
-
-# separation (cross talk)
-g_separation = calc_g_lin(s1=34, s2=189, a1=0, a2=17)			# calculate gain from calibration measurement
-s = np.array([62, 63, 66, 68, 69, 70, 72, 73])					# recorded data of separation sensor
-s_l = np.array([28, 29, 32, 27, 28, 29, 31, 28])				# recorded data of left neighbored flexion sensor
-s_r = np.array([14, 16, 18, 14, 15, 17, 13, 16])				# recorded data of right neighbors flexion sensor
-c = calc_c_sep(s, s_l, s_r, g_separation)						# calculate C_abd / C_flex to adjust cross-talk influence
-# calculate the separation angle of one measurement:
-phi = calc_phi(s=82, s_l=34, s_r=24, g=g_separation, c1=c[0], c2=c[1], c3=c[2], c4=c[3], c5=c[4])
-print(phi)
-
-# thumb CMC (cross talk) [both applicable for roll and abduction, here shown for abduction)
-g_thumb = calc_g_lin(s1=34, s2=127, a1=0, a2=60)				# calculate gain from calibration measurements
-s = np.array([62, 63, 66, 68, 69, 70, 72, 73])					# recorded data of the CMC abduction sensor
-s_other_sensor = np.array([14, 16, 18, 14, 15, 17, 13, 16])		# recorded data of the roll sensor
-c = calc_c_thumb(s, s_other_sensor)								# calculate the correction factor of roll influencing abduction
-																# angle calculation not yet possible
-# thumb closed-loop
-s0 = np.array([34, 37, 39, 38, 41])								# recorded data of roll CMC sensor
-s1 = np.array([28, 24, 26, 27, 29])								# recorded data of thumb MCP sensor
-s2 = np.array([78, 75, 74, 79, 80])								# recorded data of thumb PIP sensor
-s3 = np.array([53, 59, 63, 52, 55])								# recorded data of abduction CMC sensor
-s4 = np.array([22, 22, 23, 26, 31])								# recorded data of index finger MCP
-s5 = np.array([123, 124, 119, 118, 126])						# recorded data of index finger PIP
-s6 = 0.87 * s5 - 25.27											# calculated data of index finger DIP
-s10 = np.array([12, 17, 24, 16, 27])							# recorded data of abduction MCP_2_3
-s = np.array([s0, s1, s2, s3, s4, s5, s6, s10])					# pack all recorded sensor values
-g_CMC_abd, g_CMC_roll = calc_g_closed_loop(s)					# calculate CMC gains with closed-loop distance minimization
-
-psi = calc_psi(24, 13, g_thumb, c)								# convert two relative CMC sensor values into abduction angle
-print(psi)
+if __name__ == "__main__":
+	# flexion (linear)
+	relative_sensor_value_lin = calc_s_rel(s=176, s_neutral=78) 	# convert sensor value from measurement
+	g = calc_g_lin(s1=37, s2=135, a1=0, a2=35)						# calculate gain from calibration measurements
+	alpha = calc_theta(relative_sensor_value_lin, g)				# convert relative sensor value into angle
+	print(alpha)
+
+	# separation (cross talk)
+	g_separation = calc_g_lin(s1=34, s2=189, a1=0, a2=17)			# calculate gain from calibration measurement
+	s = np.array([62, 63, 66, 68, 69, 70, 72, 73])					# recorded data of separation sensor
+	s_l = np.array([28, 29, 32, 27, 28, 29, 31, 28])				# recorded data of left neighbored flexion sensor
+	s_r = np.array([14, 16, 18, 14, 15, 17, 13, 16])				# recorded data of right neighbors flexion sensor
+	c = calc_c_sep(s, s_l, s_r, g_separation)						# calculate C_abd / C_flex to adjust cross-talk influence
+	# calculate the separation angle of one measurement:
+	phi = calc_phi(s=82, s_l=34, s_r=24, g=g_separation, c1=c[0], c2=c[1], c3=c[2], c4=c[3], c5=c[4])
+	print(phi)
+
+	# thumb CMC (cross talk) [both applicable for roll and abduction, here shown for abduction)
+	g_thumb = calc_g_lin(s1=34, s2=127, a1=0, a2=60)				# calculate gain from calibration measurements
+	s = np.array([62, 63, 66, 68, 69, 70, 72, 73])					# recorded data of the CMC abduction sensor
+	s_other_sensor = np.array([14, 16, 18, 14, 15, 17, 13, 16])		# recorded data of the roll sensor
+	c = calc_c_thumb(s, s_other_sensor)								# calculate the correction factor of roll influencing abduction
+																	# angle calculation not yet possible
+	# thumb closed-loop (pinch of thumb and index finger, the other joints are calibrated beforehand)
+	g_thumb_mcp = calc_g_lin(s1=24, s2=124, a1=0, a2=60)			# calculate gains from calibration measurements
+	g_thumb_ip = calc_g_lin(s1=74, s2=174, a1=0, a2=90)
+	g_index_mcp = calc_g_lin(s1=22, s2=222, a1=0, a2=110)
+	g_index_pip = calc_g_lin(s1=118, s2=218, a1=0, a2=70)
+	g_index_abd = calc_g_lin(s1=12, s2=62, a1=0, a2=20)
+	s0 = calc_s_rel(np.array([51, 66, 43, 67, 60, 48, 66]), 34)			# relative data of roll CMC sensor
+	s1 = calc_s_rel(np.array([78, 57, 85, 63, 56, 63, 70]), 24)			# relative data of thumb MCP sensor
+	s2 = calc_s_rel(np.array([109, 163, 98, 146, 155, 136, 129]), 74)	# relative data of thumb IP sensor
+	s3 = calc_s_rel(np.array([53, 64, 66, 55, 53, 59, 52]), 52)			# relative data of abduction CMC sensor
+	s4 = calc_s_rel(np.array([153, 178, 176, 168, 154, 156, 166]), 22)	# relative data of index finger MCP
+	s5 = calc_s_rel(np.array([157, 156, 135, 157, 170, 161, 152]), 118)	# relative data of index finger PIP
+	s6 = 0.8 * s5														# estimated data of index finger DIP (gain of the PIP)
+	s10 = calc_s_rel(np.array([12, 13, 12, 11, 12, 12, 13]), 12)		# relative data of abduction MCP_2_3
+	s = np.array([s0, s1, s2, s3, s4, s5, s6, s10])					# pack all relative sensor values
+	g = (g_thumb_mcp, g_thumb_ip, g_index_mcp, g_index_pip, g_index_pip, g_index_abd)
+	g_CMC_abd, g_CMC_roll = calc_g_closed_loop(s, g)				# calculate CMC gains with closed-loop distance minimization
+	print(g_CMC_abd, g_CMC_roll)									# about 0.4 and 0.5
+
+	psi = calc_psi(24, 13, g_thumb, c)								# convert two relative CMC sensor values into abduction angle
+	print(psi)
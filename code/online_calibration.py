@@ -0,0 +1,316 @@
+"""
+This module implements the class `RecursiveLeastSquares` and the calibrations built on it, which update the\
+calibration parameters of `method_2.py` and `method_3.py` with every received sample instead of fitting whole recordings afterwards.
+"""
+
+import threading
+from abc import ABC, abstractmethod
+import numpy as np
+from frame_decoder import SENSOR_COUNT
+
+
+class RecursiveLeastSquares:
+	"""
+	The class :class:`RecursiveLeastSquares<cyberglove.online_calibration.RecursiveLeastSquares>` solves the linear\
+	least-squares problem min ||X theta - y|| one row at a time. Every update costs O(p**2) for p parameters,\
+	independent of the amount of samples seen so far, and no sample is stored.
+	All leading dimensions of the parameters are treated as a batch, so e.g. all 22 sensors are updated at once.
+
+	With a forgetting factor below 1 old samples are weighted down exponentially, so the estimates follow drifting\
+	sensors. Without excitation (e.g. a pose held for a long time) the covariance then grows, so factors close to 1\
+	(e.g. 0.999) should be used.
+	"""
+	def __init__(self, parameter_count, shape=(), forgetting_factor=1.0, initial_covariance=1e6,
+				 initial_parameters=None, tolerance=1e-3, settle_samples=100):
+		"""
+		Args:
+			parameter_count (int):			amount of parameters p of one problem
+			shape (tuple):					batch shape, e.g. (22,) for one problem per sensor (defaults to ())
+			forgetting_factor (float):		weight of the previous samples per update, 0 < factor <= 1 (defaults to 1.0)
+			initial_covariance (float):		initial diagonal of the covariance, large values mean little trust in\
+											the initial parameters (defaults to 1e6)
+			initial_parameters (array):		initial estimates of shape (..., p) (defaults to zeros)
+			tolerance (float):				maximum change of a parameter per update that counts as settled\
+											(defaults to 1e-3)
+			settle_samples (int):			amount of consecutive settled updates after which the estimates are\
+											considered converged (defaults to 100)
+		"""
+		if not 0 < forgetting_factor <= 1:
+			raise ValueError(f"Forgetting factor must be in (0, 1], got {forgetting_factor}")
+		self.shape = tuple(shape)
+		self.forgetting_factor = forgetting_factor
+		self.tolerance = tolerance
+		self.settle_samples = settle_samples
+		self.parameters = np.zeros(self.shape + (parameter_count,))
+		if initial_parameters is not None:
+			self.parameters[...] = initial_parameters
+		self.covariance = np.broadcast_to(np.eye(parameter_count) * initial_covariance,
+										  self.shape + (parameter_count, parameter_count)).copy()
+		self.samples = 0							# amount of updates
+		self.change = np.inf						# maximum absolute change of a parameter in the last update
+		self.stable_samples = 0						# amount of consecutive updates with a change below the tolerance
+
+	def update(self, x, y):
+		"""
+		Adds one row of the regression.
+
+		Args:
+			x (array):	regressors of shape (..., p), broadcast to the batch shape
+			y (array):	observations of shape (...), broadcast to the batch shape
+		Returns:
+			numpy.ndarray:	updated parameters of shape (..., p)
+		"""
+		x = np.asarray(x, dtype=np.float64)
+		y = np.asarray(y, dtype=np.float64)
+		px = np.einsum('...ij,...j->...i', self.covariance, x)
+		gain = px / (self.forgetting_factor + np.einsum('...i,...i->...', x, px))[..., np.newaxis]
+		error = y - np.einsum('...i,...i->...', x, self.parameters)
+		step = gain * error[..., np.newaxis]
+		self.parameters = self.parameters + step		# new array, so readers in other threads see a consistent state
+		covariance = (self.covariance - gain[..., :, np.newaxis] * px[..., np.newaxis, :]) / self.forgetting_factor
+		self.covariance = 0.5 * (covariance + np.swapaxes(covariance, -1, -2))	# counter rounding errors
+		self.samples += 1
+		self.change = float(np.max(np.abs(step))) if step.size else 0.0
+		self.stable_samples = self.stable_samples + 1 if self.change <= self.tolerance else 0
+		return self.parameters
+
+	@property
+	def uncertainty(self):
+		"""
+		numpy.ndarray: trace of the covariance of every problem, shrinks while the estimates converge
+		"""
+		return np.trace(self.covariance, axis1=-2, axis2=-1)
+
+	@property
+	def settled(self):
+		"""
+		bool: True if the parameters changed less than the tolerance for `settle_samples` consecutive updates
+		"""
+		return self.stable_samples >= self.settle_samples
+
+	def restart_convergence(self):
+		"""
+		Resets the counter of settled updates, e.g. when a new calibration pose is taken. The estimates are kept.
+		"""
+		self.stable_samples = 0
+		self.change = np.inf
+
+
+class _OnlineCalibration(ABC):
+	"""
+	Base class of the online calibrations. An instance is called with every
+	:class:`Sample<cyberglove.frame_decoder.Sample>`, so it can be passed as callback to `Glove.start_streaming` or as
+	consumer to `Glove.start_acquisition`. Samples are only used while a prescribed angle is set. The angle is set\
+	from another thread than the samples arrive in, so both are guarded by a lock: every sample is used with the\
+	angle that was set when it arrived.
+	"""
+	def __init__(self, estimator):
+		self.estimator = estimator
+		self.angle = None
+		self._lock = threading.Lock()
+
+	def set_angle(self, angle):
+		"""
+		Sets the prescribed angle of the current calibration pose and restarts the convergence monitoring.
+
+		Args:
+			angle (float):	prescribed angle (or one angle per sensor), None to ignore samples between poses
+		"""
+		angle = None if angle is None else np.asarray(angle, dtype=np.float64)
+		with self._lock:
+			self.angle = angle
+			self.estimator.restart_convergence()
+
+	def __call__(self, sample):
+		"""
+		Updates the estimates with a sample.
+
+		Args:
+			sample (Sample):	received sample (or a plain dataset)
+		"""
+		values = np.asarray(getattr(sample, 'values', sample), dtype=np.float64)
+		with self._lock:
+			if self.angle is not None:
+				self.update(values, self.angle)
+
+	@abstractmethod
+	def update(self, values, angle):
+		"""
+		Updates the estimates with one dataset.
+
+		Args:
+			values (array):	sensor values of one dataset (all 22 sensors)
+			angle (array):	prescribed angle
+		"""
+
+	@property
+	def settled(self):
+		"""
+		bool: True if the estimates have settled for the current pose
+		"""
+		return self.estimator.settled
+
+	@property
+	def change(self):
+		"""
+		float: maximum change of a regression parameter in the last update
+		"""
+		return self.estimator.change
+
+	@property
+	def samples(self):
+		"""
+		int: amount of samples used so far
+		"""
+		return self.estimator.samples
+
+
+class OnlineFlexionCalibration(_OnlineCalibration):
+	"""
+	The class :class:`OnlineFlexionCalibration<cyberglove.online_calibration.OnlineFlexionCalibration>` estimates\
+	gains and offsets like `method_3.calc_g_and_o_lin` (s = a * angle + b) for several sensors while streaming.
+
+	Example:
+		calibration = OnlineFlexionCalibration()
+		glove.start_streaming(callback=calibration)
+		for angle in (10, 30, 50, 70):
+			calibration.set_angle(angle)
+			while not calibration.settled:
+				time.sleep(0.1)
+		calibration.set_angle(None)
+		glove.stop_streaming()
+		gain, offset = calibration.gain, calibration.offset
+	"""
+	def __init__(self, sensors=None, forgetting_factor=1.0, tolerance=1e-3, settle_samples=100):
+		"""
+		Args:
+			sensors (list):				indices of the calibrated sensors (defaults to all 22 sensors)
+			forgetting_factor (float):	see :class:`RecursiveLeastSquares` (defaults to 1.0)
+			tolerance (float):			see :class:`RecursiveLeastSquares` (defaults to 1e-3)
+			settle_samples (int):		see :class:`RecursiveLeastSquares` (defaults to 100)
+		"""
+		self.sensors = np.arange(SENSOR_COUNT) if sensors is None else np.asarray(sensors, dtype=np.intp)
+		# start at gain 1 and offset 0 to avoid a division by zero before the first sample
+		estimator = RecursiveLeastSquares(2, self.sensors.shape, forgetting_factor, initial_parameters=(1.0, 0.0),
+										  tolerance=tolerance, settle_samples=settle_samples)
+		super().__init__(estimator)
+
+	def update(self, values, angle):
+		"""
+		Updates the estimates with one dataset.
+
+		Args:
+			values (array):	sensor values of one dataset (all 22 sensors)
+			angle (float):	prescribed angle (or one angle per calibrated sensor)
+		"""
+		angle = np.broadcast_to(angle, self.sensors.shape)
+		self.estimator.update(np.stack([angle, np.ones_like(angle)], axis=-1), values[self.sensors])
+
+	@property
+	def gain(self):
+		"""
+		numpy.ndarray: current gain of every calibrated sensor
+		"""
+		return 1.0 / self.estimator.parameters[..., 0]
+
+	@property
+	def offset(self):
+		"""
+		numpy.ndarray: current offset of every calibrated sensor
+		"""
+		parameters = self.estimator.parameters
+		return - parameters[..., 1] / parameters[..., 0]
+
+
+class OnlineGainCalibration(_OnlineCalibration):
+	"""
+	The class :class:`OnlineGainCalibration<cyberglove.online_calibration.OnlineGainCalibration>` estimates the\
+	gains of the relative sensor values like `method_2.calc_g_lin` (angle = g * (s - s_neutral)) for several sensors\
+	while streaming. The neutral sensor values are measured beforehand (e.g. the mean of the flat hand), only the\
+	gain is estimated, so fewer samples are needed than for gain and offset.
+	"""
+	def __init__(self, neutral, sensors=None, forgetting_factor=1.0, tolerance=1e-3, settle_samples=100):
+		"""
+		Args:
+			neutral (array):			neutral sensor values of the calibrated sensors (or one value for all)
+			sensors (list):				indices of the calibrated sensors (defaults to all 22 sensors)
+			forgetting_factor (float):	see :class:`RecursiveLeastSquares` (defaults to 1.0)
+			tolerance (float):			see :class:`RecursiveLeastSquares` (defaults to 1e-3)
+			settle_samples (int):		see :class:`RecursiveLeastSquares` (defaults to 100)
+		"""
+		self.sensors = np.arange(SENSOR_COUNT) if sensors is None else np.asarray(sensors, dtype=np.intp)
+		self.neutral = np.broadcast_to(np.asarray(neutral, dtype=np.float64), self.sensors.shape)
+		estimator = RecursiveLeastSquares(1, self.sensors.shape, forgetting_factor, tolerance=tolerance,
+										  settle_samples=settle_samples)
+		super().__init__(estimator)
+
+	def update(self, values, angle):
+		"""
+		Updates the estimates with one dataset.
+
+		Args:
+			values (array):	sensor values of one dataset (all 22 sensors)
+			angle (float):	prescribed angle (or one angle per calibrated sensor)
+		"""
+		angle = np.broadcast_to(angle, self.sensors.shape)
+		relative = values[self.sensors] - self.neutral				# method_2.calc_s_rel
+		self.estimator.update(relative[..., np.newaxis], angle)
+
+	@property
+	def gain(self):
+		"""
+		numpy.ndarray: current gain of every calibrated sensor
+		"""
+		return self.estimator.parameters[..., 0]
+
+
+class OnlineSeparationCalibration(_OnlineCalibration):
+	"""
+	The class :class:`OnlineSeparationCalibration<cyberglove.online_calibration.OnlineSeparationCalibration>`\
+	estimates gains, correction factors and offsets like `method_3.calc_sep` for one or several separation sensors\
+	while streaming. The flexion of the neighbored MCP joints has to be calibrated beforehand.
+	"""
+	def __init__(self, sensor, sensor_l, sensor_r, flexion_l=(1.0, 0.0), flexion_r=(1.0, 0.0),
+				 forgetting_factor=1.0, tolerance=1e-3, settle_samples=100):
+		"""
+		Args:
+			sensor (int):				index of the separation sensor (or a list of indices)
+			sensor_l (int):				index of the left neighbored flexion sensor (or a list of indices)
+			sensor_r (int):				index of the right neighbored flexion sensor (or a list of indices)
+			flexion_l (tuple):			(gain, offset) of the left MCP joint (defaults to raw sensor values)
+			flexion_r (tuple):			(gain, offset) of the right MCP joint (defaults to raw sensor values)
+			forgetting_factor (float):	see :class:`RecursiveLeastSquares` (defaults to 1.0)
+			tolerance (float):			see :class:`RecursiveLeastSquares` (defaults to 1e-3)
+			settle_samples (int):		see :class:`RecursiveLeastSquares` (defaults to 100)
+		"""
+		self.sensor = np.asarray(sensor, dtype=np.intp)
+		self.sensor_l = np.asarray(sensor_l, dtype=np.intp)
+		self.sensor_r = np.asarray(sensor_r, dtype=np.intp)
+		self.flexion_l = tuple(np.asarray(x, dtype=np.float64) for x in flexion_l)
+		self.flexion_r = tuple(np.asarray(x, dtype=np.float64) for x in flexion_r)
+		estimator = RecursiveLeastSquares(4, self.sensor.shape, forgetting_factor, initial_parameters=(1.0, 0, 0, 0),
+										  tolerance=tolerance, settle_samples=settle_samples)
+		super().__init__(estimator)
+
+	def update(self, values, angle):
+		"""
+		Updates the estimates with one dataset.
+
+		Args:
+			values (array):	sensor values of one dataset (all 22 sensors)
+			angle (float):	prescribed separation angle (or one angle per separation sensor)
+		"""
+		angle = np.broadcast_to(angle, self.sensor.shape)
+		flex_angle_diff = (values[self.sensor_l] * self.flexion_l[0] + self.flexion_l[1]) \
+			- (values[self.sensor_r] * self.flexion_r[0] + self.flexion_r[1])
+		# one row [a, diff**2, diff, 1] like in method_3.calc_sep
+		x = np.stack([angle, flex_angle_diff ** 2, flex_angle_diff, np.ones_like(angle)], axis=-1)
+		self.estimator.update(x, values[self.sensor])
+
+	@property
+	def parameters(self):
+		"""
+		tuple: current gain, correction1, correction2 and offset, as returned by `method_3.calc_sep`
+		"""
+		a, c1, c2, b = (self.estimator.parameters[..., k] for k in range(4))
+		return 1.0 / a, - c2 / a, - c1 / a, - b / a
@@ -0,0 +1,272 @@
+"""
+This module implements the classes `RollingStatistics`, `StaticPoseDetector` and `PoseCollector`, which detect on\
+the live stream when the hand is held still and average the sensor values of every held pose into the inputs of the\
+calibration methods `method_1.py` to `method_3.py`.
+"""
+
+import threading
+from collections import deque
+from typing import NamedTuple
+import numpy as np
+from frame_decoder import SENSOR_COUNT
+
+
+class PoseSnapshot(NamedTuple):
+	"""
+	Averaged sensor values of one detected static pose.
+	"""
+	start: float					# timestamp of the first sample of the pose
+	end: float						# timestamp of the last sample of the pose
+	values: np.ndarray				# mean of every sensor value
+	std: np.ndarray					# standard deviation of every sensor value
+	count: int						# amount of averaged samples
+
+
+class RollingStatistics:
+	"""
+	The class :class:`RollingStatistics<cyberglove.pose_detection.RollingStatistics>` keeps the mean and the\
+	variance of the last `window` datasets of every sensor. Every update costs O(1) per sensor: the new dataset is\
+	added to running sums and the dataset leaving the window is subtracted. The sensor values are integers, so the\
+	sums are kept exactly in integers and do not drift.
+	"""
+	def __init__(self, window, sensor_count=SENSOR_COUNT):
+		"""
+		Args:
+			window (int):			amount of datasets in the window
+			sensor_count (int):		amount of sensor values in one dataset (defaults to 22)
+		"""
+		if window < 2:
+			raise ValueError(f"Window must contain at least 2 datasets, got {window}")
+		self.window = window
+		self._buffer = np.zeros((window, sensor_count), dtype=np.int64)
+		self._sum = np.zeros(sensor_count, dtype=np.int64)
+		self._sum_of_squares = np.zeros(sensor_count, dtype=np.int64)
+		self._position = 0
+		self.count = 0								# amount of datasets in the window
+
+	def update(self, values):
+		"""
+		Adds a dataset and removes the oldest one if the window is full.
+
+		Args:
+			values (array):	sensor values of one dataset
+		"""
+		values = np.asarray(values, dtype=np.int64)
+		old = self._buffer[self._position]
+		if self.count == self.window:
+			self._sum -= old
+			self._sum_of_squares -= old * old
+		else:
+			self.count += 1
+		old[...] = values
+		self._sum += values
+		self._sum_of_squares += values * values
+		self._position = (self._position + 1) % self.window
+
+	def clear(self):
+		"""
+		Empties the window.
+		"""
+		self._sum[...] = 0
+		self._sum_of_squares[...] = 0
+		self._position = 0
+		self.count = 0
+
+	@property
+	def full(self):
+		"""
+		bool: True if the window contains `window` datasets
+		"""
+		return self.count == self.window
+
+	@property
+	def mean(self):
+		"""
+		numpy.ndarray: mean of every sensor value in the window
+		"""
+		return self._sum / max(self.count, 1)
+
+	@property
+	def variance(self):
+		"""
+		numpy.ndarray: (population) variance of every sensor value in the window
+		"""
+		count = max(self.count, 1)
+		return (count * self._sum_of_squares - self._sum * self._sum) / (count * count)
+
+
+class StaticPoseDetector:
+	"""
+	The class :class:`StaticPoseDetector<cyberglove.pose_detection.StaticPoseDetector>` detects plateaus in the\
+	stream, i.e. windows in which the standard deviation of every observed sensor stays below a threshold. Each\
+	plateau is reported once as a :class:`PoseSnapshot`; the next one is only reported after the hand has moved.
+	An instance is called with every :class:`Sample<cyberglove.frame_decoder.Sample>`, so it can be passed as\
+	callback to `Glove.start_streaming` or as consumer to `Glove.start_acquisition`.
+	"""
+	def __init__(self, window=50, max_std=1.0, sensors=None, callback=None, sensor_count=SENSOR_COUNT):
+		"""
+		Args:
+			window (int):			amount of datasets a pose has to be held, e.g. 50 for 0.5 s at 100 Hz\
+									(defaults to 50)
+			max_std (float):		maximum standard deviation of a sensor value within a pose (defaults to 1.0)
+			sensors (list):			indices of the sensors that have to be still (defaults to all sensors)
+			callback (callable):	function called with every :class:`PoseSnapshot`, otherwise they are appended to\
+									:attr:`snapshots` (defaults to None)
+			sensor_count (int):		amount of sensor values in one dataset (defaults to 22)
+		"""
+		self.statistics = RollingStatistics(window, sensor_count)
+		self.max_variance = max_std ** 2
+		self.sensors = slice(None) if sensors is None else np.asarray(sensors, dtype=np.intp)
+		self.callback = callback
+		self.snapshots = []
+		self._timestamps = deque(maxlen=window)		# timestamps of the datasets in the window
+		self._reported = False						# True while the current plateau has already been reported
+
+	def __call__(self, sample):
+		"""
+		Adds a sample and reports a pose if the hand has been still for a whole window.
+
+		Args:
+			sample (Sample):	received sample
+		Returns:
+			PoseSnapshot:	the detected pose or None
+		"""
+		statistics = self.statistics
+		self._timestamps.append(sample.timestamp)
+		statistics.update(sample.values)
+		if not statistics.full:
+			return None
+		variance = statistics.variance
+		if np.any(variance[self.sensors] > self.max_variance):
+			self._reported = False
+			return None
+		if self._reported:
+			return None
+		self._reported = True
+		snapshot = PoseSnapshot(self._timestamps[0], sample.timestamp, statistics.mean, np.sqrt(variance),
+								statistics.count)
+		if self.callback is not None:
+			self.callback(snapshot)
+		else:
+			self.snapshots.append(snapshot)
+		return snapshot
+
+	def reset(self):
+		"""
+		Forgets the window, e.g. after a pause of the stream.
+		"""
+		self.statistics.clear()
+		self._timestamps.clear()
+		self._reported = False
+
+
+class PoseCollector:
+	"""
+	The class :class:`PoseCollector<cyberglove.pose_detection.PoseCollector>` assigns the detected poses in order to\
+	the prescribed angles of a calibration protocol and provides them as inputs of the calibration methods.
+
+	Example:
+		collector = PoseCollector([0, 30, 50, 70])
+		gl.start_streaming(callback=StaticPoseDetector(callback=collector.add))
+		collector.wait()
+		gl.stop_streaming()
+		g, o = method_3.calc_g_and_o_lin(*collector.method_3_inputs())		# all 22 sensors at once
+		s, a = collector.method_2_inputs()									# relative to the pose at 0 degrees
+		g = method_2.calc_g_lin(s[:, 0], s[:, 1], a[0], a[1])
+	"""
+	def __init__(self, angles):
+		"""
+		Args:
+			angles (list):	prescribed angles of the poses in the order they are taken
+		"""
+		self.angles = np.asarray(angles, dtype=np.float64)
+		self.snapshots = []
+		self._complete = threading.Event()
+
+	def add(self, snapshot):
+		"""
+		Assigns a detected pose to the next prescribed angle. Further poses are ignored once all angles are assigned.
+
+		Args:
+			snapshot (PoseSnapshot):	detected pose
+		"""
+		if len(self.snapshots) < len(self.angles):
+			self.snapshots.append(snapshot)
+			if len(self.snapshots) == len(self.angles):
+				self._complete.set()
+
+	@property
+	def complete(self):
+		"""
+		bool: True if a pose was detected for every prescribed angle
+		"""
+		return self._complete.is_set()
+
+	def wait(self, timeout=None):
+		"""
+		Waits until a pose was detected for every prescribed angle.
+
+		Args:
+			timeout (float):	maximum time to wait in seconds (defaults to None, i.e. no limit)
+		Returns:
+			bool:	True if all poses were detected
+		"""
+		return self._complete.wait(timeout)
+
+	@property
+	def values(self):
+		"""
+		numpy.ndarray: averaged sensor values of shape (poses, 22)
+		"""
+		return np.array([snapshot.values for snapshot in self.snapshots])
+
+	def method_1_inputs(self, sensor, first=0, second=1):
+		"""
+		Returns the inputs of `method_1.calibrate` for one sensor.
+
+		Args:
+			sensor (int):	index of the sensor
+			first (int):	index of the first pose (defaults to 0)
+			second (int):	index of the second pose (defaults to 1)
+		Returns:
+			dict:	s1, s2, a1 and a2
+		"""
+		values = self.values
+		return {'s1': values[first, sensor], 's2': values[second, sensor],
+				'a1': self.angles[first], 'a2': self.angles[second]}
+
+	def method_2_inputs(self, sensors=None, neutral=None):
+		"""
+		Returns the relative sensor values of several sensors (see `method_2.calc_s_rel`). Their rows are the inputs\
+		of `method_2`: two columns give the gains of `calc_g_lin` (s1, s2 and the angles a1, a2), the rows of a\
+		separation sensor and its neighbored flexion sensors are s, s_l and s_r of `calc_c_sep`, and the rows of a\
+		thumb CMC sensor and the adjacent one are s and s_adj of `calc_c_thumb`.
+
+		Args:
+			sensors (list):	indices of the sensors (defaults to all sensors)
+			neutral (int):	index of the pose of the neutral sensor values (defaults to the first pose at 0 degrees)
+		Returns:
+			tuple:	relative sensor values of shape (sensors, poses) and the prescribed angles of shape (poses,)
+		Raises:
+			ValueError:	if no neutral pose is given and no pose was taken at 0 degrees
+		"""
+		values, angles = self.method_3_inputs(sensors)
+		if neutral is None:
+			if not np.any(angles == 0):
+				raise ValueError("No pose at 0 degrees for the neutral sensor values")
+			neutral = int(np.argmax(angles == 0))
+		return values - values[..., neutral:neutral + 1], angles
+
+	def method_3_inputs(self, sensors=None):
+		"""
+		Returns the inputs of `method_3.calc_g_and_o_lin` for several sensors.
+
+		Args:
+			sensors (list):	indices of the sensors (defaults to all sensors)
+		Returns:
+			tuple:	sensor values of shape (sensors, poses) and the prescribed angles of shape (poses,)
+		"""
+		values = self.values.T
+		if sensors is not None:
+			values = values[sensors]
+		return values, self.angles[:len(self.snapshots)]
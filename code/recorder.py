@@ -0,0 +1,121 @@
+"""
+This module implements the class `Recorder`, which writes datasets of the CyberGlove III into a binary `.npy` file,\
+and the function `load_recording` to read such a file.
+"""
+
+import time
+import numpy as np
+from frame_decoder import SENSOR_COUNT
+
+
+HEADER_SIZE = 256							# fixed header size, so the shape can be updated in place after every block
+
+
+def recording_dtype(sensor_count=SENSOR_COUNT):
+	"""
+	Returns the data type of one record: a float64 timestamp and the 8-bit sensor values.
+
+	Args:
+		sensor_count (int):	amount of sensor values in one dataset (defaults to 22)
+	Returns:
+		numpy.dtype:	structured data type with the fields 'timestamp' and 'values'
+	"""
+	return np.dtype([('timestamp', '<f8'), ('values', 'u1', (sensor_count,))])
+
+
+def _npy_header(dtype, length):
+	"""
+	Creates a `.npy` (version 1.0) header of fixed size for a one-dimensional array.
+
+	Args:
+		dtype (numpy.dtype):	data type of the records
+		length (int):			amount of records
+	Returns:
+		bytes:	header of `HEADER_SIZE` bytes
+	"""
+	header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (length,)})
+	prefix = np.lib.format.magic(1, 0) + (HEADER_SIZE - 10).to_bytes(2, 'little')
+	header = header.ljust(HEADER_SIZE - len(prefix) - 1) + '\n'		# pad with spaces, terminate with newline
+	return prefix + header.encode('latin1')
+
+
+class Recorder:
+	"""
+	The class :class:`Recorder<cyberglove.recorder.Recorder>` collects datasets in a preallocated block and\
+	appends every full block to a binary file. Compared to writing one text line per dataset, no string is created\
+	per dataset and the file can be memory-mapped without parsing (see :func:`load_recording`).
+	The file is a valid `.npy` file with one record per dataset, its header is updated after every block, so the\
+	recorded data is readable even if the recording is aborted.
+	"""
+	def __init__(self, file: str, sensor_count=SENSOR_COUNT, block_size=4096):
+		"""
+		Args:
+			file (str):			path to the file to write to (should end with '.npy')
+			sensor_count (int):	amount of sensor values in one dataset (defaults to 22)
+			block_size (int):	amount of datasets written at once (defaults to 4096)
+		"""
+		self.dtype = recording_dtype(sensor_count)
+		self._block = np.empty(block_size, dtype=self.dtype)
+		self._values = self._block['values']						# (block_size, sensor_count) uint8 view
+		self._timestamps = self._block['timestamp']					# (block_size,) float64 view
+		self._fill = 0												# amount of datasets in the block
+		self.length = 0												# amount of datasets written to the file
+		self._fp = open(file, 'wb')
+		self._fp.write(_npy_header(self.dtype, 0))
+
+	def append(self, dataset, timestamp=None):
+		"""
+		Adds one dataset to the recording.
+
+		Args:
+			dataset (tuple):	sensor values between 1 and 255
+			timestamp (float):	time of the dataset in seconds (defaults to `time.monotonic()`)
+		"""
+		self._values[self._fill] = dataset
+		self._timestamps[self._fill] = time.monotonic() if timestamp is None else timestamp
+		self._fill += 1
+		if self._fill == len(self._block):
+			self.flush()
+
+	def flush(self):
+		"""
+		Writes the collected datasets to the file and updates the header.
+		"""
+		if self._fill == 0:
+			return
+		self._fp.write(self._block[:self._fill].tobytes())
+		self.length += self._fill
+		self._fill = 0
+		self._fp.seek(0)
+		self._fp.write(_npy_header(self.dtype, self.length))
+		self._fp.seek(0, 2)											# continue at the end of the file
+		self._fp.flush()
+
+	def close(self):
+		"""
+		Writes the remaining datasets and closes the file.
+		"""
+		if self._fp.closed:
+			return
+		self.flush()
+		self._fp.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+
+def load_recording(file: str):
+	"""
+	Memory-maps a recording written by :class:`Recorder`. The data is not copied into memory, so also recordings\
+	of several hours can be opened instantly.
+
+	Args:
+		file (str):	path to the recording
+	Returns:
+		tuple:	(timestamps as float64 array of shape (n,), sensor values as uint8 array of shape (n, sensor_count))
+	"""
+	recording = np.load(file, mmap_mode='r')
+	return recording['timestamp'], recording['values']
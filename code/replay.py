@@ -0,0 +1,326 @@
+"""
+This module implements the class `ReplaySource`, which replays recorded sessions with the same sample interface as\
+a connected `Glove`, so filters, calibrations and consumers can be tested without the hardware and at rates far\
+above the rate of the glove.
+"""
+
+import sys
+import time
+import queue
+import itertools
+import threading
+import numpy as np
+from frame_decoder import Sample
+from recorder import load_recording
+from session_file import SessionReader
+from acquisition import AcquisitionPipeline, BLOCK
+
+
+class ReplaySource:
+	"""
+	The class :class:`ReplaySource<cyberglove.replay.ReplaySource>` reads a recording written by\
+	`Glove.write_continuous_datasets` (`.cg3s` session file, `.npy` recording or text file) and emits its datasets\
+	as :class:`Sample<cyberglove.frame_decoder.Sample>` with the recorded timing, a multiple of it or as fast as\
+	possible. It provides the streaming and acquisition methods of `Glove`:
+
+		source = ReplaySource("session.cg3s", speed=10)
+		source.start_streaming()
+		for sample in source.stream_samples():
+			...
+
+	The recording is read chunk by chunk, so also long sessions are replayed with constant memory.
+	"""
+	def __init__(self, file: str, speed=1.0, start=None, end=None, loop=False, rate=100.0, recorded_timestamps=False,
+				 chunk_size=4096, queue_size=4096):
+		"""
+		Args:
+			file (str):					path to the recording
+			speed (float):				multiple of the recorded timing, None to replay as fast as possible\
+										(defaults to 1.0)
+			start (float):				first recorded timestamp to replay (defaults to the beginning)
+			end (float):				first recorded timestamp not to replay (defaults to the end)
+			loop (bool):				replay the recording again and again (defaults to False)
+			rate (float):				sample rate of text files, which contain no timestamps (defaults to 100.0)
+			recorded_timestamps (bool):	give the samples their recorded timestamps instead of the time they are\
+										emitted (defaults to False)
+			chunk_size (int):			amount of datasets read at once from `.npy` and text files (defaults to 4096)
+			queue_size (int):			maximum amount of samples waiting in :meth:`stream_samples`\
+										(defaults to 4096)
+		"""
+		if speed is not None and speed <= 0:
+			raise ValueError(f"Speed must be positive or None, got {speed}")
+		self.file = file
+		self.speed = speed
+		self.start = start
+		self.end = end
+		self.loop = loop
+		self.rate = rate
+		self.recorded_timestamps = recorded_timestamps
+		self.chunk_size = chunk_size
+		self.queue_size = queue_size
+		self.instrumentation = None								# passed to the pipeline like Glove.instrumentation
+		self.metadata = {}										# description of the device (session files only)
+		self._stream_thread = None
+		self._stream_stop = None
+		self._stream_queue = None
+		self._pipeline = None
+
+	def _read_chunks(self):
+		"""
+		Reads the recording once.
+
+		Yields:
+			tuple:	(recorded timestamps of shape (n,), sensor values of shape (n, sensor_count))
+		"""
+		if self.file.endswith('.cg3s'):
+			with SessionReader(self.file) as reader:
+				self.metadata = reader.metadata
+				yield from reader.chunks(self.start, self.end)
+			return
+		if self.file.endswith('.npy'):
+			timestamps, values = load_recording(self.file)
+			first = 0 if self.start is None else np.searchsorted(timestamps, self.start, side='left')
+			last = len(timestamps) if self.end is None else np.searchsorted(timestamps, self.end, side='left')
+			for position in range(first, last, self.chunk_size):
+				stop = min(position + self.chunk_size, last)
+				yield timestamps[position:stop], values[position:stop]
+			return
+		# text file with one dataset "(v1, v2, ...)" per line, the timestamps are derived from the rate
+		with open(self.file) as file:
+			for number, lines in enumerate(iter(lambda: list(itertools.islice(file, self.chunk_size)), [])):
+				values = np.array([[int(value) for value in line.strip().strip('()').split(',')]
+								   for line in lines if line.strip()], dtype=np.uint8)
+				timestamps = (number * self.chunk_size + np.arange(len(values))) / self.rate
+				mask = np.ones(len(values), dtype=bool)
+				if self.start is not None:
+					mask &= timestamps >= self.start
+				if self.end is not None:
+					mask &= timestamps < self.end
+				if mask.any():
+					yield timestamps[mask], values[mask]
+
+	def _chunks(self):
+		"""
+		Reads the recording once or, if :attr:`loop` is set, repeatedly. The timestamps of every repetition\
+		continue after the previous one.
+
+		Yields:
+			tuple:	(timestamps of shape (n,), sensor values of shape (n, sensor_count))
+		"""
+		offset = 0.0
+		while True:
+			first = last = interval = None
+			for timestamps, values in self._read_chunks():
+				if len(timestamps) == 0:
+					continue
+				if first is None:
+					first = timestamps[0]
+				if len(timestamps) > 1:
+					interval = timestamps[-1] - timestamps[-2]
+				last = timestamps[-1]
+				yield timestamps + offset, values
+			if not self.loop or first is None:
+				return
+			offset += last - first + (interval or 1.0 / self.rate)
+
+	def samples(self, stop_event=None):
+		"""
+		Replays the recording in the calling thread.
+
+		Args:
+			stop_event (threading.Event):	Event to end the replay (defaults to None)
+		Yields:
+			Sample:	(emission time or recorded timestamp, dataset, sequence number, None)
+		"""
+		sequence = 0
+		origin = None												# (emission time, recorded time) of the first sample
+		speed = self.speed
+		for timestamps, values in self._chunks():
+			for timestamp, dataset in zip(timestamps.tolist(), values.tolist()):
+				if speed is not None:
+					if origin is None:
+						origin = (time.monotonic(), timestamp)
+					delay = origin[0] + (timestamp - origin[1]) / speed - time.monotonic()
+					if delay > 0:									# ahead of schedule: wait (behind it, emit without waiting)
+						if stop_event is None:
+							time.sleep(delay)
+						elif stop_event.wait(delay):
+							return
+				if stop_event is not None and stop_event.is_set():
+					return
+				yield Sample(timestamp if self.recorded_timestamps else time.monotonic(), tuple(dataset), sequence)
+				sequence += 1
+
+	def poll_samples(self):
+		"""
+		Replays the recording in the calling thread (see :meth:`samples`), the counterpart of `Glove.poll_samples`.
+
+		Yields:
+			Sample:	(emission time or recorded timestamp, dataset, sequence number, None)
+		"""
+		return self.samples()
+
+	def poll_datasets(self):
+		"""
+		Replays the datasets of the recording in the calling thread.
+
+		Yields:
+			tuple:	dataset consisting of 22 values between 1 and 255
+		"""
+		for sample in self.samples():
+			yield sample.values
+
+	def _thread_stream_data(self, stop_event, callback):
+		"""
+		Helper function to replay the recording. Executed in a thread. Every sample is passed to the callback or,\
+		if no callback is given, put into the queue read by :meth:`stream_samples`.
+
+		Args:
+			stop_event (threading.Event):	Event to stop the thread
+			callback (callable):			function called with every sample or None
+		"""
+		try:
+			for sample in self.samples(stop_event):
+				if callback is not None:
+					callback(sample)
+					continue
+				while True:											# the queue is bounded, replaying may be faster than reading
+					try:
+						self._stream_queue.put(sample, timeout=0.1)
+						break
+					except queue.Full:
+						if stop_event.is_set():
+							return
+		except Exception as msg:									# e.g. unreadable files
+			sys.stderr.write('ERROR: {}\n'.format(msg))
+		finally:
+			while True:												# tell the consumers that no more samples will follow
+				try:
+					self._stream_queue.put(None, timeout=0.1)
+					break
+				except queue.Full:
+					if stop_event.is_set():							# nobody reads anymore, make room for the end
+						try:
+							self._stream_queue.get_nowait()
+						except queue.Empty:
+							pass
+
+	def start_streaming(self, callback=None):
+		"""
+		Starts a thread replaying the recording. The samples are either passed to the given callback (called from\
+		the replaying thread) or can be iterated with :meth:`stream_samples` or :meth:`stream_datasets`.
+
+		Args:
+			callback (callable):	function called with every :class:`Sample<cyberglove.frame_decoder.Sample>`\
+									(defaults to None)
+		Returns:
+			bool:	True if the replay was started
+		"""
+		if self._stream_thread is not None:
+			sys.stderr.write("Streaming was already started.\n")
+			return False
+		self._stream_queue = queue.Queue(self.queue_size)
+		self._stream_stop = threading.Event()
+		self._stream_thread = threading.Thread(target=self._thread_stream_data, args=(self._stream_stop, callback))
+		self._stream_thread.start()
+		return True
+
+	def stop_streaming(self):
+		"""
+		Stops the replaying thread. Samples which were not yet taken from :meth:`stream_samples` are discarded.
+		"""
+		if self._stream_thread is None:
+			sys.stderr.write("Streaming was not started.\n")
+			return
+		self._stream_stop.set()
+		self._stream_thread.join()
+		self._stream_thread = None
+
+	def wait(self, timeout=None):
+		"""
+		Waits until the recording was replayed completely (only ends if :attr:`loop` is not set).
+
+		Args:
+			timeout (float):	maximum time to wait in seconds (defaults to None, i.e. no limit)
+		"""
+		if self._stream_thread is not None:
+			self._stream_thread.join(timeout)
+
+	def stream_samples(self):
+		"""
+		Iterates over the replayed samples (see :meth:`start_streaming`).
+		The iteration ends when the recording is finished or the streaming is stopped.
+
+		Yields:
+			Sample:	(emission time or recorded timestamp, dataset, sequence number, None)
+		"""
+		while True:
+			sample = self._stream_queue.get()
+			if sample is None:
+				return
+			yield sample
+
+	def stream_datasets(self):
+		"""
+		Iterates over the replayed datasets (see :meth:`start_streaming`).
+
+		Yields:
+			tuple:	dataset consisting of 22 values between 1 and 255
+		"""
+		for sample in self.stream_samples():
+			yield sample.values
+
+	def start_acquisition(self, consumers, maxsize=1024, policy=BLOCK, streaming=False):
+		"""
+		Passes the replayed samples to the given consumers like `Glove.start_acquisition`.
+
+		Args:
+			consumers (list):	callables, each called with every sample
+			maxsize (int):		maximum amount of queued samples per consumer (defaults to 1024)
+			policy (str):		behaviour when a queue is full: 'block', 'drop-oldest' or 'drop-newest'\
+								(defaults to 'block')
+			streaming (bool):	replay in a separate thread like the continuous-output mode (defaults to False)
+		Returns:
+			AcquisitionPipeline:	the running pipeline, which provides the queue statistics
+		"""
+		if self._pipeline is not None:
+			sys.stderr.write("Acquisition was already started.\n")
+			return self._pipeline
+		if streaming:
+			self.start_streaming()
+			source = self.stream_samples()
+		else:
+			source = self.poll_samples()
+		self._pipeline = AcquisitionPipeline(source, consumers, maxsize, policy, self.instrumentation)
+		self._pipeline.start()
+		return self._pipeline
+
+	def stop_acquisition(self):
+		"""
+		Stops the acquisition started with :meth:`start_acquisition` and waits until the consumers have processed\
+		all queued samples.
+
+		Returns:
+			list:	queue statistics of every consumer (see :meth:`SampleQueue.statistics`)
+		"""
+		if self._pipeline is None:
+			sys.stderr.write("Acquisition was not started.\n")
+			return []
+		if self._stream_thread is not None:
+			self.stop_streaming()									# ends the iteration of the source
+		self._pipeline.stop()
+		statistics = self._pipeline.statistics()
+		self._pipeline = None
+		return statistics
+
+	def join_acquisition(self):
+		"""
+		Waits until the whole recording was passed to the consumers (only ends if :attr:`loop` is not set).
+
+		Returns:
+			list:	queue statistics of every consumer (see :meth:`SampleQueue.statistics`)
+		"""
+		if self._pipeline is None:
+			return []
+		self._pipeline.join()
+		return self.stop_acquisition()
@@ -0,0 +1,282 @@
+"""
+This module implements the classes `SessionWriter` and `SessionReader` for session files (`.cg3s`), which store the\
+datasets of the CyberGlove III in compressed chunks together with the metadata of the device and an index of the\
+time range of every chunk, so any time range of a long session is read without reading the whole file.
+
+Layout of a session file (all numbers little-endian):
+
+	header:		b'CG3S', format version (uint16), length of the metadata (uint32), metadata (JSON, UTF-8)
+	chunk:		compressed length (uint32), amount of datasets n (uint32), first and last timestamp (float64),\
+				zlib-compressed columns: the 8 bytes of the float64 timestamps as (8, n) array, followed by the\
+				sensor values as (sensor_count, n) array
+	...
+	index:		offset (uint64), amount of datasets (uint32), first and last timestamp (float64) of every chunk
+	trailer:	offset of the index (uint64), amount of chunks (uint32), b'CG3I'
+
+Storing the bytes column-wise puts similar bytes next to each other (e.g. the slowly changing values of one sensor),\
+which roughly halves the size compared to compressing the records.
+The index is written when the file is closed. If a recording is aborted, the reader rebuilds the index from the\
+chunk headers, so all completely written chunks remain readable.
+"""
+
+import json
+import time
+import zlib
+import struct
+import numpy as np
+from frame_decoder import SENSOR_COUNT, Sample
+
+
+MAGIC = b'CG3S'
+INDEX_MAGIC = b'CG3I'
+FORMAT_VERSION = 1
+_HEADER = struct.Struct('<4sHI')
+_CHUNK_HEADER = struct.Struct('<IIdd')
+_TRAILER = struct.Struct('<QI4s')
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('count', '<u4'), ('start', '<f8'), ('end', '<f8')])
+
+
+class SessionWriter:
+	"""
+	The class :class:`SessionWriter<cyberglove.session_file.SessionWriter>` collects datasets in preallocated\
+	columns like :class:`Recorder<cyberglove.recorder.Recorder>` and appends every full chunk compressed to the file.
+	It has the same interface as the recorder, so it can be used by `Glove.write_continuous_datasets`.
+	"""
+	def __init__(self, file: str, sensor_count=SENSOR_COUNT, metadata=None, chunk_size=4096, level=6):
+		"""
+		Args:
+			file (str):			path to the file to write to (should end with '.cg3s')
+			sensor_count (int):	amount of sensor values in one dataset (defaults to 22)
+			metadata (dict):	description of the device and session, e.g. from `Glove.get_device_description`,\
+								stored as JSON (defaults to None)
+			chunk_size (int):	amount of datasets per chunk (defaults to 4096)
+			level (int):		zlib compression level from 0 to 9 (defaults to 6)
+		"""
+		self.metadata = dict(metadata or {}, sensor_count=sensor_count)
+		self.metadata.setdefault('created', time.strftime('%Y-%m-%dT%H:%M:%S'))
+		self.level = level
+		self._values = np.empty((chunk_size, sensor_count), dtype=np.uint8)
+		self._timestamps = np.empty(chunk_size, dtype='<f8')
+		self._fill = 0												# amount of datasets in the chunk
+		self.length = 0												# amount of datasets written to the file
+		self._index = []
+		self._fp = open(file, 'wb')
+		encoded = json.dumps(self.metadata).encode()
+		self._fp.write(_HEADER.pack(MAGIC, FORMAT_VERSION, len(encoded)) + encoded)
+
+	def append(self, dataset, timestamp=None):
+		"""
+		Adds one dataset to the session.
+
+		Args:
+			dataset (tuple):	sensor values between 1 and 255
+			timestamp (float):	time of the dataset in seconds (defaults to `time.monotonic()`)
+		"""
+		self._values[self._fill] = dataset
+		self._timestamps[self._fill] = time.monotonic() if timestamp is None else timestamp
+		self._fill += 1
+		if self._fill == len(self._timestamps):
+			self.flush()
+
+	def flush(self):
+		"""
+		Compresses the collected datasets and writes them to the file as one chunk.
+		"""
+		if self._fill == 0:
+			return
+		timestamps = self._timestamps[:self._fill]
+		columns = timestamps.view(np.uint8).reshape(self._fill, 8).T.tobytes() + self._values[:self._fill].T.tobytes()
+		compressed = zlib.compress(columns, self.level)
+		start, end = float(timestamps[0]), float(timestamps[-1])
+		self._index.append((self._fp.tell(), self._fill, start, end))
+		self._fp.write(_CHUNK_HEADER.pack(len(compressed), self._fill, start, end))
+		self._fp.write(compressed)
+		self._fp.flush()
+		self.length += self._fill
+		self._fill = 0
+
+	def close(self):
+		"""
+		Writes the remaining datasets and the index and closes the file.
+		"""
+		if self._fp.closed:
+			return
+		self.flush()
+		index_offset = self._fp.tell()
+		self._fp.write(np.array(self._index, dtype=INDEX_DTYPE).tobytes())
+		self._fp.write(_TRAILER.pack(index_offset, len(self._index), INDEX_MAGIC))
+		self._fp.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+
+class SessionReader:
+	"""
+	The class :class:`SessionReader<cyberglove.session_file.SessionReader>` reads session files written by\
+	:class:`SessionWriter`. Only the header and the index are read when opening; the chunks are read, decompressed\
+	and yielded one at a time, so the memory needed does not depend on the length of the session.
+	"""
+	def __init__(self, file: str):
+		"""
+		Args:
+			file (str):	path to the session file
+		Raises:
+			ValueError:	if the file is not a session file
+		"""
+		self._fp = open(file, 'rb')
+		magic, version, metadata_length = _HEADER.unpack(self._fp.read(_HEADER.size))
+		if magic != MAGIC:
+			self._fp.close()
+			raise ValueError(f"{file} is not a session file")
+		if version > FORMAT_VERSION:
+			self._fp.close()
+			raise ValueError(f"{file} has the unsupported format version {version}")
+		self.metadata = json.loads(self._fp.read(metadata_length).decode())
+		self._data_offset = self._fp.tell()
+		self.index = self._read_index()
+
+	def _read_index(self):
+		"""
+		Reads the index from the end of the file or, if the file was not closed properly, rebuilds it from the\
+		chunk headers.
+
+		Returns:
+			numpy.ndarray:	offset, count, start and end of every chunk (:data:`INDEX_DTYPE`)
+		"""
+		size = self._fp.seek(0, 2)
+		if size - self._data_offset >= _TRAILER.size:
+			self._fp.seek(size - _TRAILER.size)
+			index_offset, chunk_count, magic = _TRAILER.unpack(self._fp.read(_TRAILER.size))
+			if magic == INDEX_MAGIC and index_offset + chunk_count * INDEX_DTYPE.itemsize + _TRAILER.size == size:
+				self._fp.seek(index_offset)
+				return np.frombuffer(self._fp.read(chunk_count * INDEX_DTYPE.itemsize), dtype=INDEX_DTYPE)
+		entries = []
+		offset = self._data_offset
+		while offset + _CHUNK_HEADER.size <= size:
+			self._fp.seek(offset)
+			compressed_length, count, start, end = _CHUNK_HEADER.unpack(self._fp.read(_CHUNK_HEADER.size))
+			if offset + _CHUNK_HEADER.size + compressed_length > size:		# chunk was not written completely
+				break
+			entries.append((offset, count, start, end))
+			offset += _CHUNK_HEADER.size + compressed_length
+		return np.array(entries, dtype=INDEX_DTYPE)
+
+	def __len__(self):
+		return int(self.index['count'].sum())
+
+	@property
+	def start(self):
+		"""
+		float: timestamp of the first dataset (None if the session is empty)
+		"""
+		return float(self.index['start'][0]) if len(self.index) else None
+
+	@property
+	def end(self):
+		"""
+		float: timestamp of the last dataset (None if the session is empty)
+		"""
+		return float(self.index['end'][-1]) if len(self.index) else None
+
+	def _read_chunk(self, entry):
+		"""
+		Reads and decompresses one chunk.
+
+		Args:
+			entry:	entry of the index
+		Returns:
+			tuple:	(timestamps as float64 array of shape (n,), sensor values as uint8 array of shape (n, sensor_count))
+		"""
+		self._fp.seek(int(entry['offset']))
+		compressed_length, count, _, _ = _CHUNK_HEADER.unpack(self._fp.read(_CHUNK_HEADER.size))
+		columns = np.frombuffer(zlib.decompress(self._fp.read(compressed_length)), dtype=np.uint8)
+		timestamps = columns[:8 * count].reshape(8, count).T.copy().view('<f8')[:, 0]
+		values = columns[8 * count:].reshape(-1, count).T
+		return timestamps, values
+
+	def chunks(self, start=None, end=None):
+		"""
+		Yields the datasets chunk by chunk. Only the chunks overlapping the time range are read.
+
+		Args:
+			start (float):	first timestamp to include (defaults to the beginning of the session)
+			end (float):	first timestamp to exclude (defaults to the end of the session)
+		Yields:
+			tuple:	(timestamps as float64 array of shape (n,), sensor values as uint8 array of shape (n, sensor_count))
+		"""
+		index = self.index
+		first = 0 if start is None else int(np.searchsorted(index['end'], start, side='left'))
+		last = len(index) if end is None else int(np.searchsorted(index['start'], end, side='left'))
+		for entry in index[first:last]:
+			timestamps, values = self._read_chunk(entry)
+			if (start is not None and timestamps[0] < start) or (end is not None and timestamps[-1] >= end):
+				lower = 0 if start is None else np.searchsorted(timestamps, start, side='left')
+				upper = len(timestamps) if end is None else np.searchsorted(timestamps, end, side='left')
+				timestamps, values = timestamps[lower:upper], values[lower:upper]
+			if len(timestamps):
+				yield timestamps, values
+
+	def read(self, start=None, end=None):
+		"""
+		Reads the datasets of a time range into memory.
+
+		Args:
+			start (float):	first timestamp to include (defaults to the beginning of the session)
+			end (float):	first timestamp to exclude (defaults to the end of the session)
+		Returns:
+			tuple:	(timestamps as float64 array of shape (n,), sensor values as uint8 array of shape (n, sensor_count))
+		"""
+		timestamps, values = [], []
+		for chunk_timestamps, chunk_values in self.chunks(start, end):
+			timestamps.append(chunk_timestamps)
+			values.append(chunk_values)
+		if not timestamps:
+			return np.empty(0), np.empty((0, self.metadata['sensor_count']), dtype=np.uint8)
+		return np.concatenate(timestamps), np.concatenate(values)
+
+	def samples(self, start=None, end=None):
+		"""
+		Yields the datasets of a time range one by one.
+
+		Args:
+			start (float):	first timestamp to include (defaults to the beginning of the session)
+			end (float):	first timestamp to exclude (defaults to the end of the session)
+		Yields:
+			Sample:	recorded timestamp, dataset and its position in the yielded sequence
+		"""
+		sequence = 0
+		for timestamps, values in self.chunks(start, end):
+			for timestamp, dataset in zip(timestamps.tolist(), values.tolist()):
+				yield Sample(timestamp, tuple(dataset), sequence)
+				sequence += 1
+
+	def close(self):
+		"""
+		Closes the file.
+		"""
+		self._fp.close()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+
+def load_session(file: str, start=None, end=None):
+	"""
+	Reads the datasets of a time range of a session file, the counterpart of `recorder.load_recording`.
+
+	Args:
+		file (str):		path to the session file
+		start (float):	first timestamp to include (defaults to the beginning of the session)
+		end (float):	first timestamp to exclude (defaults to the end of the session)
+	Returns:
+		tuple:	(timestamps as float64 array of shape (n,), sensor values as uint8 array of shape (n, sensor_count))
+	"""
+	with SessionReader(file) as reader:
+		return reader.read(start, end)
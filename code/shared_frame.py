@@ -0,0 +1,275 @@
+"""
+This module implements the classes `FramePublisher` and `FrameReader`, which share the received datasets (and\
+optionally the calibrated joint angles) of one glove with any number of local processes via\
+`multiprocessing.shared_memory`. Only the process owning the `Glove` publishes; readers attach by name and read the\
+latest frame or a window of recent frames without pickling and without sockets.
+
+The shared memory contains a header and a ring of slots. Every slot is protected by a sequence lock: the publisher\
+makes the lock counter odd before writing the slot and even afterwards, a reader retries if the counter was odd or\
+changed while it copied the slot. The ring is mirrored (every frame is written to slot i and slot i + slots), so any\
+window of recent frames is one contiguous array that can be viewed without copying.
+"""
+
+import time
+from typing import NamedTuple
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+from frame_decoder import SENSOR_COUNT
+
+
+MAGIC = 0x43473346										# 'CG3F'
+FORMAT_VERSION = 1
+HEADER_SIZE = 64
+_HEADER_DTYPE = np.dtype([('magic', '<u4'), ('version', '<u4'), ('slots', '<u4'), ('sensor_count', '<u4'),
+						  ('angle_count', '<u4'), ('reserved', '<u4'), ('count', '<u8')])
+
+
+def slot_dtype(sensor_count=SENSOR_COUNT, angle_count=0):
+	"""
+	Returns the data type of one slot of the ring.
+
+	Args:
+		sensor_count (int):	amount of sensor values in one dataset (defaults to 22)
+		angle_count (int):	amount of joint angles in one frame (defaults to 0)
+	Returns:
+		numpy.dtype:	structured data type with the fields 'lock', 'timestamp', 'sequence', 'angles' and 'values'
+	"""
+	return np.dtype([('lock', '<u8'), ('timestamp', '<f8'), ('sequence', '<u8'), ('angles', '<f8', (angle_count,)),
+					 ('values', 'u1', (sensor_count,))], align=True)
+
+
+def _views(buffer):
+	"""
+	Creates the numpy views of the header and the (mirrored) ring of a shared memory block.
+
+	Args:
+		buffer (memoryview):	buffer of the shared memory
+	Returns:
+		tuple:	(header of shape (), ring of shape (2 * slots,))
+	"""
+	header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=buffer)
+	if header['magic'] != MAGIC or header['version'] != FORMAT_VERSION:
+		raise ValueError("Shared memory does not contain glove frames")
+	dtype = slot_dtype(int(header['sensor_count']), int(header['angle_count']))
+	ring = np.ndarray((2 * int(header['slots']),), dtype=dtype, buffer=buffer, offset=HEADER_SIZE)
+	return header, ring
+
+
+class Frame(NamedTuple):
+	"""
+	One frame copied out of the shared memory.
+	"""
+	timestamp: float				# receive time of the dataset
+	values: np.ndarray				# sensor values
+	angles: np.ndarray				# joint angles (empty if none are published)
+	sequence: int					# sequence number of the sample
+	count: int						# number of the frame since the publisher was created (starting at 1)
+
+
+class FrameWindow(NamedTuple):
+	"""
+	Views of recent frames in the shared memory (not copied, see :meth:`FrameReader.window`).
+	"""
+	timestamps: np.ndarray			# receive times of shape (n,)
+	values: np.ndarray				# sensor values of shape (n, sensor_count)
+	angles: np.ndarray				# joint angles of shape (n, angle_count)
+	first: int						# number of the first frame of the window
+	last: int						# number of the last frame of the window
+
+
+class FramePublisher:
+	"""
+	The class :class:`FramePublisher<cyberglove.shared_frame.FramePublisher>` creates the shared memory and writes\
+	every sample into it. An instance is called with every :class:`Sample<cyberglove.frame_decoder.Sample>`, so it\
+	can be passed as callback to `Glove.start_streaming` or as consumer to `Glove.start_acquisition`:
+
+		with FramePublisher("glove_right", model=model) as publisher:
+			gl.start_streaming(callback=publisher)
+
+	There must only be one publisher per shared memory block.
+	"""
+	def __init__(self, name=None, slots=1024, sensor_count=SENSOR_COUNT, model=None):
+		"""
+		Args:
+			name (str):					name of the shared memory, which the readers attach to (defaults to a\
+										generated name, see :attr:`name`)
+			slots (int):				amount of recent frames kept (defaults to 1024)
+			sensor_count (int):			amount of sensor values in one dataset (defaults to 22)
+			model (CalibrationModel):	calibration converting the sensor values into published joint angles\
+										(defaults to None, i.e. only the sensor values are published)
+		"""
+		self.model = model
+		angle_count = 0 if model is None else len(model.joints)
+		dtype = slot_dtype(sensor_count, angle_count)
+		self._shm = shared_memory.SharedMemory(name=name, create=True, size=HEADER_SIZE + 2 * slots * dtype.itemsize)
+		header = np.ndarray((), dtype=_HEADER_DTYPE, buffer=self._shm.buf)
+		header['slots'], header['sensor_count'], header['angle_count'] = slots, sensor_count, angle_count
+		header['count'] = 0
+		header['version'] = FORMAT_VERSION
+		header['magic'] = MAGIC										# written last: the block is initialized
+		self._header, self._ring = _views(self._shm.buf)
+		self.slots = slots
+		self._count = 0
+		self._angles = np.empty(angle_count)						# output of the model, reused for every frame
+
+	@property
+	def name(self):
+		"""
+		str: name of the shared memory
+		"""
+		return self._shm.name
+
+	def publish(self, timestamp, values, sequence=0, angles=None):
+		"""
+		Writes one frame into the ring.
+
+		Args:
+			timestamp (float):	receive time of the dataset
+			values (tuple):		sensor values
+			sequence (int):		sequence number of the sample (defaults to 0)
+			angles (array):		joint angles (defaults to the angles computed by the model, if any)
+		"""
+		if angles is None and self.model is not None:
+			angles = self.model.apply(np.asarray(values), out=self._angles)
+		count = self._count + 1
+		index = (count - 1) % self.slots
+		for slot in (self._ring[index], self._ring[index + self.slots]):
+			slot['lock'] = 2 * count - 1							# odd: the slot is being written
+			slot['timestamp'] = timestamp
+			slot['sequence'] = sequence
+			slot['values'] = values
+			if angles is not None:
+				slot['angles'] = angles
+			slot['lock'] = 2 * count								# even: the slot is consistent
+		self._header['count'] = count
+		self._count = count
+
+	def __call__(self, sample):
+		"""
+		Publishes a sample.
+
+		Args:
+			sample (Sample):	received sample
+		"""
+		self.publish(sample.timestamp, sample.values, sample.sequence)
+
+	def close(self):
+		"""
+		Releases and removes the shared memory. Attached readers keep their mapping until they close.
+		"""
+		if self._shm is None:
+			return
+		self._header = self._ring = None							# release the views of the buffer
+		self._shm.close()
+		# a reader sharing the resource tracker of this process (e.g. a forked child) may have unregistered the\
+		# block, register it again (the tracker keeps a set of names), so unlinking unregisters it without error
+		resource_tracker.register(self._shm._name, 'shared_memory')
+		self._shm.unlink()
+		self._shm = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
+
+
+class FrameReader:
+	"""
+	The class :class:`FrameReader<cyberglove.shared_frame.FrameReader>` attaches to the shared memory of a\
+	:class:`FramePublisher` and reads frames without blocking the publisher.
+	"""
+	def __init__(self, name):
+		"""
+		Args:
+			name (str):	name of the shared memory (see :attr:`FramePublisher.name`)
+		"""
+		try:
+			self._shm = shared_memory.SharedMemory(name=name, track=False)
+		except TypeError:
+			# Python < 3.13 registers the block with the resource tracker, which removes it when this process exits\
+			# although the publisher still uses it
+			self._shm = shared_memory.SharedMemory(name=name)
+			resource_tracker.unregister(self._shm._name, 'shared_memory')
+		self._header, self._ring = _views(self._shm.buf)
+		self.slots = int(self._header['slots'])
+		self.sensor_count = int(self._header['sensor_count'])
+		self.angle_count = int(self._header['angle_count'])
+
+	@property
+	def count(self):
+		"""
+		int: amount of frames published so far, changes when a new frame is available
+		"""
+		return int(self._header['count'])
+
+	def latest(self, retries=100):
+		"""
+		Copies the most recent frame.
+
+		Args:
+			retries (int):	maximum attempts if the publisher overwrites the slot while it is copied (defaults to 100)
+		Returns:
+			Frame:	the most recent frame or None if no frame was published yet
+		Raises:
+			RuntimeError:	if no consistent copy was obtained
+		"""
+		for _ in range(retries):
+			count = self.count
+			if count == 0:
+				return None
+			slot = self._ring[(count - 1) % self.slots]
+			lock = int(slot['lock'])
+			if lock % 2 == 0:
+				frame = Frame(float(slot['timestamp']), slot['values'].copy(), slot['angles'].copy(),
+							  int(slot['sequence']), lock // 2)
+				if int(slot['lock']) == lock:						# not overwritten while copying
+					return frame
+			time.sleep(0)											# let the publisher finish the slot
+		raise RuntimeError("No consistent frame could be read")
+
+	def window(self, length):
+		"""
+		Returns views of the most recent frames. The views are not copied, so the publisher keeps overwriting them:\
+		use the data within `slots - length` frames or check it afterwards with :meth:`intact`.
+
+		Args:
+			length (int):	amount of frames, at most `slots`
+		Returns:
+			FrameWindow:	views of the frames (fewer if fewer were published)
+		"""
+		if not 0 < length <= self.slots:
+			raise ValueError(f"Window length must be between 1 and {self.slots}, got {length}")
+		count = self.count
+		length = min(length, count)
+		end = (count - 1) % self.slots + self.slots + 1				# mirrored ring: the window is contiguous
+		slots = self._ring[end - length:end]
+		return FrameWindow(slots['timestamp'], slots['values'], slots['angles'], count - length + 1, count)
+
+	def intact(self, window):
+		"""
+		Checks whether the frames of a window were still unchanged (e.g. after computing with its views).
+
+		Args:
+			window (FrameWindow):	window returned by :meth:`window`
+		Returns:
+			bool:	True if none of its frames was overwritten
+		"""
+		# the frame being written may overwrite the oldest frame of a full window
+		return self.count + 1 - window.first < self.slots
+
+	def close(self):
+		"""
+		Detaches from the shared memory. Views returned by :meth:`window` must not be used afterwards.
+		"""
+		if self._shm is None:
+			return
+		self._header = self._ring = None
+		self._shm.close()
+		self._shm = None
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, exc_type, exc_value, traceback):
+		self.close()
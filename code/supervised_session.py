@@ -0,0 +1,261 @@
+"""
+This module implements the class `SupervisedSession`, which keeps an acquisition running while the CyberGlove III\
+drops off the wireless network. The listening socket stays open for the whole session and the description of the\
+device is queried only once at the first connection, so a reconnecting glove is accepted and its datasets are\
+received again without any further round trips. Every outage is reported as `Gap` between the samples.
+"""
+
+import sys
+import time
+import socket
+import threading
+from typing import NamedTuple
+from glove import Glove, STREAM_START_COMMAND, STREAM_STOP_COMMAND
+from acquisition import AcquisitionPipeline, BLOCK
+
+
+class Gap(NamedTuple):
+	"""
+	An outage of the connection within the samples of a :class:`SupervisedSession`.
+	"""
+	start: float							# receive time of the last sample before the outage
+	end: float								# receive time of the first sample after the outage
+	lost_samples: int						# amount of datasets the glove would have sent in between (estimated)
+	sequence: int							# sequence number of the first sample after the outage
+
+
+class SupervisedSession:
+	"""
+	The class :class:`SupervisedSession<cyberglove.supervised_session.SupervisedSession>` receives the datasets of\
+	a :class:`Glove<cyberglove.glove.Glove>` and reconnects it automatically. The connection counts as lost if the\
+	socket fails or no dataset arrived for `stall_timeout` seconds (a glove leaving the wireless network often does\
+	not close the connection). The samples and the :class:`Gap` of every outage are yielded in the order they\
+	occurred by :meth:`samples`, so the loop has to distinguish them (:meth:`start_acquisition` passes the gaps to\
+	a separate callback instead):
+
+		session = SupervisedSession()
+		session.connect("192.168.1.2")
+		for item in session.samples():
+			if isinstance(item, Gap):
+				...
+	"""
+	def __init__(self, glove=None, streaming=True, stall_timeout=1.0, rate=None, reconnect_timeout=None):
+		"""
+		Args:
+			glove (Glove):				glove to supervise (defaults to a new instance)
+			streaming (bool):			use the continuous-output mode instead of requesting every dataset\
+										(defaults to True)
+			stall_timeout (float):		seconds without datasets after which the connection counts as lost\
+										(defaults to 1.0)
+			rate (float):				sample rate to estimate the lost datasets of a gap (defaults to None, i.e.\
+										the rate measured before the outage)
+			reconnect_timeout (float):	seconds to wait for the glove to reconnect before the session ends\
+										(defaults to None, i.e. wait until stopped)
+		"""
+		self.glove = Glove() if glove is None else glove
+		self.streaming = streaming
+		self.stall_timeout = stall_timeout
+		self.rate = rate
+		self.reconnect_timeout = reconnect_timeout
+		self.description = None									# device description of the first connection
+		self.gaps = []											# all outages of the session
+		self._server = None
+		self._interval = None									# mean interval between the samples before the last outage
+		self._stop = threading.Event()
+		self._pipeline = None
+
+	def connect(self, ip_address_pc, localport=49500):
+		"""
+		Opens the listening socket, waits until the glove connects and queries its description.
+
+		Args:
+			ip_address_pc (str):	IP address of the computer to verify (e.g. "192.168.1.2")
+			localport (int):		port to open (defaults to 49500)
+		Returns:
+			bool:	True if glove has connected successfully
+		"""
+		if not self.glove._is_local_address(ip_address_pc):
+			print("Your glove can not be connected.")
+			print(f"Make sure you are connected with the network and check if your IP-address is {ip_address_pc}.")
+			return False
+		if self._server is None:
+			self._server = self.glove._listen(localport)
+		print(f"Waiting for connection on port {localport}...")
+		print("Please switch on your CyberGlove\n")
+		self._stop.clear()
+		if not self.glove._accept(self._server, self._stop):
+			return False
+		self.description = self.glove.get_device_description(refresh=True)
+		return True
+
+	def _reconnect(self):
+		"""
+		Closes the lost connection and waits until the glove connects again.
+
+		Returns:
+			bool:	True if the glove has reconnected, False if the session was stopped or the timeout expired
+		"""
+		if self.glove.client_socket is not None:
+			self.glove.client_socket.close()
+			self.glove.client_socket = None
+		self.glove.decoder.clear()									# discard the incomplete dataset
+		end = None if self.reconnect_timeout is None else time.monotonic() + self.reconnect_timeout
+		while not self._stop.is_set():
+			remaining = None if end is None else end - time.monotonic()
+			if remaining is not None and remaining <= 0:
+				sys.stderr.write(f"ERROR: glove did not reconnect within {self.reconnect_timeout} s\n")
+				return False
+			if self.glove._accept(self._server, self._stop, remaining):	# retried after a wrong confirmation
+				return True
+		return False
+
+	def _receive_samples(self):
+		"""
+		Receives the datasets of the current connection until the session is stopped.
+
+		Yields:
+			Sample:	(receive time, dataset consisting of 22 values between 1 and 255, sequence number, request time)
+		Raises:
+			socket.error:	if the connection failed or stalled
+		"""
+		glove = self.glove
+		if not self.streaming:
+			glove.client_socket.settimeout(self.stall_timeout)
+			while not self._stop.is_set():
+				yield glove.get_one_sample()
+			glove.client_socket.settimeout(None)
+			return
+		glove.client_socket.settimeout(0.1)						# check the stop event ten times a second
+		glove.client_socket.send(bytes(STREAM_START_COMMAND, 'ascii'))
+		last_received = time.monotonic()
+		while not self._stop.is_set():
+			try:
+				glove._receive()
+			except socket.timeout:
+				if time.monotonic() - last_received > self.stall_timeout:
+					raise socket.timeout(f"No dataset received for {self.stall_timeout} s")
+				continue
+			last_received = time.monotonic()
+			for frame in glove.decoder.frames():
+				yield glove._sample(frame)
+		glove.client_socket.send(bytes(STREAM_STOP_COMMAND, 'ascii'))
+		glove.flush()
+
+	def _gap(self, start, sample):
+		"""
+		Creates the gap between the last sample before an outage and the first sample after it.
+
+		Args:
+			start (float):		receive time of the last sample before the outage
+			sample (Sample):	first sample after the outage
+		Returns:
+			Gap:	the outage
+		"""
+		interval = 1.0 / self.rate if self.rate else self._interval
+		lost = max(0, round((sample.timestamp - start) / interval) - 1) if interval else 0
+		gap = Gap(start, sample.timestamp, lost, sample.sequence)
+		self.gaps.append(gap)
+		return gap
+
+	def samples(self):
+		"""
+		Receives the datasets of the glove in the calling thread and reconnects it whenever the connection is lost.
+		The iteration ends when the session is stopped (see :meth:`stop`, until the next :meth:`connect` or\
+		:meth:`start_acquisition`) or the glove does not reconnect within `reconnect_timeout`.
+
+		Yields:
+			Sample or Gap:	every received sample, preceded by a :class:`Gap` after every outage
+		"""
+		if self.glove.client_socket is None:
+			sys.stderr.write("Error: No glove connected\n")
+			return
+		first = last = None											# receive times of the samples of the connection
+		count = 0													# amount of samples of the connection
+		outage = None												# receive time of the last sample before the outage
+		while True:
+			try:
+				for sample in self._receive_samples():
+					if outage is not None:
+						yield self._gap(outage, sample)
+						outage = None
+					if count == 0:
+						first = sample.timestamp
+					last = sample.timestamp
+					count += 1
+					yield sample
+				return
+			except socket.error as msg:								# disconnected, switched off or out of range
+				sys.stderr.write(f"WARNING: connection to the glove lost ({msg}), waiting for it to reconnect\n")
+				if count > 1:										# mean interval of the lost connection
+					self._interval = (last - first) / (count - 1)
+				count = 0
+				if outage is None:
+					outage = time.monotonic() if last is None else last
+				if not self._reconnect():
+					return
+
+	def start_acquisition(self, consumers, maxsize=1024, policy=BLOCK, on_gap=None):
+		"""
+		Passes the samples to the given consumers like `Glove.start_acquisition`, the samples are received in a\
+		separate thread. The consumers only receive samples, so any consumer of `Glove` (e.g. a `FramePublisher`)\
+		can be used; the outages are passed to `on_gap` and collected in :attr:`gaps`.
+
+		Args:
+			consumers (list):	callables, each called with every sample
+			maxsize (int):		maximum amount of queued items per consumer (defaults to 1024)
+			policy (str):		behaviour when a queue is full: 'block', 'drop-oldest' or 'drop-newest'\
+								(defaults to 'block')
+			on_gap (callable):	function called with every :class:`Gap` from the receiving thread, e.g. to mark the\
+								outage in a recording (defaults to None)
+		Returns:
+			AcquisitionPipeline:	the running pipeline, which provides the queue statistics
+		"""
+		if self._pipeline is not None:
+			sys.stderr.write("Acquisition was already started.\n")
+			return self._pipeline
+		self._stop.clear()
+
+		def samples():
+			for item in self.samples():
+				if not isinstance(item, Gap):
+					yield item
+				elif on_gap is not None:
+					on_gap(item)
+
+		self._pipeline = AcquisitionPipeline(samples(), consumers, maxsize, policy, self.glove.instrumentation)
+		self._pipeline.start()
+		return self._pipeline
+
+	def stop(self):
+		"""
+		Ends the iteration of :meth:`samples`, also while waiting for the glove to reconnect.
+		"""
+		self._stop.set()
+
+	def stop_acquisition(self):
+		"""
+		Stops the acquisition started with :meth:`start_acquisition` and waits until the consumers have processed\
+		all queued items.
+
+		Returns:
+			list:	queue statistics of every consumer (see :meth:`SampleQueue.statistics`)
+		"""
+		if self._pipeline is None:
+			sys.stderr.write("Acquisition was not started.\n")
+			return []
+		self.stop()
+		self._pipeline.stop()
+		statistics = self._pipeline.statistics()
+		self._pipeline = None
+		return statistics
+
+	def close(self):
+		"""
+		Stops the session and closes the connection and the listening socket.
+		"""
+		self.stop()
+		if self.glove.client_socket is not None:
+			self.glove.disconnect_glove()
+		if self._server is not None:
+			self._server.close()
+			self._server = None
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# the modules of the package are imported by their file names, like the examples in code/ do
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'code'))
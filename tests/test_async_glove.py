@@ -0,0 +1,75 @@
+import asyncio
+import socket
+from async_glove import GloveServer
+from emulator import GloveEmulator
+
+
+def free_port():
+	with socket.socket() as sock:
+		sock.bind(('127.0.0.1', 0))
+		return sock.getsockname()[1]
+
+
+def run_with_glove(test, **kwargs):
+	"""
+	Runs the coroutine function `test(glove, emulator)` with an `AsyncGlove` connected to an emulator.
+	"""
+	async def main():
+		port = free_port()
+		async with GloveServer(port, '127.0.0.1') as server:
+			emulator = GloveEmulator(port=port, seed=1, **kwargs)
+			emulator.start()
+			try:
+				glove = await asyncio.wait_for(server.accept(), 10)
+				await test(glove, emulator)
+			finally:
+				emulator.stop()
+
+	asyncio.run(main())
+
+
+def test_queries():
+	async def test(glove, emulator):
+		assert await glove.get_version_number() == (0, 3)
+		assert await glove.get_righthanded() is False
+		assert await glove.get_device_description() == {
+			'information': await glove.get_glove_information(), 'device_sensor_count': 22, 'righthanded': False,
+			'version': [0, 3]}
+
+	run_with_glove(test, segment_size=3, righthanded=False, version=(0, 3))
+
+
+def test_get_one_sample_with_corrupt_datasets():
+	async def test(glove, emulator):
+		for sequence in range(100):
+			sample = await glove.get_one_sample()
+			assert len(sample.values) == 22
+			assert sample.sequence == sequence
+		assert glove.decoder.answers == emulator.datasets_sent
+		assert len(await glove.get_one_dataset()) == 22
+
+	run_with_glove(test, corrupt_rate=0.2, segment_size=7)
+
+
+def test_query_after_break_of_stream():
+	async def test(glove, emulator):
+		count = 0
+		async for sample in glove.stream_samples():
+			count += 1
+			if count == 200:
+				break
+		assert await glove.get_version_number() == (1, 2)
+		assert await glove.get_righthanded() is True
+		assert len((await glove.get_one_sample()).values) == 22
+
+	run_with_glove(test, rate=None)
+
+
+def test_query_after_closing_stream():
+	async def test(glove, emulator):
+		datasets = glove.stream_datasets()
+		assert len(await datasets.__anext__()) == 22
+		await datasets.aclose()
+		assert await glove.get_version_number() == (1, 2)
+
+	run_with_glove(test, rate=None)
@@ -0,0 +1,94 @@
+import json
+import shutil
+import numpy as np
+import pytest
+from recorder import Recorder
+from calibration_cache import CalibrationCache
+from batch_calibration import calibrate_directory, calibrate_recording, pose_values
+
+
+FLEXION = (0, 30, 60)										# sensor values 50 + angle
+SEPARATION = [(0, 0, 0), (0, 30, 10), (0, 60, 40), (0, 30, 0), (0, 0, 30), (0, 60, 10), (0, 20, 50),
+			  (20, 0, 0), (20, 30, 30), (30, 50, 20)]		# separation angle and flexion of the sensors 5 and 8
+
+
+def record(directory, name='r1'):
+	"""
+	Writes a recording with its annotation: the flexion sensors follow 50 + angle, the separation sensor 10 follows\
+	50 + 2 * angle + 0.5 * (flexion 5 - flexion 8) and the thumb CMC sensor 3 follows 50 - 0.5 * roll.
+	"""
+	blocks = []
+
+	def pose(values, count=50):
+		start = len(blocks) * 0.5
+		blocks.append(np.tile(values, (count, 1)))
+		return {'start': start, 'end': start + 0.5}
+
+	poses = [dict(pose(np.full(22, 50 + angle)), angle=angle) for angle in FLEXION]
+	separation = []
+	for angle, left, right in SEPARATION:
+		values = np.full(22, 50)
+		values[[5, 8, 10]] = 50 + left, 50 + right, 50 + 2 * angle + (left - right) // 2
+		separation.append(dict(pose(values), angle=angle))
+	roll = np.arange(0, 50, 2)
+	values = np.full((len(roll), 22), 50)
+	values[:, 0], values[:, 3] = 50 + roll, 50 - roll // 2
+	thumb = pose(values, 2)
+	values = np.concatenate(blocks)
+	with Recorder(str(directory / f'{name}.npy')) as recorder:
+		for number, dataset in enumerate(values):
+			recorder.append(tuple(dataset), number * 0.01)
+	with open(directory / f'{name}.json', 'w') as file:
+		json.dump({'subject': 'S01', 'sensors': [0, 1], 'poses': poses,
+				   'separation': [{'sensor': 10, 'left': 5, 'right': 8, 'poses': separation}],
+				   'thumb': [{'sensor': 3, 'adjacent': 0, **thumb}]}, file)
+
+
+def rows_by_kind(rows):
+	return {(row['method'], row['kind'], row['sensor']): row for row in rows}
+
+
+def test_flexion_separation_and_thumb(tmp_path):
+	record(tmp_path)
+	rows = rows_by_kind(calibrate_recording(str(tmp_path / 'r1.npy'), str(tmp_path / 'r1.json')))
+	assert len(rows) == 3 * 2 + 2 + 1
+	for method in (1, 2, 3):
+		for sensor in (0, 1):
+			row = rows[method, 'flexion', sensor]
+			assert row['subject'] == 'S01' and row['recording'] == 'r1'
+			assert row['gain'] == pytest.approx(1) and row['offset'] == pytest.approx(-50)
+	row = rows[2, 'separation', 10]
+	assert row['gain'] == pytest.approx(0.5) and row['neutral'] == 50
+	np.testing.assert_allclose([row[f'c{k}'] for k in range(1, 6)], [-0.25, 0.25, 0, 0, 0], atol=1e-9)
+	assert 'offset' not in row
+	row = rows[3, 'separation', 10]
+	assert row['gain'] == pytest.approx(0.5) and row['offset'] == pytest.approx(-25)
+	assert row['c1'] == pytest.approx(-0.25) and row['c2'] == pytest.approx(0, abs=1e-9)
+	assert 'c3' not in row
+	row = rows[2, 'thumb', 3]
+	assert row['c1'] == pytest.approx(0.5) and row['neighbor_1'] == 0 and row['samples'] == 50
+
+
+def test_cache_hits(tmp_path):
+	record(tmp_path)
+	cache = CalibrationCache(str(tmp_path / 'cache'))
+	first = calibrate_directory(str(tmp_path), workers=1, cache=cache)
+	assert (cache.hits, cache.misses) == (0, 6)					# flexion of 3 methods, separation of 2, thumb
+	second = calibrate_directory(str(tmp_path), workers=1, cache=cache)
+	assert (cache.hits, cache.misses) == (6, 6)
+	assert second == first
+
+
+def test_process_pool_matches_one_process(tmp_path, capsys):
+	record(tmp_path, 'r1')
+	record(tmp_path, 'r2')
+	shutil.copy(tmp_path / 'r2.npy', tmp_path / 'r3.npy')		# not annotated
+	rows = calibrate_directory(str(tmp_path), workers=2)
+	assert rows == calibrate_directory(str(tmp_path), workers=1)
+	assert [row['recording'] for row in rows][::9] == ['r1', 'r2']
+	assert 'no annotation' in capsys.readouterr().err
+
+
+def test_pose_without_datasets():
+	with pytest.raises(ValueError):
+		pose_values(np.arange(10) * 0.01, np.zeros((10, 22)), [{'angle': 0, 'start': 1.0, 'end': 2.0}])
@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+import method_1
+import method_2
+import method_3
+from calibration import CalibrationModel
+
+
+def recording(n=500, seed=0):
+	return np.random.default_rng(seed).integers(1, 256, (n, 22), dtype=np.uint8)
+
+
+def test_affine_matches_method_1():
+	values = recording()
+	gain, offset = method_1.calibrate(s1=37, s2=135, a1=0, a2=35)
+	model = CalibrationModel()
+	model.add_affine('index_mcp', 5, gain, offset)
+	np.testing.assert_allclose(model.apply(values)[:, 0], method_1.calc_alpha(values[:, 5].astype(float), gain, offset))
+
+
+def test_method_2_joints():
+	values = recording()
+	s = values.astype(float)
+	neutral = s[0]
+	c_sep = (0.1, -0.2, 0.003, -0.002, 0.001)
+	model = CalibrationModel()
+	model.add_flexion('flexion', 3, 0.6, neutral[3])
+	model.add_separation('separation', 10, 5, 8, 0.4, c_sep, (neutral[10], neutral[5], neutral[8]))
+	model.add_thumb('thumb', 2, 0, 0.5, np.array([-0.3]), (neutral[2], neutral[0]))
+	relative = method_2.calc_s_rel(s, neutral)
+	expected = np.stack([
+		method_2.calc_theta(relative[:, 3], 0.6),
+		method_2.calc_phi(relative[:, 10], relative[:, 5], relative[:, 8], 0.4, *c_sep),
+		method_2.calc_psi(relative[:, 2], relative[:, 0], 0.5, -0.3),
+	], axis=-1)
+	np.testing.assert_allclose(model.apply(values), expected, rtol=1e-9, atol=1e-9)
+
+
+def test_separation_matches_method_3():
+	values = recording()
+	s = values.astype(float)
+	flexion_l, flexion_r = (0.98, -58.23), (1.28, -47.64)
+	model = CalibrationModel()
+	model.add_separation_method_3('separation', 10, 5, 8, 0.7, 0.01, -0.2, 3.0, flexion_l, flexion_r)
+	angle_l = method_3.calc_alpha(s[:, 5], *flexion_l)
+	angle_r = method_3.calc_alpha(s[:, 8], *flexion_r)
+	np.testing.assert_allclose(model.apply(values)[:, 0],
+							   method_3.calc_phi(s[:, 10], angle_l, angle_r, 0.7, 0.01, -0.2, 3.0), rtol=1e-9)
+
+
+def test_apply_in_chunks_and_single_dataset():
+	values = recording(1000)
+	model = CalibrationModel()
+	model.add_affine('a', 0, 0.5, -3.0)
+	model.add_separation('b', 10, 5, 8, 0.4, (0.1, -0.2, 0.003, -0.002, 0.001))
+	expected = model.apply(values)
+	out = np.empty_like(expected)
+	assert model.apply(values, out=out, chunk_size=7) is out
+	np.testing.assert_allclose(out, expected)
+	np.testing.assert_allclose(model.apply(values[3]), expected[3])
+
+
+def test_duplicate_joint_is_rejected():
+	model = CalibrationModel()
+	model.add_affine('a', 0, 1.0)
+	with pytest.raises(ValueError):
+		model.add_affine('a', 1, 1.0)
@@ -0,0 +1,77 @@
+import os
+import time
+import numpy as np
+from calibration_cache import CalibrationCache, glove_identity, hash_arrays
+
+
+IDENTITY = glove_identity({'information': 'CyberGlove III', 'device_sensor_count': 22, 'righthanded': True,
+						   'version': (1, 2)})
+
+
+def test_identity_ignores_other_keys():
+	metadata = {'information': 'CyberGlove III', 'device_sensor_count': 22, 'righthanded': True,
+				'version': [1, 2], 'created': '2024-01-01T00:00:00'}
+	assert glove_identity(metadata) == IDENTITY
+	assert glove_identity({})['version'] is None
+
+
+def test_hash_depends_on_type_and_shape():
+	values = np.arange(6)
+	assert hash_arrays(values) == hash_arrays(np.arange(6))
+	assert hash_arrays(values) != hash_arrays(values.reshape(2, 3))
+	assert hash_arrays(values) != hash_arrays(values.astype(np.float64))
+
+
+def test_get_or_fit_counts_once(tmp_path):
+	cache = CalibrationCache(str(tmp_path))
+	fits = []
+
+	def fit():
+		fits.append(1)
+		return {'gain': np.array([0.5, 1.0]), 'offset': 2.0}
+
+	for _ in range(3):
+		parameters = cache.get_or_fit(IDENTITY, 3, hash_arrays(np.arange(4)), fit)
+	assert len(fits) == 1
+	assert (cache.hits, cache.misses) == (2, 1)
+	np.testing.assert_array_equal(parameters['gain'], [0.5, 1.0])
+	assert parameters['offset'] == 2.0
+
+
+def test_latest(tmp_path):
+	cache = CalibrationCache(str(tmp_path))
+	assert cache.latest(IDENTITY, 3) is None
+	cache.put(cache.key(IDENTITY, 3, 'old'), {'gain': 1.0})
+	past = time.time() - 10
+	os.utime(cache._path(cache.key(IDENTITY, 3, 'old')), (past, past))
+	cache.put(cache.key(IDENTITY, 3, 'new'), {'gain': 2.0})
+	cache.put(cache.key(IDENTITY, 1, 'other'), {'gain': 3.0})
+	assert cache.latest(IDENTITY, 3) == {'gain': 2.0}
+	assert cache.latest(dict(IDENTITY, righthanded=False), 3) is None
+	assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+	cache = CalibrationCache(str(tmp_path))
+	keys = [cache.key(IDENTITY, 3, str(number)) for number in range(4)]
+	for number, key in enumerate(keys):
+		cache.put(key, {'gain': np.zeros(10)})
+		past = time.time() - 100 + number
+		os.utime(cache._path(key), (past, past))
+	cache.get(keys[0])											# the oldest entry is used again
+	size = os.path.getsize(cache._path(keys[0]))
+	cache.max_bytes = 3 * size
+	cache.evict()
+	assert [cache.get(key) is not None for key in keys] == [True, False, True, True]
+
+
+def test_oversized_entry_is_kept(tmp_path, capsys):
+	cache = CalibrationCache(str(tmp_path), max_bytes=100)
+	cache.put(cache.key(IDENTITY, 3, 'small'), {'gain': 1.0})
+	key = cache.key(IDENTITY, 3, 'large')
+	cache.put(key, {'gain': np.zeros(100)})
+	assert cache.get(key) is not None
+	assert cache.get(cache.key(IDENTITY, 3, 'small')) is None
+	assert 'alone exceeds' in capsys.readouterr().err
+	cache.clear()
+	assert os.listdir(tmp_path) == []
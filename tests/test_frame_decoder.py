@@ -0,0 +1,79 @@
+from frame_decoder import FrameDecoder, SENSOR_COUNT
+
+
+def dataset(values):
+	return b'G' + bytes(values) + b'\0'
+
+
+VALUES = tuple(range(1, SENSOR_COUNT + 1))
+WITH_HEADER = (71,) + VALUES[1:]						# the sensor value 71 is the header byte 'G'
+
+
+def test_complete_datasets():
+	decoder = FrameDecoder()
+	decoder.feed(dataset(VALUES) + dataset(WITH_HEADER))
+	assert list(decoder.frames()) == [VALUES, WITH_HEADER]
+	assert decoder.frames_decoded == 2
+	assert decoder.answers == 2
+	assert decoder.corrupt_frames == 0
+
+
+def test_dataset_split_into_segments():
+	decoder = FrameDecoder()
+	data = dataset(WITH_HEADER) + dataset(VALUES)
+	frames = []
+	for start in range(0, len(data), 5):
+		decoder.feed(data[start:start + 5])
+		frames.extend(decoder.frames())
+	assert frames == [WITH_HEADER, VALUES]
+	assert decoder.dropped_bytes == 0
+
+
+def test_incomplete_dataset_is_kept():
+	decoder = FrameDecoder()
+	decoder.feed(dataset(VALUES)[:10])
+	assert decoder.next_frame() is None
+	decoder.feed(dataset(VALUES)[10:])
+	assert decoder.next_frame() == VALUES
+
+
+def test_short_dataset_is_skipped():
+	decoder = FrameDecoder()
+	decoder.feed(b'G' + bytes(VALUES[:10]) + b'\0' + dataset(VALUES))
+	assert list(decoder.frames()) == [VALUES]
+	assert decoder.corrupt_frames == 1
+	assert decoder.answers == 2
+
+
+def test_long_dataset_is_skipped():
+	decoder = FrameDecoder()
+	decoder.feed(b'G' + bytes(VALUES) + b'\x05\0' + dataset(VALUES))
+	assert list(decoder.frames()) == [VALUES]
+	assert decoder.answers == 2
+	assert decoder.frames_decoded == 1
+
+
+def test_long_dataset_with_header_in_payload():
+	# the 'G' inside the corrupt dataset must not swallow the following valid dataset
+	decoder = FrameDecoder()
+	decoder.feed(b'G' + bytes(WITH_HEADER) + b'\x05\0' + dataset(WITH_HEADER) + dataset(VALUES))
+	assert list(decoder.frames()) == [WITH_HEADER, VALUES]
+	assert decoder.answers == 3
+	assert decoder.corrupt_frames >= 1
+
+
+def test_bytes_before_header_are_dropped():
+	decoder = FrameDecoder()
+	decoder.feed(b'\x01\x02' + dataset(VALUES))
+	assert decoder.next_frame() == VALUES
+	assert decoder.dropped_bytes == 2
+
+
+def test_buffer_grows_and_compacts():
+	decoder = FrameDecoder(buffer_size=2 * (SENSOR_COUNT + 2))
+	data = dataset(VALUES) * 10
+	decoder.feed(data)
+	assert list(decoder.frames()) == [VALUES] * 10
+	for _ in range(3):
+		decoder.feed(data)
+		assert list(decoder.frames()) == [VALUES] * 10
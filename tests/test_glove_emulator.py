@@ -0,0 +1,84 @@
+import time
+import socket
+import pytest
+import glove
+from emulator import GloveEmulator
+
+
+def free_port():
+	with socket.socket() as sock:
+		sock.bind(('127.0.0.1', 0))
+		return sock.getsockname()[1]
+
+
+@pytest.fixture
+def connect(monkeypatch):
+	"""
+	Connects a `Glove` to an emulator created with the given arguments.
+	"""
+	monkeypatch.setattr(glove.Glove, '_is_local_address', staticmethod(lambda ip_address_pc: True))
+	connections = []
+
+	def connect(**kwargs):
+		port = free_port()
+		emulator = GloveEmulator(port=port, seed=1, **kwargs)
+		emulator.start()
+		gl = glove.Glove()
+		assert gl.connect_glove('127.0.0.1', port)
+		connections.append((gl, emulator))
+		return gl, emulator
+
+	yield connect
+	for gl, emulator in connections:
+		gl.disconnect_glove()
+		emulator.stop()
+
+
+def test_queries(connect):
+	gl, _ = connect(segment_size=3, righthanded=False, version=(0, 3))
+	assert gl.get_righthanded() is False
+	assert gl.get_version_number() == (0, 3)
+	assert gl.get_amount_of_sensors() == 22
+	assert gl.get_glove_information()
+
+
+def test_get_one_sample_with_corrupt_datasets(connect):
+	gl, emulator = connect(corrupt_rate=0.2, segment_size=7)
+	for sequence in range(200):
+		sample = gl.get_one_sample()
+		assert len(sample.values) == 22
+		assert sample.sequence == sequence
+		assert sample.request_time <= sample.timestamp
+	assert emulator.corrupt_sent > 0
+	assert gl.decoder.corrupt_frames == emulator.corrupt_sent
+	assert gl.decoder.answers == emulator.datasets_sent
+
+
+def test_get_samples_pipelined_with_corrupt_datasets(connect):
+	gl, emulator = connect(corrupt_rate=0.1, latency=0.001)
+	samples = list(gl.get_samples_pipelined(500, window=8))
+	assert [sample.sequence for sample in samples] == list(range(500))
+	assert all(0 <= sample.timestamp - sample.request_time < 0.5 for sample in samples)
+	assert emulator.corrupt_sent > 0
+	assert gl.decoder.answers == emulator.datasets_sent
+	assert gl.get_version_number() == (1, 2)					# no answer of the pipeline is left over
+
+
+def test_query_after_pipeline_ended_early(connect):
+	gl, _ = connect(latency=0.001)
+	samples = gl.get_samples_pipelined(100, window=8)
+	next(samples)
+	samples.close()
+	assert gl.get_righthanded() is True
+
+
+def test_query_after_stop_streaming(connect):
+	gl, _ = connect(rate=500.0)
+	received = []
+	assert gl.start_streaming(callback=received.append)
+	while len(received) < 50:
+		time.sleep(0.01)
+	gl.stop_streaming()
+	assert gl.get_version_number() == (1, 2)
+	assert gl.get_righthanded() is True
+	assert len(gl.get_one_sample().values) == 22
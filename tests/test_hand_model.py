@@ -0,0 +1,62 @@
+import warnings
+import numpy as np
+import pytest
+import method_2
+from hand_model import HandModel, JOINTS, CMC_ABDUCTION, CMC_ROLL
+
+
+def random_angles(n=50, seed=0):
+	return np.random.default_rng(seed).uniform(0, 60, (len(JOINTS), n))
+
+
+def test_flat_hand():
+	model = HandModel()
+	angles = np.zeros((len(JOINTS), 1))
+	np.testing.assert_allclose(model.index_tip(angles), [[90 + 40 + 24 + 21, 22, 0]])
+	distance = np.linalg.norm(model.thumb_tip(angles) - model.index_tip(angles), axis=-1)
+	np.testing.assert_allclose(model.fingertip_distance(angles), distance)
+
+
+def test_jacobian_matches_finite_differences():
+	model = HandModel()
+	angles = random_angles()
+	_, derivatives = model.fingertip_distance(angles, jacobian=True)
+	step = 1e-6
+	for column, joint in enumerate((CMC_ABDUCTION, CMC_ROLL)):
+		shifted = angles.copy()
+		shifted[joint] += step
+		numeric = (model.fingertip_distance(shifted) - model.fingertip_distance(angles)) / step
+		np.testing.assert_allclose(derivatives[:, column], numeric, rtol=1e-4, atol=1e-6)
+
+
+def test_wrong_amount_of_angles():
+	with pytest.raises(ValueError):
+		HandModel().fingertip_distance(np.zeros((7, 1)))
+
+
+def test_closed_loop_recovers_gains():
+	# the usage example of method_2: pinch poses of a hand with CMC gains 0.4 (abduction) and 0.5 (roll)
+	g = (0.6, 0.9, 0.55, 0.7, 0.7, 0.4)
+	s5 = method_2.calc_s_rel(np.array([157, 156, 135, 157, 170, 161, 152]), 118)
+	s = np.array([
+		method_2.calc_s_rel(np.array([51, 66, 43, 67, 60, 48, 66]), 34),
+		method_2.calc_s_rel(np.array([78, 57, 85, 63, 56, 63, 70]), 24),
+		method_2.calc_s_rel(np.array([109, 163, 98, 146, 155, 136, 129]), 74),
+		method_2.calc_s_rel(np.array([53, 64, 66, 55, 53, 59, 52]), 52),
+		method_2.calc_s_rel(np.array([153, 178, 176, 168, 154, 156, 166]), 22),
+		s5,
+		0.8 * s5,
+		method_2.calc_s_rel(np.array([12, 13, 12, 11, 12, 12, 13]), 12),
+	])
+	g_abduction, g_roll = method_2.calc_g_closed_loop(s, g)
+	assert g_abduction == pytest.approx(0.4, abs=0.02)
+	assert g_roll == pytest.approx(0.5, abs=0.02)
+
+
+def test_closed_loop_without_gains_warns():
+	s = np.abs(random_angles(20, 1))
+	with warnings.catch_warnings(record=True) as caught:
+		warnings.simplefilter('always')
+		result = method_2.calc_g_closed_loop(s)
+	assert len(result) == 2
+	assert caught
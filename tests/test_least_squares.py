@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+import method_3
+from least_squares import solve_least_squares
+
+
+def normal_equations(A, y):
+	# the solution of the original implementation of method_3
+	return np.linalg.inv(A.T @ A) @ A.T @ y
+
+
+def test_matches_lstsq():
+	rng = np.random.default_rng(0)
+	A = rng.normal(size=(50, 4))
+	y = rng.normal(size=50)
+	np.testing.assert_allclose(solve_least_squares(A, y), np.linalg.lstsq(A, y, rcond=None)[0])
+
+
+def test_batch_matches_single_problems():
+	rng = np.random.default_rng(1)
+	A = rng.normal(size=(3, 22, 40, 2))
+	y = rng.normal(size=(3, 22, 40))
+	batch = solve_least_squares(A, y)
+	assert batch.shape == (3, 22, 2)
+	np.testing.assert_allclose(batch[2, 5], solve_least_squares(A[2, 5], y[2, 5]))
+
+
+def test_rank_deficient_matrix_raises():
+	A = np.ones((4, 2))
+	with pytest.raises(np.linalg.LinAlgError):
+		solve_least_squares(A, np.arange(4.0))
+
+
+def test_flexion_fit_matches_reference():
+	s = np.array([34, 44, 54, 64])
+	a = np.array([10, 30, 50, 70])
+	gain, offset = method_3.calc_g_and_o_lin(s, a)
+	(slope, intercept) = normal_equations(np.stack([a, np.ones(4)], axis=-1), s)
+	np.testing.assert_allclose((gain, offset), (1 / slope, -intercept / slope))
+	assert method_3.calc_alpha(64, gain, offset) == pytest.approx(70)
+
+
+def test_flexion_fit_of_all_sensors():
+	rng = np.random.default_rng(2)
+	a = np.repeat([10, 30, 50, 70], 100)
+	s = 0.5 * a + np.arange(22)[:, np.newaxis] + rng.normal(0, 1, (22, a.size))
+	gain, offset = method_3.calc_g_and_o_lin(s, a)
+	assert gain.shape == (22,)
+	for sensor in (0, 21):
+		np.testing.assert_allclose((gain[sensor], offset[sensor]), method_3.calc_g_and_o_lin(s[sensor], a))
+	np.testing.assert_allclose(gain, 2, rtol=0.05)
+
+
+def test_separation_fit_matches_reference():
+	g_l, g_r, o_l, o_r = 0.98, 1.28, -58.23, -47.64
+	s = np.array([55, 178, 68, 189, 89, 210])
+	s_l = np.array([34, 60, 28, 70, 38, 75])
+	s_r = np.array([56, 89, 48, 93, 57, 97])
+	a = np.array([0, 0, 20, 20, 30, 30])
+	result = method_3.calc_sep(s, s_l, s_r, a, g_l, g_r, o_l, o_r)
+	diff = (s_l * g_l + o_l) - (s_r * g_r + o_r)
+	a_, c1, c2, b = normal_equations(np.stack([a, diff ** 2, diff, np.ones(6)], axis=-1), s)
+	np.testing.assert_allclose(result, (1 / a_, -c2 / a_, -c1 / a_, -b / a_), rtol=1e-6)
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+import method_2
+import method_3
+from frame_decoder import Sample
+from online_calibration import RecursiveLeastSquares, OnlineFlexionCalibration, OnlineGainCalibration, \
+	OnlineSeparationCalibration
+
+
+def test_rls_matches_batch_solution():
+	rng = np.random.default_rng(0)
+	X = rng.normal(size=(200, 3))
+	y = X @ [1.5, -2.0, 0.5] + rng.normal(0, 0.1, 200)
+	estimator = RecursiveLeastSquares(3, initial_covariance=1e8)
+	for row, observation in zip(X, y):
+		estimator.update(row, observation)
+	np.testing.assert_allclose(estimator.parameters, np.linalg.lstsq(X, y, rcond=None)[0], atol=1e-5)
+	assert estimator.samples == 200
+
+
+def test_rls_settles_and_restarts():
+	estimator = RecursiveLeastSquares(1, tolerance=1e-6, settle_samples=10)
+	for _ in range(30):
+		estimator.update([1.0], 2.0)
+	assert estimator.settled
+	estimator.restart_convergence()
+	assert not estimator.settled
+
+
+def test_invalid_forgetting_factor():
+	with pytest.raises(ValueError):
+		RecursiveLeastSquares(2, forgetting_factor=0)
+
+
+def test_flexion_matches_method_3():
+	angles = np.repeat([10, 30, 50, 70], 50)
+	values = 0.5 * angles[:, np.newaxis] + np.arange(22) + 20 + np.random.default_rng(1).normal(0, 1, (200, 22))
+	calibration = OnlineFlexionCalibration()
+	for angle, dataset in zip(angles, values):
+		calibration.set_angle(angle)
+		calibration(Sample(0.0, dataset, 0))
+	calibration.set_angle(None)
+	calibration(Sample(0.0, values[0] + 100, 0))					# ignored between poses
+	gain, offset = method_3.calc_g_and_o_lin(values.T, angles)
+	np.testing.assert_allclose(calibration.gain, gain, rtol=1e-4)
+	np.testing.assert_allclose(calibration.offset, offset, rtol=1e-4, atol=1e-3)
+	assert calibration.samples == 200
+
+
+def test_gain_matches_method_2():
+	neutral = np.full(22, 40.0)
+	calibration = OnlineGainCalibration(neutral[:2], sensors=[0, 1])
+	for angle in (0, 60):
+		calibration.set_angle(angle)
+		for _ in range(20):
+			calibration(neutral + angle / np.array([0.5] + [0.25] * 21))
+	expected = [method_2.calc_g_lin(40, 40 + 60 / g, 0, 60) for g in (0.5, 0.25)]
+	np.testing.assert_allclose(calibration.gain, expected, rtol=1e-6)
+
+
+def test_separation_matches_method_3():
+	flexion_l, flexion_r = (0.98, -58.23), (1.28, -47.64)
+	s = np.array([55, 178, 68, 189, 89, 210])
+	s_l = np.array([34, 60, 28, 70, 38, 75])
+	s_r = np.array([56, 89, 48, 93, 57, 97])
+	angles = np.array([0, 0, 20, 20, 30, 30])
+	calibration = OnlineSeparationCalibration(10, 5, 8, flexion_l, flexion_r, settle_samples=1)
+	for angle, value, value_l, value_r in list(zip(angles, s, s_l, s_r)) * 100:	# outweighs the initial estimates
+		dataset = np.zeros(22)
+		dataset[[10, 5, 8]] = value, value_l, value_r
+		calibration.set_angle(angle)
+		calibration(dataset)
+	expected = method_3.calc_sep(s, s_l, s_r, angles, flexion_l[0], flexion_r[0], flexion_l[1], flexion_r[1])
+	np.testing.assert_allclose(calibration.parameters, expected, rtol=1e-3)
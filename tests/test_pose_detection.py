@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+import method_3
+from frame_decoder import Sample
+from pose_detection import RollingStatistics, StaticPoseDetector, PoseCollector
+
+
+def test_rolling_statistics_match_numpy():
+	values = np.random.default_rng(0).integers(1, 256, (100, 22))
+	statistics = RollingStatistics(10)
+	for dataset in values:
+		statistics.update(dataset)
+	assert statistics.full and statistics.count == 10
+	np.testing.assert_allclose(statistics.mean, values[-10:].mean(axis=0))
+	np.testing.assert_allclose(statistics.variance, values[-10:].var(axis=0))
+	statistics.clear()
+	assert statistics.count == 0 and not statistics.full
+
+
+def test_window_too_small():
+	with pytest.raises(ValueError):
+		RollingStatistics(1)
+
+
+def poses(angles, moving=30, still=40, interval=0.01):
+	"""
+	Yields samples of a hand moving between poses held still, sensor values 40 + 2 * angle.
+	"""
+	timestamp = 0.0
+	for angle in angles:
+		for step in range(moving):
+			yield Sample(timestamp, tuple(np.full(22, 200 - 5 * step)), 0)
+			timestamp += interval
+		for _ in range(still):
+			yield Sample(timestamp, tuple(np.full(22, 40 + 2 * angle)), 0)
+			timestamp += interval
+
+
+def test_every_pose_is_reported_once():
+	detector = StaticPoseDetector(window=20, max_std=0.5)
+	for sample in poses([0, 30, 60]):
+		detector(sample)
+	assert [snapshot.values[0] for snapshot in detector.snapshots] == [40, 100, 160]
+	first = detector.snapshots[0]
+	assert first.count == 20
+	assert first.end - first.start == pytest.approx(0.19)
+
+
+def test_collector_inputs():
+	collector = PoseCollector([0, 30, 60])
+	detector = StaticPoseDetector(window=20, max_std=0.5, callback=collector.add)
+	for sample in poses([0, 30, 60, 45]):
+		detector(sample)
+	assert collector.complete and collector.wait(0)
+	assert len(collector.snapshots) == 3								# the fourth pose is ignored
+	gain, offset = method_3.calc_g_and_o_lin(*collector.method_3_inputs([0, 1]))
+	np.testing.assert_allclose(gain, 0.5)
+	np.testing.assert_allclose(offset, -20)
+	assert collector.method_1_inputs(4) == {'s1': 40, 's2': 100, 'a1': 0, 'a2': 30}
+	relative, angles = collector.method_2_inputs([0])
+	np.testing.assert_allclose(relative, [[0, 60, 120]])
+	np.testing.assert_allclose(angles, [0, 30, 60])
+
+
+def test_method_2_inputs_need_a_neutral_pose():
+	collector = PoseCollector([10, 30])
+	detector = StaticPoseDetector(window=20, max_std=0.5, callback=collector.add)
+	for sample in poses([10, 30]):
+		detector(sample)
+	with pytest.raises(ValueError):
+		collector.method_2_inputs()
+	relative, _ = collector.method_2_inputs(neutral=1)
+	np.testing.assert_allclose(relative[:, 1], 0)
@@ -0,0 +1,98 @@
+import time
+import itertools
+import numpy as np
+import pytest
+from recorder import Recorder
+from session_file import SessionWriter
+from replay import ReplaySource
+
+
+TIMESTAMPS = 5 + np.arange(200) * 0.01
+VALUES = np.random.default_rng(0).integers(1, 256, (200, 22), dtype=np.uint8)
+
+
+@pytest.fixture(params=['.cg3s', '.npy', '.txt'])
+def recording(request, tmp_path):
+	"""
+	Path of a recording of 200 datasets at 100 Hz in every supported format.
+	"""
+	path = str(tmp_path / ('recording' + request.param))
+	if request.param == '.txt':
+		with open(path, 'w') as file:
+			file.writelines(f"{tuple(dataset.tolist())}\n" for dataset in VALUES)
+		return path
+	writer = SessionWriter(path, chunk_size=64) if request.param == '.cg3s' else Recorder(path)
+	with writer:
+		for timestamp, dataset in zip(TIMESTAMPS, VALUES):
+			writer.append(tuple(dataset), timestamp)
+	return path
+
+
+def recorded(path):
+	"""
+	Timestamps as replayed from the recording, text files start at 0 with the rate of 100 Hz.
+	"""
+	return np.arange(200) / 100.0 if path.endswith('.txt') else TIMESTAMPS
+
+
+def test_replay_as_fast_as_possible(recording):
+	source = ReplaySource(recording, speed=None, recorded_timestamps=True, chunk_size=50)
+	samples = list(source.samples())
+	assert [sample.sequence for sample in samples] == list(range(200))
+	np.testing.assert_allclose([sample.timestamp for sample in samples], recorded(recording))
+	np.testing.assert_array_equal([sample.values for sample in samples], VALUES)
+
+
+def test_time_range(recording):
+	timestamps = recorded(recording)
+	source = ReplaySource(recording, speed=None, start=timestamps[70], end=timestamps[130], recorded_timestamps=True,
+						  chunk_size=50)
+	np.testing.assert_array_equal(list(source.poll_datasets()), VALUES[70:130])
+
+
+def test_loop_continues_timestamps(recording):
+	source = ReplaySource(recording, speed=None, loop=True, recorded_timestamps=True)
+	samples = list(itertools.islice(source.samples(), 450))
+	np.testing.assert_allclose(np.diff([sample.timestamp for sample in samples]), 0.01)
+	assert samples[200].values == samples[0].values and samples[449].sequence == 449
+
+
+def test_speed(tmp_path):
+	path = str(tmp_path / 'recording.npy')
+	with Recorder(path) as writer:
+		for timestamp, dataset in zip(TIMESTAMPS[:51], VALUES):
+			writer.append(tuple(dataset), timestamp)
+	start = time.monotonic()
+	samples = list(ReplaySource(path, speed=2.5).samples())
+	duration = time.monotonic() - start
+	assert 0.19 < duration < 0.4										# 0.5 s of the recording at 2.5 times the speed
+	assert samples[-1].timestamp - samples[0].timestamp == pytest.approx(0.2, abs=0.05)
+
+
+def test_streaming(recording):
+	source = ReplaySource(recording, speed=None)
+	assert source.start_streaming()
+	datasets = list(source.stream_datasets())
+	source.stop_streaming()
+	np.testing.assert_array_equal(datasets, VALUES)
+
+
+def test_stop_endless_streaming(recording):
+	source = ReplaySource(recording, speed=None, loop=True, queue_size=16)
+	source.start_streaming()
+	samples = list(itertools.islice(source.stream_samples(), 500))
+	source.stop_streaming()
+	assert samples[-1].sequence == 499
+
+
+def test_acquisition(recording):
+	received = []
+	source = ReplaySource(recording, speed=None)
+	source.start_acquisition([received.append], maxsize=16)
+	statistics = source.join_acquisition()
+	assert len(received) == 200 and statistics[0]['dropped'] == 0
+
+
+def test_invalid_speed(recording):
+	with pytest.raises(ValueError):
+		ReplaySource(recording, speed=0)
@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+from session_file import SessionWriter, SessionReader, load_session
+
+
+METADATA = {'information': 'CyberGlove III', 'device_sensor_count': 22, 'righthanded': True, 'version': [1, 2]}
+
+
+def write(path, count=1050, chunk_size=100, close=True):
+	"""
+	Writes a session of `count` datasets at 100 Hz and returns them.
+	"""
+	timestamps = 10 + np.arange(count) * 0.01
+	values = np.random.default_rng(0).integers(1, 256, (count, 22), dtype=np.uint8)
+	writer = SessionWriter(str(path), metadata=METADATA, chunk_size=chunk_size)
+	for timestamp, dataset in zip(timestamps, values):
+		writer.append(tuple(dataset), timestamp)
+	if close:
+		writer.close()
+	else:
+		writer.flush()
+		writer._fp.close()										# aborted recording, the index is missing
+	return timestamps, values
+
+
+def test_round_trip(tmp_path):
+	path = tmp_path / 'session.cg3s'
+	timestamps, values = write(path)
+	with SessionReader(str(path)) as reader:
+		assert reader.metadata['information'] == 'CyberGlove III'
+		assert reader.metadata['sensor_count'] == 22 and 'created' in reader.metadata
+		assert len(reader) == 1050 and len(reader.index) == 11
+		assert reader.start == timestamps[0] and reader.end == timestamps[-1]
+		read_timestamps, read_values = reader.read()
+		samples = list(reader.samples(end=timestamps[3]))
+	np.testing.assert_array_equal(read_timestamps, timestamps)
+	np.testing.assert_array_equal(read_values, values)
+	assert [sample.sequence for sample in samples] == [0, 1, 2]
+	assert samples[2].values == tuple(values[2]) and samples[2].timestamp == timestamps[2]
+
+
+def test_time_range(tmp_path):
+	path = tmp_path / 'session.cg3s'
+	timestamps, values = write(path)
+	read_timestamps, read_values = load_session(str(path), timestamps[150], timestamps[420])
+	np.testing.assert_array_equal(read_timestamps, timestamps[150:420])
+	np.testing.assert_array_equal(read_values, values[150:420])
+	with SessionReader(str(path)) as reader:
+		assert len(list(reader.chunks(timestamps[150], timestamps[420]))) == 4		# only the chunks 1 to 4 are read
+		assert len(reader.read(100.0)[0]) == 0
+
+
+def test_truncated_file_rebuilds_index(tmp_path):
+	path = tmp_path / 'session.cg3s'
+	timestamps, values = write(path, close=False)
+	data = path.read_bytes()
+	path.write_bytes(data[:-10])								# the last chunk was not written completely
+	with SessionReader(str(path)) as reader:
+		assert len(reader.index) == 10 and len(reader) == 1000
+		read_timestamps, read_values = reader.read(timestamps[950])
+	np.testing.assert_array_equal(read_timestamps, timestamps[950:1000])
+	np.testing.assert_array_equal(read_values, values[950:1000])
+
+
+def test_empty_session(tmp_path):
+	path = tmp_path / 'session.cg3s'
+	SessionWriter(str(path)).close()
+	with SessionReader(str(path)) as reader:
+		assert len(reader) == 0 and reader.start is None
+		assert reader.read()[1].shape == (0, 22)
+
+
+def test_not_a_session_file(tmp_path):
+	path = tmp_path / 'recording.npy'
+	np.save(path, np.zeros(10))
+	with pytest.raises(ValueError):
+		SessionReader(str(path))
@@ -0,0 +1,87 @@
+import os
+import sys
+import subprocess
+from multiprocessing import shared_memory, resource_tracker
+import numpy as np
+import pytest
+from frame_decoder import Sample
+from calibration import CalibrationModel
+from shared_frame import FramePublisher, FrameReader
+
+
+CODE = os.path.join(os.path.dirname(__file__), '..', 'code')
+
+
+def values(number):
+	return tuple((np.arange(22) + number) % 255 + 1)
+
+
+def test_latest_frame():
+	with FramePublisher(slots=8) as publisher, FrameReader(publisher.name) as reader:
+		assert reader.latest() is None and reader.count == 0
+		for number in range(20):
+			publisher(Sample(number * 0.01, values(number), number))
+		frame = reader.latest()
+		assert frame.count == 20 and frame.sequence == 19 and frame.timestamp == pytest.approx(0.19)
+		np.testing.assert_array_equal(frame.values, values(19))
+		assert frame.angles.shape == (0,)
+
+
+def test_angles_of_the_model():
+	model = CalibrationModel()
+	model.add_affine('index_mcp', 5, 0.5, -10.0)
+	with FramePublisher(model=model) as publisher, FrameReader(publisher.name) as reader:
+		publisher.publish(1.0, values(0))
+		assert reader.angle_count == 1
+		np.testing.assert_allclose(reader.latest().angles, [0.5 * values(0)[5] - 10])
+
+
+def test_window():
+	with FramePublisher(slots=8) as publisher, FrameReader(publisher.name) as reader:
+		for number in range(3):
+			publisher.publish(number, values(number), number)
+		window = reader.window(5)
+		assert (window.first, window.last) == (1, 3)
+		np.testing.assert_array_equal(window.timestamps, [0, 1, 2])
+		for number in range(3, 13):
+			publisher.publish(number, values(number), number)
+		window = reader.window(8)
+		assert (window.first, window.last) == (6, 13)
+		np.testing.assert_array_equal(window.timestamps, np.arange(5, 13))
+		np.testing.assert_array_equal(window.values, [values(number) for number in range(5, 13)])
+		assert not reader.intact(window)						# the next frame overwrites the oldest one
+		window = reader.window(4)
+		assert reader.intact(window)
+		for number in range(13, 17):
+			publisher.publish(number, values(number), number)
+		assert not reader.intact(window)
+		with pytest.raises(ValueError):
+			reader.window(9)
+		del window												# release the views before the reader detaches
+
+
+def test_reader_in_other_process():
+	with FramePublisher() as publisher:
+		publisher.publish(1.5, values(7), 7)
+		script = (f"import sys; sys.path.insert(0, {CODE!r})\n"
+				  "from shared_frame import FrameReader\n"
+				  f"with FrameReader({publisher.name!r}) as reader:\n"
+				  "	frame = reader.latest()\n"
+				  "	print(frame.sequence, frame.timestamp, int(frame.values[0]))\n")
+		result = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, timeout=30)
+		assert result.stdout.split() == ['7', '1.5', str(values(7)[0])], result.stderr
+		# the exit of the reader does not remove the block
+		publisher.publish(2.5, values(8), 8)
+		with FrameReader(publisher.name) as reader:
+			assert reader.latest().sequence == 8
+
+
+def test_not_a_frame_block():
+	block = shared_memory.SharedMemory(create=True, size=4096)
+	try:
+		with pytest.raises(ValueError):
+			FrameReader(block.name)
+	finally:
+		block.close()
+		resource_tracker.register(block._name, 'shared_memory')	# the reader unregistered it in this process
+		block.unlink()
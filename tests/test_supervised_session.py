@@ -0,0 +1,105 @@
+import time
+import socket
+import pytest
+import glove
+from frame_decoder import Sample
+from emulator import GloveEmulator
+from supervised_session import SupervisedSession
+
+
+def free_port():
+	with socket.socket() as sock:
+		sock.bind(('127.0.0.1', 0))
+		return sock.getsockname()[1]
+
+
+def wait_until(condition, timeout=10.0):
+	end = time.monotonic() + timeout
+	while not condition():
+		assert time.monotonic() < end, "timed out"
+		time.sleep(0.01)
+
+
+@pytest.fixture
+def supervise(monkeypatch):
+	"""
+	Creates a `SupervisedSession` connected to an emulator. The returned function `switch_on` starts another\
+	emulator on the same port, i.e. the glove connecting again.
+	"""
+	monkeypatch.setattr(glove.Glove, '_is_local_address', staticmethod(lambda ip_address_pc: True))
+	port = free_port()
+	emulators = []
+	sessions = []
+
+	def switch_on():
+		emulator = GloveEmulator(port=port, seed=len(emulators))
+		emulator.start()
+		emulators.append(emulator)
+		return emulator
+
+	def supervise(**kwargs):
+		session = SupervisedSession(**kwargs)
+		emulator = switch_on()
+		assert session.connect('127.0.0.1', port)
+		sessions.append(session)
+		return session, emulator, switch_on
+
+	yield supervise
+	for session in sessions:
+		session.close()
+	for emulator in emulators:
+		emulator.stop()
+
+
+def check_gap(received, gaps):
+	"""
+	Checks that the consumer only received samples and that the gap lies between two of them.
+	"""
+	assert all(isinstance(sample, Sample) for sample in received)
+	sequences = [sample.sequence for sample in received]
+	assert sequences == sorted(sequences)
+	assert len(gaps) == 1
+	gap = gaps[0]
+	position = sequences.index(gap.sequence)
+	assert (gap.start, gap.end) == (received[position - 1].timestamp, received[position].timestamp)
+	assert gap.lost_samples > 0
+
+
+@pytest.mark.parametrize('streaming', [True, False])
+def test_reconnect_after_switching_off(supervise, streaming):
+	session, emulator, switch_on = supervise(streaming=streaming, stall_timeout=0.5)
+	assert session.description['device_sensor_count'] == 22
+	received, gaps = [], []
+	session.start_acquisition([received.append], on_gap=gaps.append)
+	wait_until(lambda: len(received) >= 20)
+	emulator.stop()												# the connection is closed
+	time.sleep(0.2)
+	switch_on()
+	wait_until(lambda: gaps and received[-1].sequence > gaps[0].sequence + 20)
+	session.stop_acquisition()
+	check_gap(received, gaps)
+	assert gaps == session.gaps
+
+
+def test_reconnect_after_stall(supervise):
+	session, emulator, switch_on = supervise(streaming=False, stall_timeout=0.3)
+	received, gaps = [], []
+	session.start_acquisition([received.append], on_gap=gaps.append)
+	wait_until(lambda: len(received) >= 20)
+	emulator.latency = 5.0										# connected, but no datasets arrive
+	switch_on()
+	wait_until(lambda: gaps and received[-1].sequence > gaps[0].sequence + 20)
+	session.stop_acquisition()
+	check_gap(received, gaps)
+	assert gaps[0].end - gaps[0].start >= 0.3
+
+
+def test_glove_does_not_reconnect(supervise, capsys):
+	session, emulator, _ = supervise(stall_timeout=0.3, reconnect_timeout=0.3)
+	items = []
+	for item in session.samples():								# ends when the glove does not reconnect
+		items.append(item)
+		if len(items) == 20:
+			emulator.stop()
+	assert len(items) >= 20 and session.gaps == []
+	assert 'did not reconnect' in capsys.readouterr().err